@@ -0,0 +1 @@
+"""Performance benchmarks for copilot_interactive."""
@@ -0,0 +1,142 @@
+"""
+Benchmark answer memory lookups against a large store of remembered answers.
+
+A temporary SQLite store is filled with synthetic contexts (common words
+mixed with specific names, as in real agent questions), loaded through
+``AnswerMemory`` and queried with exact repeats, near-duplicates (one word
+changed) and unrelated contexts that miss.
+
+Usage:
+    python -m benchmarks.bench_answer_memory [--pairs N] [--queries N]
+"""
+
+import argparse
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from copilot_interactive.services.answer_memory import AnswerMemory
+from copilot_interactive.utils.text import normalize_context
+
+COMMON_WORDS = (
+    "should I delete overwrite the file directory branch migration table "
+    "config deploy staging production rollback tests failing lint commit "
+    "push merge rebase install upgrade package dependency version cache "
+    "server database schema column index backup restore user account token "
+    "secret key retry continue abort skip approve reject run build release"
+)
+WORDS = COMMON_WORDS.split()
+
+SYLLABLE_PARTS = (
+    "b c d f g h k l m n p r s t v w z br cl dr fl gr pl st tr sh ch th",
+    "a e i o u ai ea io ou",
+)
+ONSETS, VOWELS = (part.split() for part in SYLLABLE_PARTS)
+CODAS = ["", "", "n", "r", "s", "t", "l", "x", "ck", "nd", "st"]
+SUFFIXES = ["", "", "", ".py", ".ts", ".sql", ".yaml", ".json", "_test.py"]
+
+
+def _names(rng: random.Random, count: int) -> list[str]:
+    """Identifiers standing in for the files, branches and tables asked about."""
+    names = []
+    for _ in range(count):
+        stem = "".join(
+            rng.choice(ONSETS) + rng.choice(VOWELS) + rng.choice(CODAS)
+            for _ in range(rng.randint(2, 3))
+        )
+        if rng.random() < 0.3:
+            stem += f"_{rng.randrange(100)}"
+        names.append(stem + rng.choice(SUFFIXES))
+    return names
+
+
+def _context(rng: random.Random, names: list[str]) -> str:
+    """A synthetic agent question: common words plus a few specific names."""
+    words = rng.choices(WORDS, k=rng.randint(4, 10))
+    for _ in range(rng.randint(1, 3)):
+        words.insert(rng.randrange(len(words) + 1), rng.choice(names))
+    return " ".join(words) + "?"
+
+
+def _fill(path: Path, pairs: int, rng: random.Random, names: list[str]) -> list[str]:
+    """Create the store directly with SQL and return the stored contexts."""
+    schema = AnswerMemory(path, 1.0)
+    len(schema)  # opening the store creates the table
+    schema.close()
+    contexts = list({_context(rng, names) for _ in range(pairs)})
+    with sqlite3.connect(path) as db:
+        db.executemany(
+            "INSERT OR IGNORE INTO answers VALUES (?, ?, ?, 1, 0)",
+            ((normalize_context(c), c, "yes") for c in contexts),
+        )
+    return contexts
+
+
+def _near_duplicate(context: str, rng: random.Random) -> str:
+    """Change one word of a context."""
+    words = context.split()
+    words[rng.randrange(len(words) - 1)] = rng.choice(WORDS)
+    return " ".join(words)
+
+
+def _measure(memory: AnswerMemory, queries: list[str]) -> tuple[list[float], int]:
+    """Time each lookup; returns the latencies in ms and the number of hits."""
+    latencies = []
+    hits = 0
+    for query in queries:
+        start = time.perf_counter()
+        match = memory.lookup(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += match is not None
+    return latencies, hits
+
+
+def _report(name: str, latencies: list[float], hits: int) -> None:
+    """Print one result line."""
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{name:15} p50 {statistics.median(ordered):7.3f} ms  "
+        f"p99 {p99:7.3f} ms  max {ordered[-1]:7.3f} ms  "
+        f"hits {hits}/{len(latencies)}"
+    )
+
+
+def main() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pairs", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--min-similarity", type=float, default=0.9)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "answers.db"
+        names = _names(rng, 20_000)
+        contexts = _fill(path, args.pairs, rng, names)
+        memory = AnswerMemory(path, args.min_similarity)
+
+        start = time.perf_counter()
+        stored = len(memory)
+        print(
+            f"loaded {stored} answers in {(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+
+        sample = rng.sample(contexts, min(args.queries, len(contexts)))
+        workloads = {
+            "exact": lambda c: c,
+            "near duplicate": lambda c: _near_duplicate(c, rng),
+            "miss": lambda _c: _context(rng, names),
+        }
+        for name, make_query in workloads.items():
+            latencies, hits = _measure(memory, [make_query(c) for c in sample])
+            _report(name, latencies, hits)
+        memory.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark per-fallback latency of the assistant HTTP client.
+
+Compares opening a fresh ``httpx.AsyncClient`` for every fallback (the previous
+behaviour) with the pooled keep-alive client owned by ``AssistantService``,
+both against a local stub assistant.
+
+Usage:
+    python -m benchmarks.bench_assistant_client [--iterations N]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from copilot_interactive.config.settings import Settings
+from copilot_interactive.services.assistant_service import AssistantService
+from tests.stubs import StubAssistant
+
+
+async def _per_call_client(settings: Settings, iterations: int) -> list[float]:
+    """Time fallbacks that each open and close their own client."""
+    url = f"http://{settings.assistant_host}:{settings.assistant_port}"
+    payload = {"model": settings.assistant_model, "messages": [], "max_tokens": 256}
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        async with httpx.AsyncClient(timeout=settings.assistant_timeout) as client:
+            response = await client.post(f"{url}/chat/completions", json=payload)
+            response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def _pooled_client(settings: Settings, iterations: int) -> list[float]:
+    """Time fallbacks through the service's pooled client."""
+    service = AssistantService(settings)
+    samples = []
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            suggestion = await service.get_suggested_input("Run the tests?")
+            samples.append(time.perf_counter() - start)
+            assert suggestion is not None
+    finally:
+        await service.aclose()
+    return samples
+
+
+def _summary(name: str, samples: list[float]) -> str:
+    """Format latency statistics in milliseconds."""
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return (
+        f"{name:<16} mean={statistics.mean(samples) * 1000:7.3f} ms  "
+        f"p50={statistics.median(samples) * 1000:7.3f} ms  "
+        f"p99={p99 * 1000:7.3f} ms"
+    )
+
+
+def main() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    with StubAssistant() as stub:
+        # Without the cache, so every fallback is a round trip to the stub
+        settings = Settings(
+            assistant_host=stub.host, assistant_port=stub.port, assistant_cache_size=0
+        )
+        per_call = asyncio.run(_per_call_client(settings, args.iterations))
+        pooled = asyncio.run(_pooled_client(settings, args.iterations))
+
+    print(f"{args.iterations} fallbacks against {stub.base_url}")
+    print(_summary("per-call client", per_call))
+    print(_summary("pooled client", pooled))
+    speedup = statistics.mean(per_call) / statistics.mean(pooled)
+    print(f"speedup: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark ``copilot-interactive ask`` over a Unix socket against curl over TCP.
+
+A server is started with ``APP_UDS`` set and its terminal input pre-filled
+with answers, so every prompt is answered at once and the numbers are the
+cost an agent pays per prompt outside of the human: process startup, the
+connection and the request itself.
+
+Three measurements are reported:
+
+- startup: launching the client (``ask --help``) versus ``curl --version``;
+- per-prompt process: a full ``ask`` invocation versus a ``curl`` POST;
+- in-process round trip: ``client.ask`` over the Unix socket versus TCP,
+  without any process startup.
+
+Usage:
+    python -m benchmarks.bench_client [--requests N]
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from copilot_interactive.client import ask
+
+
+def _free_port() -> int:
+    """Find a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+def _time_runs(command: list[str], runs: int) -> list[float]:
+    """Wall-clock time of each run of a command."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _time_calls(socket_path: str | None, port: int, calls: int) -> list[float]:
+    """Time in-process requests through ``client.ask``."""
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        ask("Run the database migrations now?", socket_path, port=port)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _summary(samples: list[float]) -> str:
+    """p50 and p99 of one measurement in milliseconds."""
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"p50 {statistics.median(ordered) * 1e3:7.2f} ms  p99 {p99 * 1e3:7.2f} ms"
+
+
+def main() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    curl = shutil.which("curl")
+    port = _free_port()
+    with tempfile.TemporaryDirectory(prefix="cib") as directory:
+        socket_path = str(Path(directory) / "server.sock")
+        env = {
+            **os.environ,
+            "APP_HOST": "127.0.0.1",
+            "APP_PORT": str(port),
+            "APP_UDS": socket_path,
+            "NOTIFICATION_ENABLED": "false",
+        }
+        server = subprocess.Popen(
+            [sys.executable, "-m", "copilot_interactive.main"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=env,
+        )
+        try:
+            assert server.stdin is not None
+            # One typed-ahead answer per request, taken in order by the prompts
+            server.stdin.write(b"yes\n" * (args.requests * 8 + 10))
+            server.stdin.flush()
+            while True:
+                try:
+                    httpx.get(f"http://127.0.0.1:{port}/health")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.05)
+
+            client = [sys.executable, "-m", "copilot_interactive.cli", "ask"]
+            results = {
+                "startup: ask --help": _time_runs([*client, "--help"], args.requests),
+                "process: ask over unix socket": _time_runs(
+                    [*client, "--socket", socket_path, "Migrate now?"], args.requests
+                ),
+                "in-process: unix socket": _time_calls(
+                    socket_path, port, args.requests * 2
+                ),
+                "in-process: TCP": _time_calls(None, port, args.requests * 2),
+            }
+            if curl:
+                results["startup: curl --version"] = _time_runs(
+                    [curl, "--version"], args.requests
+                )
+                results["process: curl over TCP"] = _time_runs(
+                    [
+                        curl,
+                        "-s",
+                        "-X",
+                        "POST",
+                        "-H",
+                        "Content-Type: text/plain",
+                        "--data",
+                        "Migrate now?",
+                        f"http://127.0.0.1:{port}/user-input",
+                    ],
+                    args.requests,
+                )
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    for name in sorted(results):
+        print(f"{name:34} {_summary(results[name])}")
+    if not curl:
+        print("curl not found; skipped the curl measurements")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark the raw ASGI /user-input fast path against the FastAPI routes.
+
+Both apps are built by ``create_app`` and called directly as ASGI
+applications, with the terminal answering every prompt at once, so the
+numbers are the server-side cost of handling a request whose answer is
+already available: parsing, dependency resolution, the input service and
+serialization. Responses are checked to be byte-identical.
+
+Usage:
+    python -m benchmarks.bench_fast_path [--requests N]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from starlette.types import ASGIApp, Message
+
+from copilot_interactive.config.settings import Settings
+from copilot_interactive.main import create_app
+
+ROUTES = {
+    "/user-input": (b"text/plain", b"Run the database migrations now?"),
+    "/user-input/json": (
+        b"application/json",
+        b'{"context": "Run the database migrations now?"}',
+    ),
+}
+
+
+async def _answer_at_once(*_args: object) -> str:
+    """Console stand-in: the user has already typed the answer."""
+    return "yes, go ahead"
+
+
+async def _call(app: ASGIApp, path: str, content_type: bytes, body: bytes) -> bytes:
+    """Send one request through the ASGI app and return the response body."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"content-type", content_type),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 4000),
+    }
+    messages = iter([{"type": "http.request", "body": body, "more_body": False}])
+    responded = asyncio.Event()
+    chunks: list[bytes] = []
+
+    async def receive() -> Message:
+        # Like uvicorn: the body once, then block until the client is gone
+        for message in messages:
+            return message
+        await responded.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                responded.set()
+
+    await app(scope, receive, send)
+    return b"".join(chunks)
+
+
+async def _measure(
+    fast_path: bool, requests: int
+) -> dict[str, tuple[list[float], bytes]]:
+    """Time each route of one app variant."""
+    settings = Settings(notification_enabled=False, input_fast_path=fast_path)
+    app = create_app(settings)
+    results = {}
+    async with app.router.lifespan_context(app):
+        app.state.services.console_service.ask = _answer_at_once
+        for path, (content_type, body) in ROUTES.items():
+            for _ in range(200):  # warm up
+                await _call(app, path, content_type, body)
+            samples = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = await _call(app, path, content_type, body)
+                samples.append(time.perf_counter() - start)
+            # Time the answered path, not an error falling back to a default
+            assert json.loads(response)["source"] == "user", response
+            results[path] = (samples, response)
+    return results
+
+
+def _summary(samples: list[float]) -> str:
+    """p50, p99 and throughput of one run."""
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return (
+        f"p50 {statistics.median(ordered) * 1e6:7.1f} us  p99 {p99 * 1e6:7.1f} us  "
+        f"{len(ordered) / sum(ordered):8.0f} req/s"
+    )
+
+
+def main() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    routed = asyncio.run(_measure(False, args.requests))
+    fast = asyncio.run(_measure(True, args.requests))
+    for path in ROUTES:
+        routed_samples, routed_body = routed[path]
+        fast_samples, fast_body = fast[path]
+        assert fast_body == routed_body, (fast_body, routed_body)
+        speedup = statistics.median(routed_samples) / statistics.median(fast_samples)
+        print(f"POST {path}")
+        print(f"  FastAPI route  {_summary(routed_samples)}")
+        print(f"  fast path      {_summary(fast_samples)}  ({speedup:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
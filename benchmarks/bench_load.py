@@ -0,0 +1,327 @@
+"""
+Load and latency benchmark of the whole app.
+
+Runs the real app (``copilot_interactive.main:app``) under uvicorn in a
+subprocess whose stdin is driven by a scripted console, with the stub
+assistant and the stub notifier helper standing in for the outside world.
+Every scenario is run at each concurrency level against a fresh server:
+
+- ``user``: the scripted console answers each prompt after ``--answer-delay``
+- ``assistant``: nobody answers; the prompt times out and the assistant replies
+- ``default``: nobody answers and the assistant fails, so the default is used
+
+Requests per second, p50/p99 latency, the response sources and the server's
+memory use are printed and written as JSON so runs can be compared.
+
+Usage:
+    python -m benchmarks.bench_load [--concurrency 1 10 100] [--output FILE]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import IO, Any
+
+import httpx
+
+from copilot_interactive import __version__
+from tests.stubs import StubAssistant, stub_notifier_command
+
+SCENARIOS = ("user", "assistant", "default")
+
+PROMPT_PATTERN = re.compile(r"^\[(\d+)\] Input requested:")
+
+
+class ScriptedConsole:
+    """Answers the server's prompts on its stdin after a fixed delay."""
+
+    def __init__(
+        self, stdin: IO[bytes], stdout: IO[bytes], answer_delay: float | None
+    ) -> None:
+        """
+        Initialize the console.
+
+        Args:
+            stdin: The server's stdin.
+            stdout: The server's stdout, where prompts are rendered.
+            answer_delay: Seconds before answering, or None to never answer.
+        """
+        self._stdin = stdin
+        self._stdout = stdout
+        self._answer_delay = answer_delay
+        self._lock = threading.Lock()
+        self.prompts = 0
+        self._thread = threading.Thread(
+            target=self._read_prompts, name="scripted-console", daemon=True
+        )
+
+    def start(self) -> None:
+        """Start watching the server's output."""
+        self._thread.start()
+
+    def _read_prompts(self) -> None:
+        """Schedule an answer for every rendered prompt; always drain stdout."""
+        for raw in self._stdout:
+            match = PROMPT_PATTERN.match(raw.decode(errors="replace"))
+            if match is None:
+                continue
+            self.prompts += 1
+            if self._answer_delay is not None:
+                timer = threading.Timer(
+                    self._answer_delay, self._answer, args=(match.group(1),)
+                )
+                timer.daemon = True
+                timer.start()
+
+    def _answer(self, prompt_id: str) -> None:
+        """Type the answer to one prompt."""
+        with self._lock:
+            try:
+                self._stdin.write(f"{prompt_id}: approve\n".encode())
+                self._stdin.flush()
+            except (BrokenPipeError, ValueError):
+                pass
+
+
+def _free_port() -> int:
+    """Find a free local TCP port for the server."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+def _memory_mb(pid: int) -> dict[str, float | None]:
+    """Current and peak resident memory of a process (Linux only)."""
+    fields: dict[str, float | None] = {"VmRSS": None, "VmHWM": None}
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            key, _, value = line.partition(":")
+            if key in fields:
+                fields[key] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return {"rss_mb": fields["VmRSS"], "peak_rss_mb": fields["VmHWM"]}
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def _wait_healthy(base_url: str, timeout: float = 30) -> None:
+    """Wait until the server answers its health check."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("Server did not become healthy")
+            await asyncio.sleep(0.05)
+
+
+async def _drive(
+    base_url: str, concurrency: int, rounds: int
+) -> tuple[float, list[float], Counter[str], int]:
+    """Run the agents and collect latencies and response sources."""
+    latencies: list[float] = []
+    sources: Counter[str] = Counter()
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=120
+    ) as client:
+
+        async def agent(agent_id: int) -> None:
+            nonlocal errors
+            for step in range(rounds):
+                start = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/user-input",
+                        content=f"Agent {agent_id}: proceed with step {step}?",
+                        headers={"Content-Type": "text/plain"},
+                    )
+                    response.raise_for_status()
+                    sources[response.json()["source"]] += 1
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(agent(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return elapsed, latencies, sources, errors
+
+
+def _run_level(
+    scenario: str, concurrency: int, args: argparse.Namespace
+) -> dict[str, Any]:
+    """Run one scenario at one concurrency level against a fresh server."""
+    error_rate = 1.0 if scenario == "default" else args.error_rate
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+
+    with StubAssistant(
+        reply="approve", latency=args.assistant_latency, error_rate=error_rate
+    ) as stub:
+        env = {
+            **os.environ,
+            "INPUT_TIMEOUT": str(args.input_timeout),
+            "ASSISTANT_HOST": stub.host,
+            "ASSISTANT_PORT": str(stub.port),
+            # Measure every fallback, not the breaker failing fast
+            "ASSISTANT_BREAKER_THRESHOLD": "0",
+            "NOTIFICATION_ENABLED": "true",
+            "NOTIFICATION_BACKEND": "helper",
+            "NOTIFICATION_COMMAND": shlex.join(stub_notifier_command("--serve")),
+        }
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "copilot_interactive.main:app",
+                "--host",
+                "127.0.0.1",
+                "--port",
+                str(port),
+                "--log-level",
+                "warning",
+                "--no-access-log",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env,
+        )
+        assert server.stdin is not None
+        assert server.stdout is not None
+        console = ScriptedConsole(
+            server.stdin,
+            server.stdout,
+            args.answer_delay if scenario == "user" else None,
+        )
+        console.start()
+        try:
+            asyncio.run(_wait_healthy(base_url))
+            baseline = _memory_mb(server.pid)
+            elapsed, latencies, sources, errors = asyncio.run(
+                _drive(base_url, concurrency, args.rounds)
+            )
+            memory = _memory_mb(server.pid)
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+
+    ordered = sorted(latencies)
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "prompts": console.prompts,
+        "sources": dict(sources),
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": statistics.mean(ordered) * 1000 if ordered else None,
+            "p50": _percentile(ordered, 0.50) * 1000 if ordered else None,
+            "p99": _percentile(ordered, 0.99) * 1000 if ordered else None,
+            "max": ordered[-1] * 1000 if ordered else None,
+        },
+        "memory": {
+            "baseline_rss_mb": baseline["rss_mb"],
+            "rss_mb": memory["rss_mb"],
+            "peak_rss_mb": memory["peak_rss_mb"],
+        },
+    }
+
+
+def _format(result: dict[str, Any]) -> str:
+    """Format one result as a table row."""
+    latency = result["latency_ms"]
+    rss = result["memory"]["peak_rss_mb"]
+    return (
+        f"{result['scenario']:<10} {result['concurrency']:>5} "
+        f"{result['rps']:>9.1f} {latency['p50'] or 0:>10.1f} "
+        f"{latency['p99'] or 0:>10.1f} {rss or 0:>9.1f}  "
+        f"{result['errors']:>3} {json.dumps(result['sources'])}"
+    )
+
+
+def main() -> None:
+    """Run the benchmark, print a table and write the JSON results."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--scenario", nargs="+", choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 10, 100])
+    parser.add_argument(
+        "--rounds", type=int, default=5, help="requests sent by each agent"
+    )
+    parser.add_argument("--answer-delay", type=float, default=0.05)
+    parser.add_argument("--input-timeout", type=int, default=1)
+    parser.add_argument("--assistant-latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--output", type=Path, default=Path("bench_load.json"))
+    args = parser.parse_args()
+
+    results = []
+    print(
+        f"{'scenario':<10} {'conc':>5} {'req/s':>9} {'p50 ms':>10} "
+        f"{'p99 ms':>10} {'peak MB':>9}  err sources"
+    )
+    for scenario in args.scenario:
+        for concurrency in args.concurrency:
+            result = _run_level(scenario, concurrency, args)
+            results.append(result)
+            print(_format(result), flush=True)
+
+    report = {
+        "benchmark": "load",
+        "version": __version__,
+        "timestamp": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "rounds": args.rounds,
+            "answer_delay": args.answer_delay,
+            "input_timeout": args.input_timeout,
+            "assistant_latency": args.assistant_latency,
+            "error_rate": args.error_rate,
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
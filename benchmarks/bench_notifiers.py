@@ -0,0 +1,65 @@
+"""
+Benchmark a burst of notifications: spawn-per-notification vs persistent helper.
+
+Both backends drive the same stand-in notifier script through
+``NotificationService``, so the difference is the cost of starting a new
+notifier process for every notification.
+
+Usage:
+    python -m benchmarks.bench_notifiers [--burst N]
+"""
+
+import argparse
+import asyncio
+import time
+
+from copilot_interactive.config.settings import Settings
+from copilot_interactive.services.notification_service import NotificationService
+from copilot_interactive.services.notifiers import (
+    CommandNotifier,
+    HelperProcessNotifier,
+    NotifierBackend,
+)
+from tests.stubs import stub_notifier_command
+
+
+async def _burst(backend: NotifierBackend, burst: int) -> tuple[float, int]:
+    """Dispatch a burst of notifications and wait until all are delivered."""
+    settings = Settings(notification_enabled=True, notification_timeout=30)
+    service = NotificationService(settings, backend=backend)
+    start = time.perf_counter()
+    tasks = [
+        service.dispatch_input_request_notification(f"Question {i}?")
+        for i in range(burst)
+    ]
+    results = await asyncio.gather(*(t for t in tasks if t is not None))
+    elapsed = time.perf_counter() - start
+    await service.aclose()
+    return elapsed, sum(results)
+
+
+def main() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--burst", type=int, default=100)
+    args = parser.parse_args()
+
+    spawn = CommandNotifier(stub_notifier_command(), timeout=30)
+    helper = HelperProcessNotifier(stub_notifier_command("--serve"), timeout=30)
+    spawn_time, spawn_sent = asyncio.run(_burst(spawn, args.burst))
+    helper_time, helper_sent = asyncio.run(_burst(helper, args.burst))
+
+    print(f"burst of {args.burst} notifications")
+    print(
+        f"spawn per notification  {spawn_time * 1000:9.1f} ms  "
+        f"({spawn_time / args.burst * 1000:7.2f} ms each, {spawn_sent} sent)"
+    )
+    print(
+        f"persistent helper       {helper_time * 1000:9.1f} ms  "
+        f"({helper_time / args.burst * 1000:7.2f} ms each, {helper_sent} sent)"
+    )
+    print(f"speedup: {spawn_time / helper_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
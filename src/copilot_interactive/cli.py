@@ -0,0 +1,28 @@
+"""Command line entry point dispatching to the server or the client."""
+
+import sys
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Run ``copilot-interactive``.
+
+    ``copilot-interactive ask ...`` runs the lightweight client without
+    importing the server; anything else starts the server.
+
+    Args:
+        argv: Command line arguments; defaults to ``sys.argv[1:]``.
+    """
+    args = sys.argv[1:] if argv is None else argv
+    if args[:1] == ["ask"]:
+        from copilot_interactive.client import main as ask
+
+        sys.exit(ask(args[1:]))
+
+    from copilot_interactive.main import main as serve
+
+    serve(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Lightweight client asking a running server for user input.
+
+Used by ``copilot-interactive ask``. It only imports the standard library and
+speaks just enough HTTP/1.1 for one ``POST /user-input`` request, so an agent
+pays for a short Python startup instead of a curl process and TCP handshake
+per prompt.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+
+DEFAULT_PORT = 4000
+
+
+class ClientError(Exception):
+    """The server could not be reached or did not return an answer."""
+
+
+def ask(
+    context: str,
+    socket_path: str | None = None,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    deadline: float | None = None,
+) -> dict[str, str]:
+    """
+    Request user input from the server.
+
+    Args:
+        context: The question shown to the user.
+        socket_path: The server's Unix domain socket; TCP is used when unset.
+        host: Server host for TCP.
+        port: Server port for TCP.
+        deadline: Unix time by which the answer is needed, sent as
+            ``X-Deadline``; the server's timeouts apply when unset.
+
+    Returns:
+        The response, with the answer in ``input`` and its origin in ``source``.
+
+    Raises:
+        ClientError: If the request fails or the server answers with an error.
+    """
+    body = context.encode()
+    headers = (
+        b"Host: localhost\r\n"
+        b"Content-Type: text/plain; charset=utf-8\r\n"
+        b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+    )
+    if deadline is not None:
+        headers += f"X-Deadline: {deadline:.3f}\r\n".encode()
+    request = (
+        b"POST /user-input HTTP/1.1\r\n" + headers + b"Connection: close\r\n\r\n" + body
+    )
+    try:
+        if socket_path:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                conn.connect(socket_path)
+            except OSError:
+                conn.close()
+                raise
+        else:
+            conn = socket.create_connection((host, port))
+        with conn:
+            conn.sendall(request)
+            chunks = []
+            while chunk := conn.recv(65536):
+                chunks.append(chunk)
+    except OSError as e:
+        raise ClientError(f"cannot reach the server: {e}") from e
+
+    return _parse_response(b"".join(chunks))
+
+
+def _parse_response(raw: bytes) -> dict[str, str]:
+    """Check the status line and decode the JSON body."""
+    head, separator, body = raw.partition(b"\r\n\r\n")
+    if not separator:
+        raise ClientError("incomplete response from the server")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    parts = status_line.split(" ", 2)
+    if len(parts) < 2 or not parts[1].isdigit():
+        raise ClientError(f"invalid response from the server: {status_line!r}")
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length" and value.strip().isdigit():
+            body = body[: int(value)]
+    if parts[1] != "200":
+        raise ClientError(
+            f"server answered {status_line}: {body.decode(errors='replace')}"
+        )
+    try:
+        response: dict[str, str] = json.loads(body)
+    except ValueError as e:
+        raise ClientError(f"invalid JSON from the server: {e}") from e
+    return response
+
+
+def _default_socket() -> str | None:
+    """
+    The server's Unix domain socket, as the server's settings resolve it.
+
+    ``APP_UDS`` in the environment takes precedence there too, so the
+    settings, and pydantic with them, are only loaded when a ``.env`` file
+    may provide the socket instead.
+    """
+    if "APP_UDS" in os.environ:
+        return os.environ["APP_UDS"] or None
+    if not Path(".env").exists():
+        return None
+
+    from copilot_interactive.config.settings import get_settings
+
+    return get_settings().app_uds
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Run ``copilot-interactive ask``.
+
+    Args:
+        argv: Arguments after ``ask``.
+
+    Returns:
+        The process exit status.
+    """
+    parser = argparse.ArgumentParser(
+        prog="copilot-interactive ask",
+        description="Ask the user a question through a running server and "
+        "print the answer.",
+    )
+    parser.add_argument(
+        "question", nargs="*", help="question to ask; read from stdin if omitted"
+    )
+    parser.add_argument(
+        "--socket",
+        help="server's Unix domain socket (default: APP_UDS from the "
+        "environment or .env; TCP if unset)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=int(os.environ.get("APP_PORT", DEFAULT_PORT)),
+        help="server port for TCP (default: $APP_PORT or %(default)s)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="seconds until the answer is needed, e.g. the agent's tool call "
+        "timeout (default: the server's timeouts)",
+    )
+    args = parser.parse_args(argv)
+
+    deadline = time.time() + args.timeout if args.timeout is not None else None
+    context = " ".join(args.question) if args.question else sys.stdin.read()
+    socket_path = args.socket or _default_socket()
+    if socket_path:
+        socket_path = str(Path(socket_path).expanduser())
+    try:
+        response = ask(context.strip(), socket_path, port=args.port, deadline=deadline)
+    except ClientError as e:
+        print(f"copilot-interactive ask: {e}", file=sys.stderr)
+        return 1
+    print(response.get("input", ""))
+    return 0
@@ -1,6 +1,7 @@
 """Application settings using pydantic-settings."""
 
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -18,19 +19,86 @@ class Settings(BaseSettings):
     # Server configuration
     app_port: int = 4000
     app_host: str = "0.0.0.0"
+    app_uds: str | None = None  # also serve on this Unix domain socket
+
+    # Multi-process deployment: workers forward prompts to the process owning
+    # the console over this Unix socket (set by --workers, or by hand)
+    console_broker_path: str | None = None
+    console_broker_grace: float = 30.0  # seconds a crashed worker's prompts stay
+
+    # Per-request timing spans: Server-Timing header and a JSON log line
+    timing_enabled: bool = False
+    timing_tracer: str = ""  # optional module:attribute returning tracer spans
 
     # Input timeout configuration (in seconds)
     input_timeout: int = 540  # 9 minutes
 
+    # Share one prompt between concurrent requests with the same context
+    input_coalescing: bool = False
+
+    # Serve /user-input directly from ASGI instead of the FastAPI routes; those
+    # requests skip the routes' dependencies and any dependency_overrides
+    input_fast_path: bool = True
+
+    # Answer multiple-choice prompts with a single keypress on a terminal
+    input_single_key: bool = True
+
+    # Answer memory: remembered human answers (path enables it)
+    answer_memory_path: str | None = None
+    answer_memory_policy: Literal["prefill", "auto"] = "prefill"
+    answer_memory_min_similarity: float = 0.9  # trigram similarity, 1.0 = exact
+
+    # Transcript: JSONL log of every prompt and answer (path enables it)
+    transcript_path: str | None = None
+    transcript_fsync_interval: float = 1.0  # longest seconds records stay unsynced
+    transcript_max_bytes: int = 10_000_000  # segment size that triggers rotation
+    transcript_backup_count: int = 5  # rotated segments kept
+    transcript_compress: bool = False  # gzip rotated segments
+    transcript_queue_size: int = 10_000  # queued records before new ones drop
+
+    # Input job configuration (in seconds)
+    job_retention: float = 600.0  # how long finished jobs can be fetched
+    job_max_wait: float = 60.0  # longest allowed long-poll
+
     # Local assistant configuration
     assistant_host: str = "localhost"
     assistant_port: int = 4141
     assistant_timeout: int = 10  # seconds
     assistant_model: str = "gpt-5-mini"
 
+    # Extra backends: comma-separated URL or URL=MODEL entries, primary first.
+    # When set, they replace assistant_host/assistant_port.
+    assistant_backends: str = ""
+    assistant_hedge_delay: float | None = None  # seconds; unset adapts to p95
+
+    # Assistant HTTP client pool configuration
+    assistant_max_connections: int = 10
+    assistant_max_keepalive_connections: int = 5
+    assistant_keepalive_expiry: float = 30.0  # seconds
+    assistant_http2: bool = False  # requires the optional "http2" extra
+
+    # Stream completions and stop at the first line of the reply
+    assistant_streaming: bool = False
+
+    # Start the assistant request alongside the terminal wait
+    assistant_prefetch: bool = False
+
+    # Circuit breaker: consecutive failures before failing fast (0 disables it)
+    assistant_breaker_threshold: int = 3
+    assistant_probe_interval: float = 5.0  # seconds between recovery probes
+
+    # Suggestion cache (off by default; a size above 0 enables it)
+    assistant_cache_size: int = 0
+    assistant_cache_ttl: float = 3600.0  # seconds
+    assistant_cache_path: str | None = None  # optional on-disk snapshot
+
     # Notification configuration
     notification_enabled: bool = True
+    notification_backend: str = "auto"  # auto, windows, termux, command, helper, none
+    notification_command: str = ""  # command line for the command/helper backends
     notification_max_content_length: int = 200
+    notification_timeout: float = 5.0  # seconds before a notifier is killed
+    notification_max_concurrency: int = 2
 
 
 @lru_cache
@@ -1,14 +1,28 @@
 """Main FastAPI application entry point."""
 
+import argparse
 import logging
+import socket
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
 from copilot_interactive import __version__
-from copilot_interactive.config.settings import get_settings
-from copilot_interactive.routers import health_router, user_input_router
+from copilot_interactive.config.settings import Settings, get_settings
+from copilot_interactive.middleware import (
+    DisconnectMiddleware,
+    TimingMiddleware,
+    UserInputFastPath,
+)
+from copilot_interactive.routers import (
+    health_router,
+    jobs_router,
+    metrics_router,
+    user_input_router,
+)
+from copilot_interactive.services.container import ServiceContainer
+from copilot_interactive.utils.timing import load_tracer, set_tracer
 
 # Configure logging
 logging.basicConfig(
@@ -19,18 +33,37 @@ logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
-async def lifespan(_app: FastAPI) -> AsyncGenerator[None, None]:
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan context manager."""
-    settings = get_settings()
+    settings: Settings = app.state.settings
     logger.info("Starting Copilot Interactive v%s", __version__)
     logger.info("Server will listen on %s:%d", settings.app_host, settings.app_port)
     logger.info("Input timeout: %d seconds", settings.input_timeout)
-    yield
-    logger.info("Shutting down Copilot Interactive")
 
-
-def create_app() -> FastAPI:
-    """Create and configure the FastAPI application."""
+    # Services are created once and shared by all requests
+    services = ServiceContainer.create(settings)
+    if services.answer_memory is not None:
+        # Build the lookup index before serving, not on the first request
+        services.answer_memory.load()
+    app.state.services = services
+    try:
+        yield
+    finally:
+        logger.info("Shutting down Copilot Interactive")
+        await services.aclose()
+
+
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """
+    Create and configure the FastAPI application.
+
+    Args:
+        settings: Settings to use instead of the ones from the environment.
+
+    Returns:
+        The application.
+    """
+    settings = settings or get_settings()
     app = FastAPI(
         title="Copilot Interactive",
         description=(
@@ -40,10 +73,27 @@ def create_app() -> FastAPI:
         version=__version__,
         lifespan=lifespan,
     )
+    app.state.settings = settings
 
     # Include routers
     app.include_router(health_router)
     app.include_router(user_input_router)
+    app.include_router(jobs_router)
+    app.include_router(metrics_router)
+
+    if settings.input_fast_path:
+        app.add_middleware(UserInputFastPath)
+
+    # Outside the fast path, so requests it answers are watched as well
+    app.add_middleware(DisconnectMiddleware)
+
+    # Without timing the middleware is left out, so requests pay nothing
+    if settings.timing_enabled:
+        app.add_middleware(TimingMiddleware)
+        if settings.timing_tracer:
+            tracer = load_tracer(settings.timing_tracer)
+            if tracer is not None:
+                set_tracer(tracer)
 
     return app
 
@@ -51,18 +101,133 @@ def create_app() -> FastAPI:
 app = create_app()
 
 
-def main() -> None:
+def main(argv: list[str] | None = None) -> None:
     """Run the application using uvicorn."""
+    parser = argparse.ArgumentParser(
+        prog="copilot-interactive",
+        description="Run the Copilot Interactive server.",
+        epilog="Run 'copilot-interactive ask QUESTION' to ask through a running "
+        "server.",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print an import-time breakdown of the server module and exit",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of server processes; they share this terminal for prompts",
+    )
+    args = parser.parse_args(argv)
+    if args.workers > 1 and not hasattr(socket, "AF_UNIX"):
+        parser.error("--workers needs Unix domain socket support")
+
+    if args.profile_startup:
+        from copilot_interactive.utils.importtime import (
+            format_import_profile,
+            profile_imports,
+        )
+
+        module = "copilot_interactive.main"
+        print(format_import_profile(module, profile_imports(module)))
+        return
+
     import uvicorn
 
     settings = get_settings()
+    if args.workers > 1:
+        if settings.app_uds:
+            parser.error("APP_UDS is only served by a single process")
+        _run_workers(settings, args.workers)
+        return
+    if settings.app_uds:
+        _run_with_unix_socket(settings)
+        return
+
+    # Pass the app object so uvicorn does not import this module a second time
     uvicorn.run(
-        "copilot_interactive.main:app",
+        app,
         host=settings.app_host,
         port=settings.app_port,
         reload=False,
     )
 
 
+def _run_with_unix_socket(settings: Settings) -> None:
+    """
+    Serve on the TCP port and the ``APP_UDS`` Unix domain socket at once.
+
+    Args:
+        settings: Application settings.
+    """
+    from pathlib import Path
+
+    import uvicorn
+
+    from copilot_interactive.utils.platform import bind_unix_socket
+
+    config = uvicorn.Config(app, host=settings.app_host, port=settings.app_port)
+    path = Path(settings.app_uds or "").expanduser()
+    try:
+        unix_socket = bind_unix_socket(path)
+    except OSError as e:
+        logger.error("Failed to bind %s: %s", path, e)
+        raise SystemExit(1) from e
+    logger.info("Also serving on unix socket %s", path)
+    try:
+        uvicorn.Server(config).run(sockets=[config.bind_socket(), unix_socket])
+    finally:
+        path.unlink(missing_ok=True)
+
+
+def _run_workers(settings: Settings, workers: int) -> None:
+    """
+    Serve from several worker processes sharing this process's terminal.
+
+    This process only runs the console broker, in a thread with its own
+    event loop; uvicorn's workers are started fresh and pick up the broker's
+    socket from the environment.
+
+    Args:
+        settings: Application settings.
+        workers: Number of worker processes.
+    """
+    import asyncio
+    import os
+    import tempfile
+    import threading
+    from pathlib import Path
+
+    import uvicorn
+
+    from copilot_interactive.services.console_broker import serve_console_broker
+
+    path = Path(
+        settings.console_broker_path
+        or Path(tempfile.gettempdir()) / f"copilot-interactive-{os.getpid()}.sock"
+    )
+    os.environ["CONSOLE_BROKER_PATH"] = str(path)
+    threading.Thread(
+        target=asyncio.run,
+        args=(serve_console_broker(settings, path),),
+        name="console-broker",
+        daemon=True,
+    ).start()
+    logger.info("Starting %d workers sharing the console via %s", workers, path)
+    try:
+        uvicorn.run(
+            "copilot_interactive.main:app",
+            host=settings.app_host,
+            port=settings.app_port,
+            workers=workers,
+        )
+    finally:
+        # The broker's daemon thread is not unwound at exit, so its own
+        # cleanup never runs
+        path.unlink(missing_ok=True)
+
+
 if __name__ == "__main__":
     main()
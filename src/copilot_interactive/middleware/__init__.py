@@ -0,0 +1,11 @@
+"""ASGI middleware for the application."""
+
+from copilot_interactive.middleware.disconnect import DisconnectMiddleware
+from copilot_interactive.middleware.fast_path import UserInputFastPath
+from copilot_interactive.middleware.timing import TimingMiddleware
+
+__all__ = [
+    "DisconnectMiddleware",
+    "TimingMiddleware",
+    "UserInputFastPath",
+]
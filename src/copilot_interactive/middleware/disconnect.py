@@ -0,0 +1,116 @@
+"""ASGI middleware abandoning input requests whose client has gone away."""
+
+import asyncio
+import contextlib
+import logging
+from typing import TYPE_CHECKING
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+if TYPE_CHECKING:
+    from copilot_interactive.services.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+# Endpoints that wait on the user and are worth abandoning
+WATCHED_PATHS = frozenset({"/user-input", "/user-input/json", "/user-input/batch"})
+
+
+class DisconnectMiddleware:
+    """
+    Cancels an input request as soon as its client disconnects.
+
+    Once the request body has been read, a watcher task keeps listening on
+    the receive channel. If the client disconnects before the response is
+    complete, the request's task is cancelled: the services unwind through
+    their cancellation paths, which withdraw the terminal prompt, cancel the
+    notification and stop any assistant call nobody else is waiting for.
+    The abandoned request is counted and no response is sent.
+
+    The app runs in the request's own task, so requests that are never
+    abandoned pay for one extra task and nothing else. It has to wrap
+    ``UserInputFastPath`` so both ways of answering are covered.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in WATCHED_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        assert task is not None
+        disconnected = asyncio.Event()
+        watcher: asyncio.Task[None] | None = None
+        finished = False
+        abandoned = False
+
+        async def watch() -> None:
+            nonlocal abandoned
+            message = await receive()
+            if message["type"] != "http.disconnect":
+                # Nothing but a disconnect may follow the body; a server that
+                # sends anything else can't tell us about one, so stop here
+                logger.debug("Unexpected %s after the body", message["type"])
+                return
+            disconnected.set()
+            if not finished:
+                abandoned = True
+                task.cancel()
+
+        async def receive_with_watch() -> Message:
+            nonlocal watcher
+            if watcher is not None:
+                # The watcher owns the channel; the only message left is
+                # the disconnect
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+            elif not message.get("more_body", False):
+                watcher = asyncio.create_task(watch())
+            return message
+
+        async def send_with_watch(message: Message) -> None:
+            nonlocal finished
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                finished = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive_with_watch, send_with_watch)
+        except asyncio.CancelledError:
+            if not abandoned or task.uncancel() > 0:
+                raise
+            _record_abandoned(scope)
+            logger.info("Abandoned %s: client disconnected", scope["path"])
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await watcher
+
+
+def _record_abandoned(scope: Scope) -> None:
+    """Count an abandoned request in the app's metrics, if there are any."""
+    app = scope.get("app")
+    services = getattr(getattr(app, "state", None), "services", None)
+    if services is not None:
+        metrics: Metrics = services.metrics
+        metrics.input_abandoned.inc()
@@ -0,0 +1,208 @@
+"""Lean ASGI handler for the /user-input endpoints, ahead of FastAPI."""
+
+import json
+import logging
+import math
+import time
+from json.encoder import encode_basestring
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from copilot_interactive.models.responses import UserInputResponse
+from copilot_interactive.services.input_service import InputService
+
+logger = logging.getLogger(__name__)
+
+JSON_HEADERS = [(b"content-type", b"application/json")]
+
+# The only JSON request fields the fast path handles; bodies with any other
+# field go to the FastAPI route, so new request options can't be dropped here
+FAST_PATH_FIELDS = frozenset({"context"})
+
+
+def encode_user_input_response(response: UserInputResponse) -> bytes:
+    """
+    Serialize a response exactly as FastAPI's JSONResponse would.
+
+    The field order and compact separators are fixed, so only the two
+    strings need escaping.
+
+    Args:
+        response: The response to serialize.
+
+    Returns:
+        The UTF-8 encoded JSON body.
+    """
+    return (
+        f'{{"input":{encode_basestring(response.input)},'
+        f'"source":{encode_basestring(response.source)}}}'
+    ).encode()
+
+
+class UserInputFastPath:
+    """
+    Answers ``POST /user-input`` and ``POST /user-input/json`` directly.
+
+    The body is read straight from the ASGI receive channel, the input
+    service is called and the response is written with a pre-built encoder,
+    skipping routing, dependency resolution and response model validation.
+    Requests the FastAPI routes would reject or treat specially (other
+    content types, invalid UTF-8 or JSON, a non-string ``context``, an
+    invalid or expired ``X-Deadline``, and JSON bodies with fields other
+    than ``context``) are passed on to the app with their body replayed, so
+    errors are reported exactly as before.
+
+    Requests answered here never reach the FastAPI routes, so their
+    dependencies and ``app.dependency_overrides`` don't apply to them. Set
+    ``input_fast_path=False`` where that matters, e.g. in tests overriding
+    ``get_input_service``.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Initialize the fast path.
+
+        Args:
+            app: The wrapped ASGI application.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if path == "/user-input":
+            parse = _plain_text_context
+            media_type = b"text/plain"
+        elif path == "/user-input/json":
+            parse = _json_context
+            media_type = b"application/json"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        input_service = _input_service(scope)
+        if input_service is None or _media_type(scope) != media_type:
+            await self.app(scope, receive, send)
+            return
+        raw_deadline = _header(scope, b"x-deadline")
+        deadline = _deadline(raw_deadline) if raw_deadline is not None else None
+        if raw_deadline is not None and deadline is None:
+            await self.app(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        if body is None:
+            return  # client went away before sending the body
+        context = parse(body)
+        if context is None:
+            await self.app(scope, _replay(body, receive), send)
+            return
+
+        response = await input_service.get_user_input(context, deadline=deadline)
+        content = encode_user_input_response(response)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-length", str(len(content)).encode()),
+                    *JSON_HEADERS,
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": content})
+
+
+def _input_service(scope: Scope) -> InputService | None:
+    """The app's input service, if its services have been created."""
+    app = scope.get("app")
+    services = getattr(getattr(app, "state", None), "services", None)
+    if services is None:
+        return None
+    input_service: InputService = services.input_service
+    return input_service
+
+
+def _header(scope: Scope, name: bytes) -> bytes | None:
+    """The value of a request header, given its lower-case name."""
+    for key, value in scope["headers"]:
+        if key == name:
+            header: bytes = value
+            return header
+    return None
+
+
+def _media_type(scope: Scope) -> bytes | None:
+    """The request's content type without parameters, lower-cased."""
+    content_type = _header(scope, b"content-type")
+    if content_type is None:
+        return None
+    return content_type.split(b";", 1)[0].strip().lower()
+
+
+def _deadline(value: bytes) -> float | None:
+    """The X-Deadline header as Unix time, or None if invalid or already past."""
+    try:
+        deadline = float(value)
+    except ValueError:
+        return None
+    if not math.isfinite(deadline) or deadline <= time.time():
+        return None
+    return deadline
+
+
+async def _read_body(receive: Receive) -> bytes | None:
+    """Read the whole request body; None if the client disconnected."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+def _replay(body: bytes, receive: Receive) -> Receive:
+    """A receive channel that yields the already-read body first."""
+    replayed = False
+
+    async def replay() -> Message:
+        nonlocal replayed
+        if replayed:
+            return await receive()
+        replayed = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return replay
+
+
+def _plain_text_context(body: bytes) -> str | None:
+    """The context of a plain-text request, as the FastAPI route strips it."""
+    try:
+        return body.decode().strip()
+    except UnicodeDecodeError:
+        return None
+
+
+def _json_context(body: bytes) -> str | None:
+    """
+    The context of a plain JSON request.
+
+    Returns None for requests FastAPI has to handle: invalid bodies, which
+    need its validation errors, and bodies with any field besides
+    ``context``.
+    """
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or not data.keys() <= FAST_PATH_FIELDS:
+        return None
+    context = data.get("context", "")
+    if type(context) is not str:
+        return None
+    return context
@@ -0,0 +1,97 @@
+"""ASGI middleware reporting the timing spans of each request."""
+
+import json
+import logging
+import time
+import uuid
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from copilot_interactive.utils.timing import RequestTiming
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+
+class TimingMiddleware:
+    """
+    Collects named spans per request and reports them.
+
+    Each HTTP request gets a ``RequestTiming`` in a context variable, which
+    ``span()`` blocks in the services record into. When the response starts,
+    a ``serialize`` span (from the end of the last span to the response) and
+    a ``total`` span are added and the spans are sent as a ``Server-Timing``
+    header along with ``X-Request-ID``. When the response is complete, one
+    JSON log line with the request ID, status and spans is written.
+
+    This is a plain ASGI middleware rather than a ``BaseHTTPMiddleware`` so
+    that it adds no extra task or stream per request.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _request_id(scope)
+        timing = RequestTiming(request_id)
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                now = time.perf_counter()
+                last_end = timing.last_end
+                if last_end is not None:
+                    timing.add("serialize", last_end, now)
+                timing.add("total", timing.started, now)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.server_timing().encode()))
+                headers.append((REQUEST_ID_HEADER, request_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = timing.activate()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            RequestTiming.deactivate(token)
+            logger.info(
+                json.dumps(
+                    {
+                        "request_id": request_id,
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status,
+                        "spans": [
+                            {
+                                "name": s.name,
+                                "start_ms": round(s.start * 1000, 3),
+                                "duration_ms": round(s.duration * 1000, 3),
+                            }
+                            for s in timing.spans
+                        ],
+                    }
+                )
+            )
+
+
+def _request_id(scope: Scope) -> str:
+    """The client's X-Request-ID header, or a new random ID."""
+    for name, value in scope["headers"]:
+        if name == REQUEST_ID_HEADER:
+            request_id: str = value.decode("latin-1")[:128]
+            if request_id:
+                return request_id
+    return uuid.uuid4().hex
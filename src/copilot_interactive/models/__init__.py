@@ -1,13 +1,23 @@
 """Pydantic models for request and response objects."""
 
-from copilot_interactive.models.requests import UserInputRequest
+from copilot_interactive.models.requests import (
+    UserInputBatchRequest,
+    UserInputRequest,
+)
 from copilot_interactive.models.responses import (
+    AssistantHealth,
+    AssistantProbeStatus,
     HealthCheckResponse,
+    UserInputJobResponse,
     UserInputResponse,
 )
 
 __all__ = [
+    "AssistantHealth",
+    "AssistantProbeStatus",
     "HealthCheckResponse",
+    "UserInputBatchRequest",
+    "UserInputJobResponse",
     "UserInputRequest",
     "UserInputResponse",
 ]
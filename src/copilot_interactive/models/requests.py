@@ -1,6 +1,8 @@
 """Request models for the API."""
 
-from pydantic import BaseModel, Field
+from typing import Self
+
+from pydantic import BaseModel, Field, model_validator
 
 
 class UserInputRequest(BaseModel):
@@ -11,6 +13,49 @@ class UserInputRequest(BaseModel):
         description="The context or reason for requesting user input. "
         "If provided and user doesn't respond, the local assistant will be used.",
     )
+    choices: list[str] | None = Field(
+        default=None,
+        min_length=1,
+        description="Allowed answers, shown as a numbered menu. The answer is "
+        "always one of them.",
+    )
+    default_choice: str | None = Field(
+        default=None,
+        description="Choice returned when the user doesn't respond, without "
+        "calling the local assistant. Must be one of the choices.",
+    )
+    deadline: float | None = Field(
+        default=None,
+        allow_inf_nan=False,
+        description="Unix time by which the client needs the answer; the "
+        "terminal wait and the assistant fallback are fitted into the time left. "
+        "The earlier of this and the X-Deadline header applies.",
+    )
+
+    @model_validator(mode="after")
+    def _check_default_choice(self) -> Self:
+        """Require the default choice to be one of the choices."""
+        if self.default_choice is not None and self.default_choice not in (
+            self.choices or []
+        ):
+            raise ValueError("default_choice must be one of the choices")
+        return self
+
+
+class UserInputBatchRequest(BaseModel):
+    """Request model for the batch user input endpoint."""
+
+    questions: list[str] = Field(
+        min_length=1,
+        description="Questions shown to the user as one form, in order. "
+        "Unanswered questions fall back to the local assistant.",
+    )
+    deadline: float | None = Field(
+        default=None,
+        allow_inf_nan=False,
+        description="Unix time by which the client needs the answers. "
+        "The earlier of this and the X-Deadline header applies.",
+    )
 
 
 class AssistantChatRequest(BaseModel):
@@ -8,7 +8,42 @@ class UserInputResponse(BaseModel):
 
     input: str = Field(description="The user input or generated response.")
     source: str = Field(
-        description="Source of the input: 'user', 'assistant', or 'default'."
+        description="Source of the input: 'user', 'memory', 'assistant', or 'default'."
+    )
+
+
+class UserInputJobResponse(BaseModel):
+    """Response model for input job endpoints."""
+
+    id: str = Field(description="The job ID used to poll for the answer.")
+    status: str = Field(
+        description="'pending' until answered, then the source of the input: "
+        "'user', 'memory', 'assistant', or 'default'."
+    )
+    result: UserInputResponse | None = Field(
+        default=None, description="The input once the job has finished."
+    )
+
+
+class AssistantProbeStatus(BaseModel):
+    """Result of the latest background probe of the assistant."""
+
+    ok: bool = Field(description="Whether the assistant answered the probe.")
+    detail: str = Field(description="Probe response status or error.")
+    checked_at: float = Field(description="Unix time of the probe.")
+
+
+class AssistantHealth(BaseModel):
+    """State of the assistant fallback."""
+
+    circuit: str = Field(
+        description="Circuit breaker state: 'closed', 'open', or 'disabled'."
+    )
+    consecutive_failures: int = Field(
+        default=0, description="Failed assistant calls since the last success."
+    )
+    last_probe: AssistantProbeStatus | None = Field(
+        default=None, description="Latest probe result, if any probe has run."
     )
 
 
@@ -17,6 +52,9 @@ class HealthCheckResponse(BaseModel):
 
     status: str = Field(default="healthy", description="Health status of the service.")
     version: str = Field(description="Version of the application.")
+    assistant: AssistantHealth | None = Field(
+        default=None, description="State of the assistant fallback."
+    )
 
 
 class AssistantChatResponse(BaseModel):
@@ -1,9 +1,13 @@
 """API routers for the application."""
 
 from copilot_interactive.routers.health import router as health_router
+from copilot_interactive.routers.jobs import router as jobs_router
+from copilot_interactive.routers.metrics import router as metrics_router
 from copilot_interactive.routers.user_input import router as user_input_router
 
 __all__ = [
     "health_router",
+    "jobs_router",
+    "metrics_router",
     "user_input_router",
 ]
@@ -0,0 +1,65 @@
+"""Shared FastAPI dependencies for the routers."""
+
+import time
+from typing import Annotated, cast
+
+from fastapi import Depends, Header, HTTPException, Request, status
+
+from copilot_interactive.services.container import ServiceContainer
+from copilot_interactive.services.input_service import InputService
+from copilot_interactive.services.job_service import JobService
+
+
+def get_services(request: Request) -> ServiceContainer:
+    """Dependency to get the app-scoped ServiceContainer."""
+    return cast("ServiceContainer", request.app.state.services)
+
+
+def get_input_service(
+    services: Annotated[ServiceContainer, Depends(get_services)],
+) -> InputService:
+    """Dependency to get the shared InputService instance."""
+    return services.input_service
+
+
+def get_job_service(
+    services: Annotated[ServiceContainer, Depends(get_services)],
+) -> JobService:
+    """Dependency to get the shared JobService instance."""
+    return services.job_service
+
+
+# X-Deadline: Unix time by which the client needs its answer
+DeadlineHeader = Annotated[
+    float | None,
+    Header(
+        allow_inf_nan=False,
+        description="Unix time by which the client needs the answer.",
+    ),
+]
+
+
+def resolve_deadline(*deadlines: float | None) -> float | None:
+    """
+    Pick the request's deadline and reject the request if it has passed.
+
+    Args:
+        deadlines: Deadlines from the header and the body; None where unset.
+
+    Returns:
+        The earliest deadline, or None if the client sent none.
+
+    Raises:
+        HTTPException: 504 if the deadline has already passed, so nothing is
+            prompted for an answer nobody will read.
+    """
+    given = [deadline for deadline in deadlines if deadline is not None]
+    if not given:
+        return None
+    deadline = min(given)
+    if deadline <= time.time():
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Deadline has already passed",
+        )
+    return deadline
@@ -1,14 +1,48 @@
 """Health check router."""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 
 from copilot_interactive import __version__
-from copilot_interactive.models.responses import HealthCheckResponse
+from copilot_interactive.models.responses import (
+    AssistantHealth,
+    AssistantProbeStatus,
+    HealthCheckResponse,
+)
+from copilot_interactive.services.assistant_service import AssistantService
 
 router = APIRouter(tags=["health"])
 
 
+def _assistant_health(assistant: AssistantService) -> AssistantHealth:
+    """Describe the assistant's circuit breaker and latest probe."""
+    breaker = assistant.breaker
+    probe = assistant.last_probe
+    return AssistantHealth(
+        circuit=breaker.state if breaker is not None else "disabled",
+        consecutive_failures=breaker.consecutive_failures if breaker else 0,
+        last_probe=(
+            AssistantProbeStatus(
+                ok=probe.ok, detail=probe.detail, checked_at=probe.checked_at
+            )
+            if probe is not None
+            else None
+        ),
+    )
+
+
 @router.get("/health", response_model=HealthCheckResponse)
-async def health_check() -> HealthCheckResponse:
-    """Health check endpoint."""
-    return HealthCheckResponse(status="healthy", version=__version__)
+async def health_check(request: Request) -> HealthCheckResponse:
+    """
+    Health check endpoint.
+
+    The service is 'degraded' while the assistant's circuit breaker is open:
+    prompts are still served, but timeouts fall back to the default answer.
+    The assistant section is omitted until the services have started.
+    """
+    services = getattr(request.app.state, "services", None)
+    if services is None:
+        return HealthCheckResponse(status="healthy", version=__version__)
+
+    assistant = _assistant_health(services.assistant_service)
+    status = "degraded" if assistant.circuit == "open" else "healthy"
+    return HealthCheckResponse(status=status, version=__version__, assistant=assistant)
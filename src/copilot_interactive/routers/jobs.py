@@ -0,0 +1,68 @@
+"""Input job router."""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+
+from copilot_interactive.models.responses import UserInputJobResponse
+from copilot_interactive.routers.dependencies import get_job_service
+from copilot_interactive.services.job_service import InputJob, JobService
+
+router = APIRouter(prefix="/user-input/jobs", tags=["user-input"])
+
+
+def _to_response(job: InputJob) -> UserInputJobResponse:
+    """Build the API response for a job."""
+    return UserInputJobResponse(id=job.id, status=job.status, result=job.result)
+
+
+@router.post(
+    "",
+    response_model=UserInputJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def submit_user_input_job(
+    job_service: Annotated[JobService, Depends(get_job_service)],
+    body: Annotated[str, Body(media_type="text/plain")] = "",
+) -> UserInputJobResponse:
+    """
+    Submit an input request and return immediately.
+
+    The request runs the same flow as POST /user-input in the background.
+    Poll GET /user-input/jobs/{job_id} for the answer.
+
+    Args:
+        body: Plain text body containing context/reason for the input request.
+
+    Returns:
+        UserInputJobResponse with the job ID and 'pending' status.
+    """
+    context = body.strip() if body else ""
+    return _to_response(job_service.submit(context))
+
+
+@router.get("/{job_id}", response_model=UserInputJobResponse)
+async def get_user_input_job(
+    job_service: Annotated[JobService, Depends(get_job_service)],
+    job_id: str,
+    wait: Annotated[
+        float,
+        Query(ge=0, description="Seconds to wait for the answer (long-poll)."),
+    ] = 0,
+) -> UserInputJobResponse:
+    """
+    Get the status of an input job, optionally waiting for the answer.
+
+    Args:
+        job_id: The ID returned when the job was submitted.
+        wait: Seconds to wait for the answer before returning the status.
+
+    Returns:
+        UserInputJobResponse with the status and, once finished, the result.
+    """
+    job = job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    await job_service.wait(job, min(wait, job_service.max_wait))
+    return _to_response(job)
@@ -0,0 +1,26 @@
+"""Metrics router."""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from copilot_interactive.routers.dependencies import get_services
+from copilot_interactive.services.container import ServiceContainer
+
+router = APIRouter(tags=["metrics"])
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(
+    services: Annotated[ServiceContainer, Depends(get_services)],
+) -> PlainTextResponse:
+    """
+    Metrics in the Prometheus text exposition format.
+
+    Returns:
+        Latency histograms and counters for the input pipeline.
+    """
+    return PlainTextResponse(services.metrics.render(), media_type=CONTENT_TYPE)
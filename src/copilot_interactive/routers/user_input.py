@@ -4,63 +4,102 @@ from typing import Annotated
 
 from fastapi import APIRouter, Body, Depends
 
-from copilot_interactive.config.settings import Settings, get_settings
-from copilot_interactive.models.requests import UserInputRequest
+from copilot_interactive.models.requests import (
+    UserInputBatchRequest,
+    UserInputRequest,
+)
 from copilot_interactive.models.responses import UserInputResponse
-from copilot_interactive.services.assistant_service import AssistantService
+from copilot_interactive.routers.dependencies import (
+    DeadlineHeader,
+    get_input_service,
+    resolve_deadline,
+)
 from copilot_interactive.services.input_service import InputService
-from copilot_interactive.services.notification_service import NotificationService
 
 router = APIRouter(tags=["user-input"])
 
 
-def get_input_service(
-    settings: Annotated[Settings, Depends(get_settings)],
-) -> InputService:
-    """Dependency to get InputService instance."""
-    notification_service = NotificationService(settings)
-    assistant_service = AssistantService(settings)
-    return InputService(settings, notification_service, assistant_service)
-
-
 @router.post("/user-input", response_model=UserInputResponse)
 async def request_user_input(
     input_service: Annotated[InputService, Depends(get_input_service)],
     body: Annotated[str, Body(media_type="text/plain")] = "",
+    x_deadline: DeadlineHeader = None,
 ) -> UserInputResponse:
     """
     Request user input from the terminal.
 
     Sends a notification and waits for user input from the terminal.
     If the user doesn't respond within the timeout and context is provided,
-    falls back to the local assistant for a suggested response.
+    falls back to the local assistant for a suggested response. An
+    ``X-Deadline`` header shortens the timeout to fit the client's own.
+
+    With ``input_fast_path`` on (the default) these requests are answered by
+    ``UserInputFastPath`` before they get here, so dependency overrides for
+    this route don't apply to them.
 
     Args:
         body: Plain text body containing context/reason for the input request.
+        x_deadline: Unix time by which the client needs the answer.
 
     Returns:
         UserInputResponse with the input and its source.
     """
+    deadline = resolve_deadline(x_deadline)
     context = body.strip() if body else ""
-    return await input_service.get_user_input(context)
+    return await input_service.get_user_input(context, deadline=deadline)
 
 
 @router.post("/user-input/json", response_model=UserInputResponse)
 async def request_user_input_json(
     input_service: Annotated[InputService, Depends(get_input_service)],
     request: UserInputRequest,
+    x_deadline: DeadlineHeader = None,
 ) -> UserInputResponse:
     """
     Request user input from the terminal (JSON body variant).
 
     Sends a notification and waits for user input from the terminal.
     If the user doesn't respond within the timeout and context is provided,
-    falls back to the local assistant for a suggested response.
+    falls back to the local assistant for a suggested response. With
+    ``choices`` the answer is always one of them, and ``default_choice`` is
+    returned when the user doesn't respond.
+
+    With ``input_fast_path`` on (the default) requests with only a
+    ``context`` are answered by ``UserInputFastPath`` before they get here,
+    so dependency overrides for this route don't apply to them.
 
     Args:
         request: UserInputRequest containing context for the input request.
+        x_deadline: Unix time by which the client needs the answer.
 
     Returns:
         UserInputResponse with the input and its source.
     """
-    return await input_service.get_user_input(request.context)
+    deadline = resolve_deadline(x_deadline, request.deadline)
+    return await input_service.get_user_input(
+        request.context, request.choices, request.default_choice, deadline
+    )
+
+
+@router.post("/user-input/batch", response_model=list[UserInputResponse])
+async def request_user_input_batch(
+    input_service: Annotated[InputService, Depends(get_input_service)],
+    request: UserInputBatchRequest,
+    x_deadline: DeadlineHeader = None,
+) -> list[UserInputResponse]:
+    """
+    Request answers to several questions in one console form.
+
+    Sends a single notification and shows the questions together; they can
+    be answered in order or by ID. Questions left unanswered when the
+    timeout expires fall back to the local assistant concurrently.
+
+    Args:
+        request: UserInputBatchRequest with the questions to ask.
+        x_deadline: Unix time by which the client needs the answers.
+
+    Returns:
+        One UserInputResponse per question, in the order asked.
+    """
+    deadline = resolve_deadline(x_deadline, request.deadline)
+    return await input_service.get_user_inputs(request.questions, deadline)
@@ -1,11 +1,29 @@
 """Service layer for the application."""
 
+from copilot_interactive.services.answer_memory import AnswerMemory
 from copilot_interactive.services.assistant_service import AssistantService
+from copilot_interactive.services.console_broker import (
+    ConsoleBroker,
+    RemoteConsoleService,
+)
+from copilot_interactive.services.console_service import ConsoleService
+from copilot_interactive.services.container import ServiceContainer
 from copilot_interactive.services.input_service import InputService
+from copilot_interactive.services.job_service import JobService
+from copilot_interactive.services.metrics import Metrics
 from copilot_interactive.services.notification_service import NotificationService
+from copilot_interactive.services.transcript import TranscriptLog
 
 __all__ = [
+    "AnswerMemory",
     "AssistantService",
+    "ConsoleBroker",
+    "ConsoleService",
     "InputService",
+    "JobService",
+    "Metrics",
     "NotificationService",
+    "RemoteConsoleService",
+    "ServiceContainer",
+    "TranscriptLog",
 ]
@@ -0,0 +1,256 @@
+"""Persistent memory of past human answers with exact and fuzzy lookup."""
+
+import logging
+import math
+import sqlite3
+import time
+from array import array
+from collections import Counter
+from pathlib import Path
+
+from copilot_interactive.utils.text import normalize_context
+
+logger = logging.getLogger(__name__)
+
+
+def trigrams(text: str) -> set[str]:
+    """Character trigrams of a normalized context, padded at both ends."""
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class MemoryMatch:
+    """A remembered answer for a context."""
+
+    def __init__(self, context: str, answer: str, similarity: float, uses: int) -> None:
+        """Initialize the match."""
+        self.context = context
+        self.answer = answer
+        self.similarity = similarity
+        self.uses = uses
+
+
+class AnswerMemory:
+    """
+    Context → answer pairs recorded from human answers.
+
+    Pairs are stored in a SQLite file keyed by the normalized context. At
+    load time an in-memory index is built: a dict for exact matches and an
+    inverted trigram index for fuzzy ones.
+
+    The fuzzy index uses prefix filtering. Trigrams get IDs in order of
+    rarity when the store is loaded, and each context is indexed only under
+    its ``n - ceil(t * n) + k`` rarest trigrams, where ``n`` is its trigram
+    count, ``t`` the minimum similarity and ``k`` ``PREFIX_OVERLAP``. Two
+    contexts with Jaccard similarity >= t share at least ``k`` of these
+    prefix trigrams, and their trigram counts differ by at most a factor of
+    t. Postings are kept per trigram and count, so a lookup only counts hits
+    in the postings of the query's own prefix for the counts in range and
+    verifies the few candidates with ``k`` hits. This keeps lookups well
+    under a millisecond with 100k stored pairs.
+    """
+
+    # Shared prefix trigrams required of a fuzzy candidate
+    PREFIX_OVERLAP = 3
+
+    def __init__(self, path: Path, min_similarity: float) -> None:
+        """
+        Initialize the memory; the file is opened on first use.
+
+        Args:
+            path: SQLite database file.
+            min_similarity: Lowest trigram Jaccard similarity that matches.
+        """
+        self._path = path
+        self._min_similarity = min_similarity
+        self._db: sqlite3.Connection | None = None
+        self._by_key: dict[str, int] = {}
+        self._contexts: list[str] = []
+        self._answers: list[str] = []
+        self._uses: list[int] = []
+        self._entry_trigrams: list[array[int]] = []
+        self._trigram_ids: dict[str, int] = {}
+        self._postings: dict[tuple[int, int], array[int]] = {}
+
+    def __len__(self) -> int:
+        self.load()
+        return len(self._answers)
+
+    def lookup(self, context: str) -> MemoryMatch | None:
+        """
+        Find the remembered answer for a context.
+
+        Args:
+            context: The context/reason for the input request.
+
+        Returns:
+            The exact match, else the most similar context at or above the
+            minimum similarity, else None.
+        """
+        self.load()
+        key = normalize_context(context)
+        if not key:
+            return None
+
+        entry = self._by_key.get(key)
+        if entry is not None:
+            return self._match(entry, 1.0)
+        if self._min_similarity >= 1:
+            return None
+
+        query = trigrams(key)
+        size = len(query)
+        known = sorted(self._trigram_ids[t] for t in query if t in self._trigram_ids)
+        required = math.ceil(self._min_similarity * size)
+        if len(known) < required:
+            return None
+
+        # Trigrams never seen before order after all known ones, so the
+        # prefix consists of the rarest known trigrams
+        sizes = range(
+            math.ceil(self._min_similarity * size),
+            math.floor(size / self._min_similarity) + 1,
+        )
+        overlap = min(self.PREFIX_OVERLAP, required)
+        hits: Counter[int] = Counter()
+        for trigram_id in known[: size - required + overlap]:
+            for other in sizes:
+                postings = self._postings.get((trigram_id, other))
+                if postings is not None:
+                    hits.update(postings)
+
+        query_ids = frozenset(known)
+        best, best_similarity = -1, 0.0
+        for candidate, count in hits.items():
+            if count < overlap:
+                continue
+            candidate_trigrams = self._entry_trigrams[candidate]
+            other = len(candidate_trigrams)
+            shared = len(query_ids.intersection(candidate_trigrams))
+            similarity = shared / (size + other - shared)
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+
+        if best < 0 or best_similarity < self._min_similarity:
+            return None
+        return self._match(best, best_similarity)
+
+    def record(self, context: str, answer: str) -> None:
+        """
+        Remember the human answer to a context.
+
+        Args:
+            context: The context/reason for the input request.
+            answer: The answer the user gave.
+        """
+        self.load()
+        key = normalize_context(context)
+        if not key or not answer:
+            return
+
+        entry = self._by_key.get(key)
+        if entry is None:
+            entry = self._add(key, context, answer, 1, self._trigram_id_list(key))
+        else:
+            self._answers[entry] = answer
+            self._uses[entry] += 1
+
+        assert self._db is not None
+        try:
+            with self._db:
+                self._db.execute(
+                    "INSERT INTO answers (key, context, answer, uses, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET answer = excluded.answer, "
+                    "context = excluded.context, uses = excluded.uses, "
+                    "updated_at = excluded.updated_at",
+                    (key, context, answer, self._uses[entry], time.time()),
+                )
+        except sqlite3.Error as e:
+            logger.warning("Failed to save answer to memory: %s", e)
+
+    def close(self) -> None:
+        """Close the database file."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def load(self) -> None:
+        """Open the database and build the index, if not done yet."""
+        if self._db is not None:
+            return
+
+        start = time.perf_counter()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self._path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "key TEXT PRIMARY KEY, context TEXT NOT NULL, answer TEXT NOT NULL, "
+            "uses INTEGER NOT NULL, updated_at REAL NOT NULL)"
+        )
+        rows = self._db.execute(
+            "SELECT key, context, answer, uses FROM answers"
+        ).fetchall()
+
+        if self._min_similarity >= 1:
+            for key, context, answer, uses in rows:
+                self._add(key, context, answer, uses, [])
+        else:
+            # Number trigrams from rarest to most common, so the indexed
+            # prefixes and their postings stay short
+            row_trigrams = [trigrams(key) for key, *_ in rows]
+            frequency: Counter[str] = Counter()
+            for grams in row_trigrams:
+                frequency.update(grams)
+            for trigram, _count in sorted(frequency.items(), key=lambda item: item[1]):
+                self._trigram_ids[trigram] = len(self._trigram_ids)
+
+            trigram_id = self._trigram_ids.__getitem__
+            for (key, context, answer, uses), grams in zip(
+                rows, row_trigrams, strict=True
+            ):
+                self._add(key, context, answer, uses, sorted(map(trigram_id, grams)))
+        logger.info(
+            "Loaded %d remembered answers from %s in %.3f seconds",
+            len(self._answers),
+            self._path,
+            time.perf_counter() - start,
+        )
+
+    def _trigram_id_list(self, key: str) -> list[int]:
+        """Sorted trigram IDs of a key, numbering new trigrams after the rest."""
+        if self._min_similarity >= 1:
+            return []
+        grams = trigrams(key)
+        for trigram in grams.difference(self._trigram_ids):
+            self._trigram_ids[trigram] = len(self._trigram_ids)
+        return sorted(map(self._trigram_ids.__getitem__, grams))
+
+    def _add(
+        self, key: str, context: str, answer: str, uses: int, ids: list[int]
+    ) -> int:
+        """Add a new entry and its sorted trigram IDs to the in-memory index."""
+        entry = len(self._answers)
+        self._by_key[key] = entry
+        self._contexts.append(context)
+        self._answers.append(answer)
+        self._uses.append(uses)
+
+        if ids:
+            size = len(ids)
+            prefix = size - math.ceil(self._min_similarity * size) + self.PREFIX_OVERLAP
+            for trigram_id in ids[:prefix]:
+                postings = self._postings.get((trigram_id, size))
+                if postings is None:
+                    postings = self._postings[trigram_id, size] = array("I")
+                postings.append(entry)
+        self._entry_trigrams.append(array("I", ids))
+        return entry
+
+    def _match(self, entry: int, similarity: float) -> MemoryMatch:
+        """Build the match for an entry."""
+        return MemoryMatch(
+            self._contexts[entry], self._answers[entry], similarity, self._uses[entry]
+        )
@@ -0,0 +1,95 @@
+"""Assistant backends and their latency statistics."""
+
+import logging
+from collections import deque
+
+from copilot_interactive.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class BackendStats:
+    """Counters and recent latencies of one assistant backend."""
+
+    # Successful latencies kept for the percentile estimate
+    WINDOW = 200
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.wins = 0
+        self.cancelled = 0
+        self.latencies: deque[float] = deque(maxlen=self.WINDOW)
+
+    def percentile(self, fraction: float) -> float | None:
+        """
+        Latency percentile of recent successful requests.
+
+        Args:
+            fraction: Percentile as a fraction, e.g. 0.95.
+
+        Returns:
+            The latency in seconds, or None without any samples.
+        """
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class AssistantBackend:
+    """One OpenAI-compatible endpoint and the model to ask it for."""
+
+    def __init__(self, url: str, model: str) -> None:
+        """
+        Initialize the backend.
+
+        Args:
+            url: Base URL, e.g. ``http://localhost:4141``.
+            model: Model name sent in the completion requests.
+        """
+        self.url = url.rstrip("/")
+        self.model = model
+        self.stats = BackendStats()
+
+    def __repr__(self) -> str:
+        return f"AssistantBackend({self.url!r}, {self.model!r})"
+
+
+def parse_backends(settings: Settings) -> list[AssistantBackend]:
+    """
+    Build the ordered backend list from the settings.
+
+    ``ASSISTANT_BACKENDS`` is a comma-separated list of ``URL`` or
+    ``URL=MODEL`` entries, primary first; entries without a model use
+    ``ASSISTANT_MODEL``. When it is empty, the single backend at
+    ``ASSISTANT_HOST``/``ASSISTANT_PORT`` is used.
+
+    Args:
+        settings: Application settings.
+
+    Returns:
+        The backends, in the order they are tried.
+    """
+    backends = []
+    for entry in settings.assistant_backends.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        url, _, model = entry.partition("=")
+        if "://" not in url:
+            url = f"http://{url}"
+        backends.append(
+            AssistantBackend(url.strip(), model.strip() or settings.assistant_model)
+        )
+
+    if not backends:
+        backends.append(
+            AssistantBackend(
+                f"http://{settings.assistant_host}:{settings.assistant_port}",
+                settings.assistant_model,
+            )
+        )
+    return backends
@@ -1,17 +1,57 @@
 """Service for interacting with the local assistant."""
 
+import asyncio
+import importlib.util
 import json
 import logging
-
-import httpx
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
 
 from copilot_interactive.config.settings import Settings
+from copilot_interactive.services.assistant_backends import (
+    AssistantBackend,
+    parse_backends,
+)
+from copilot_interactive.services.circuit_breaker import CircuitBreaker
+from copilot_interactive.services.metrics import Metrics
+from copilot_interactive.services.suggestion_cache import CacheStats, SuggestionCache
+from copilot_interactive.utils.text import match_choice
+
+if TYPE_CHECKING:
+    import httpx
 
 logger = logging.getLogger(__name__)
 
+# Error types that indicate the assistant is unreachable or unhealthy
+BREAKER_ERRORS = frozenset({"timeout", "connection", "server_error"})
+
+
+class ProbeResult:
+    """Outcome of one background health probe of the assistant."""
+
+    def __init__(self, ok: bool, detail: str, checked_at: float) -> None:
+        """Initialize the probe result."""
+        self.ok = ok
+        self.detail = detail
+        self.checked_at = checked_at
+
 
 class AssistantService:
-    """Service for calling the local OpenAI-compatible assistant."""
+    """
+    Service for calling the local OpenAI-compatible assistant.
+
+    Several backends can be configured in order of preference. A request
+    goes to the primary first; if it has not answered within the hedge delay
+    the next backend is asked as well (and immediately if the primary fails).
+    The first valid reply wins and the other requests are cancelled. Unless a
+    fixed delay is configured, the hedge delay is each backend's recent p95
+    latency, so a backend is only hedged when it is slower than usual.
+    """
+
+    # Hedge delay used until a backend has enough latency samples
+    INITIAL_HEDGE_DELAY = 1.0
+    MIN_HEDGE_SAMPLES = 10
 
     SYSTEM_PROMPT = (
         "You are an assistant that must suggest a single-line terminal input "
@@ -26,17 +66,134 @@ class AssistantService:
         "Do not wrap the suggestion in quotes."
     )
 
-    def __init__(self, settings: Settings) -> None:
-        """Initialize the assistant service."""
+    CHOICE_PROMPT_TEMPLATE = (
+        "Context: {context}\n\n"
+        "Options:\n{options}\n\n"
+        "The user did not respond. Reply with only the number of the option "
+        "the user would most likely choose."
+    )
+
+    # Only an option number is expected back for a multiple-choice prompt
+    CHOICE_MAX_TOKENS = 8
+
+    def __init__(
+        self,
+        settings: Settings,
+        transport: "httpx.AsyncBaseTransport | None" = None,
+        metrics: Metrics | None = None,
+    ) -> None:
+        """
+        Initialize the assistant service.
+
+        Args:
+            settings: Application settings.
+            transport: Optional transport for the HTTP client (used in tests).
+            metrics: Metrics to record call latency and errors in.
+        """
         self._settings = settings
-        self._base_url = f"http://{settings.assistant_host}:{settings.assistant_port}"
+        self._metrics = metrics or Metrics()
+        self._backends = parse_backends(settings)
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._cache: SuggestionCache | None = None
+        if settings.assistant_cache_size > 0:
+            snapshot = settings.assistant_cache_path
+            self._cache = SuggestionCache(
+                max_size=settings.assistant_cache_size,
+                ttl=settings.assistant_cache_ttl,
+                snapshot_path=Path(snapshot) if snapshot else None,
+            )
+        self._breaker: CircuitBreaker | None = None
+        if settings.assistant_breaker_threshold > 0:
+            self._breaker = CircuitBreaker(settings.assistant_breaker_threshold)
+        self._probe_task: asyncio.Task[None] | None = None
+        self._last_probe: ProbeResult | None = None
+
+    @property
+    def cache_stats(self) -> CacheStats | None:
+        """Suggestion cache counters, or None if the cache is disabled."""
+        return self._cache.stats if self._cache is not None else None
+
+    @property
+    def backends(self) -> list[AssistantBackend]:
+        """The configured backends, primary first, with their statistics."""
+        return self._backends
+
+    @property
+    def breaker(self) -> CircuitBreaker | None:
+        """The circuit breaker, or None if it is disabled."""
+        return self._breaker
+
+    @property
+    def last_probe(self) -> ProbeResult | None:
+        """Result of the most recent health probe, if any has run."""
+        return self._last_probe
+
+    def _get_client(self) -> "httpx.AsyncClient":
+        """Get the shared HTTP client, creating it on first use."""
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+
+    def _create_client(self) -> "httpx.AsyncClient":
+        """
+        Create a pooled keep-alive HTTP client for the assistant.
 
-    async def get_suggested_input(self, context: str) -> str | None:
+        httpx is imported here rather than at module level so that starting
+        the server does not pay for it until the first assistant call.
+        """
+        import httpx
+
+        http2 = self._settings.assistant_http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning(
+                "HTTP/2 requested for assistant but 'h2' is not installed; "
+                "falling back to HTTP/1.1"
+            )
+            http2 = False
+
+        return httpx.AsyncClient(
+            timeout=self._settings.assistant_timeout,
+            limits=httpx.Limits(
+                max_connections=self._settings.assistant_max_connections,
+                max_keepalive_connections=(
+                    self._settings.assistant_max_keepalive_connections
+                ),
+                keepalive_expiry=self._settings.assistant_keepalive_expiry,
+            ),
+            http2=http2,
+            transport=self._transport,
+        )
+
+    async def aclose(self) -> None:
+        """Stop the probe, close the shared HTTP client and save the cache."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            await asyncio.gather(self._probe_task, return_exceptions=True)
+            self._probe_task = None
+        if self._cache is not None:
+            self._cache.save_snapshot()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_suggested_input(
+        self, context: str, choices: list[str] | None = None
+    ) -> str | None:
         """
         Get a suggested input from the local assistant based on context.
 
+        Suggestions are cached per normalized context and model, and
+        concurrent requests for the same context share one assistant call.
+        While the circuit breaker is open, cache misses return None at once.
+
+        With choices, the assistant is shown the numbered options and asked
+        for a number only; a reply that is not one of the options counts as
+        a failed call.
+
         Args:
             context: The context/reason for the input request.
+            choices: Allowed answers the suggestion must be one of.
 
         Returns:
             The suggested input string, or None if unavailable.
@@ -44,47 +201,379 @@ class AssistantService:
         if not context:
             return None
 
+        if self._cache is None:
+            return await self._request_suggestion(context, choices)
+
+        models = ",".join(backend.model for backend in self._backends)
+        key = SuggestionCache.make_key(context, models, choices)
+        return await self._cache.get_or_fetch(
+            key, lambda: self._request_suggestion(context, choices)
+        )
+
+    async def _request_suggestion(
+        self, context: str, choices: list[str] | None = None
+    ) -> str | None:
+        """Ask the assistant for a suggestion, bypassing the cache."""
+        if self._breaker is not None and not self._breaker.allow_request():
+            self._metrics.assistant_errors.inc("circuit_open")
+            return None
+
+        # A cancelled call (discarded prefetch, departed caller) raises before
+        # anything is recorded: it is not an assistant outcome
+        start = time.perf_counter()
+        if len(self._backends) == 1:
+            suggestion, error = await self._call_backend(
+                self._backends[0], context, choices
+            )
+        else:
+            suggestion, error = await self._hedged_call(context, choices)
+        self._record_outcome(time.perf_counter() - start, error)
+        return suggestion
+
+    def hedge_delay(self, backend: AssistantBackend) -> float:
+        """
+        How long to wait for a backend before also asking the next one.
+
+        Args:
+            backend: The backend that was asked last.
+
+        Returns:
+            The configured fixed delay, or the backend's recent p95 latency
+            once it has enough samples.
+        """
+        fixed = self._settings.assistant_hedge_delay
+        if fixed is not None:
+            return fixed
+        if len(backend.stats.latencies) < self.MIN_HEDGE_SAMPLES:
+            return self.INITIAL_HEDGE_DELAY
+        return backend.stats.percentile(0.95) or self.INITIAL_HEDGE_DELAY
+
+    async def _hedged_call(
+        self, context: str, choices: list[str] | None = None
+    ) -> tuple[str | None, str | None]:
+        """
+        Ask the backends in order, hedging slow ones, until one gives a reply.
+
+        Returns:
+            Tuple of (suggestion, error); the error describes why no backend
+            produced a suggestion.
+        """
+        pending: dict[asyncio.Task[tuple[str | None, str | None]], int] = {}
+        errors: list[str] = []
+        launched = 0
+
+        def launch() -> None:
+            nonlocal launched
+            backend = self._backends[launched]
+            task = asyncio.create_task(
+                self._call_backend(backend, context, choices),
+                name=f"assistant-{launched}",
+            )
+            pending[task] = launched
+            launched += 1
+
+        launch()
         try:
-            payload = {
-                "model": self._settings.assistant_model,
-                "messages": [
-                    {"role": "system", "content": self.SYSTEM_PROMPT},
-                    {
-                        "role": "user",
-                        "content": self.USER_PROMPT_TEMPLATE.format(context=context),
-                    },
-                ],
-                "max_tokens": 256,
-            }
-
-            async with httpx.AsyncClient(
-                timeout=self._settings.assistant_timeout
-            ) as client:
-                response = await client.post(
-                    f"{self._base_url}/chat/completions",
-                    json=payload,
-                    headers={"Content-Type": "application/json"},
+            while pending:
+                timeout = None
+                if launched < len(self._backends):
+                    timeout = self.hedge_delay(self._backends[launched - 1])
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
                 )
+                if not done:
+                    logger.debug("Hedging assistant request to backend %d", launched)
+                    launch()
+                    continue
 
-                if response.status_code != 200:
-                    logger.warning(
-                        "Assistant returned status %d: %s",
-                        response.status_code,
-                        response.text,
-                    )
-                    return None
+                for task in done:
+                    index = pending.pop(task)
+                    suggestion, error = task.result()
+                    if suggestion:
+                        self._backends[index].stats.wins += 1
+                        return suggestion, None
+                    errors.append(error or "empty_response")
 
-                return self._parse_response(response.text)
+                # A failed backend is a reason to try the next one right away
+                if launched < len(self._backends):
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+                self._backends[pending[task]].stats.cancelled += 1
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        # Only an outage if every backend failed for an outage reason
+        outage = [e for e in errors if e in BREAKER_ERRORS]
+        others = [e for e in errors if e not in BREAKER_ERRORS]
+        return None, (others or outage or ["empty_response"])[0]
+
+    async def _call_backend(
+        self,
+        backend: AssistantBackend,
+        context: str,
+        choices: list[str] | None = None,
+    ) -> tuple[str | None, str | None]:
+        """
+        Ask one backend for a suggestion.
+
+        Args:
+            backend: The backend to ask.
+            context: The context/reason for the input request.
+            choices: Allowed answers the suggestion must be one of.
 
+        Returns:
+            Tuple of (suggestion, error); error is None on success.
+        """
+        import httpx
+
+        if choices:
+            options = "\n".join(f"{i}. {choice}" for i, choice in enumerate(choices, 1))
+            prompt = self.CHOICE_PROMPT_TEMPLATE.format(
+                context=context, options=options
+            )
+        else:
+            prompt = self.USER_PROMPT_TEMPLATE.format(context=context)
+        payload = {
+            "model": backend.model,
+            "messages": [
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            "max_tokens": self.CHOICE_MAX_TOKENS if choices else 256,
+        }
+        stats = backend.stats
+        stats.requests += 1
+        start = time.perf_counter()
+        try:
+            if self._settings.assistant_streaming:
+                suggestion = await self._stream_suggestion(backend, payload)
+            else:
+                suggestion = await self._post_suggestion(backend, payload)
+            error = None if suggestion else "empty_response"
+            if suggestion and choices:
+                suggestion = match_choice(suggestion, choices)
+                if suggestion is None:
+                    error = "invalid_choice"
+                    logger.warning(
+                        "Assistant %s chose none of the options", backend.url
+                    )
+        except httpx.HTTPStatusError as e:
+            error = self._status_error(e.response.status_code)
+            logger.warning(
+                "Assistant %s returned status %d: %s",
+                backend.url,
+                e.response.status_code,
+                e.response.text,
+            )
+            suggestion = None
         except httpx.TimeoutException:
-            logger.warning("Assistant request timed out")
-            return None
+            error = "timeout"
+            logger.warning("Assistant request to %s timed out", backend.url)
+            suggestion = None
         except httpx.RequestError as e:
-            logger.warning("Assistant request failed: %s", e)
-            return None
+            error = "connection"
+            logger.warning("Assistant request to %s failed: %s", backend.url, e)
+            suggestion = None
         except Exception as e:
-            logger.error("Unexpected error calling assistant: %s", e)
-            return None
+            error = "unexpected"
+            logger.error("Unexpected error calling assistant %s: %s", backend.url, e)
+            suggestion = None
+
+        if error is None:
+            stats.successes += 1
+            stats.latencies.append(time.perf_counter() - start)
+        else:
+            stats.failures += 1
+        return suggestion, error
+
+    async def _post_suggestion(
+        self, backend: AssistantBackend, payload: dict[str, object]
+    ) -> str | None:
+        """
+        Request a completion and parse the suggestion from it.
+
+        Raises:
+            httpx.HTTPStatusError: If the assistant returned an error status.
+        """
+        import httpx
+
+        response = await self._get_client().post(
+            f"{backend.url}/chat/completions",
+            json=payload,
+            headers={"Content-Type": "application/json"},
+        )
+        if response.status_code != 200:
+            raise httpx.HTTPStatusError(
+                f"status {response.status_code}",
+                request=response.request,
+                response=response,
+            )
+        return self._parse_response(response.text)
+
+    @staticmethod
+    def _status_error(status_code: int) -> str:
+        """Classify an error status from the assistant."""
+        return "server_error" if status_code >= 500 else "http_status"
+
+    def _record_outcome(self, elapsed: float, error: str | None) -> None:
+        """Record a finished call in the metrics and the circuit breaker."""
+        self._metrics.assistant_seconds.observe(elapsed)
+        if error is not None:
+            self._metrics.assistant_errors.inc(error)
+
+        breaker = self._breaker
+        if breaker is None:
+            return
+        if error in BREAKER_ERRORS:
+            if breaker.record_failure():
+                self._start_probe()
+        else:
+            breaker.record_success()
+
+    def _start_probe(self) -> None:
+        """Start probing the assistant in the background until it recovers."""
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(
+                self._probe_until_recovered(), name="assistant-probe"
+            )
+
+    async def _probe_until_recovered(self) -> None:
+        """Probe the assistant periodically and close the breaker when it answers."""
+        breaker = self._breaker
+        while breaker is not None and breaker.is_open:
+            await asyncio.sleep(self._settings.assistant_probe_interval)
+            result = await self.probe()
+            if result.ok:
+                breaker.record_success()
+
+    async def probe(self) -> ProbeResult:
+        """
+        Check whether the assistant is reachable.
+
+        Sends ``GET /models`` to each backend in order, which OpenAI-compatible
+        servers answer cheaply without running the model. Any response below
+        500 from any backend counts as healthy.
+
+        Returns:
+            The probe result, also kept as last_probe.
+        """
+        import httpx
+
+        ok, detail = False, "no backends"
+        for backend in self._backends:
+            try:
+                response = await self._get_client().get(
+                    f"{backend.url}/models",
+                    timeout=min(
+                        self._settings.assistant_timeout,
+                        self._settings.assistant_probe_interval,
+                    ),
+                )
+                ok = response.status_code < 500
+                detail = f"status {response.status_code}"
+            except httpx.TimeoutException:
+                ok, detail = False, "timeout"
+            except httpx.RequestError as e:
+                ok, detail = False, str(e) or type(e).__name__
+            except Exception as e:
+                # Keep probing: the breaker only closes through a probe
+                logger.warning("Unexpected error probing %s: %s", backend.url, e)
+                ok, detail = False, str(e) or type(e).__name__
+            if ok:
+                break
+
+        self._last_probe = ProbeResult(ok, detail, time.time())
+        logger.debug("Assistant probe: %s", detail)
+        return self._last_probe
+
+    async def _stream_suggestion(
+        self, backend: AssistantBackend, payload: dict[str, object]
+    ) -> str | None:
+        """
+        Request a streamed completion and return its first line.
+
+        The stream is closed as soon as the first line is complete, which
+        tells the assistant to stop generating.
+
+        Args:
+            backend: The backend to ask.
+            payload: The chat completions request payload.
+
+        Returns:
+            The first line of the suggestion, or None if unavailable.
+
+        Raises:
+            httpx.HTTPStatusError: If the assistant returned an error status.
+        """
+        import httpx
+
+        async with self._get_client().stream(
+            "POST",
+            f"{backend.url}/chat/completions",
+            json={**payload, "stream": True},
+            headers={"Content-Type": "application/json"},
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise httpx.HTTPStatusError(
+                    f"status {response.status_code}",
+                    request=response.request,
+                    response=response,
+                )
+
+            if "text/event-stream" not in response.headers.get("content-type", ""):
+                # The assistant ignored the stream flag
+                await response.aread()
+                return self._parse_response(response.text)
+
+            text = ""
+            async for line in response.aiter_lines():
+                delta, finished = self._parse_stream_event(line)
+                text += delta
+                first_line, newline, _ = text.lstrip().partition("\n")
+                if newline or finished:
+                    return first_line.strip() or None
+
+            return text.strip() or None
+
+    def _parse_stream_event(self, line: str) -> tuple[str, bool]:
+        """
+        Parse one server-sent event line of a streamed completion.
+
+        Args:
+            line: A single line of the event stream.
+
+        Returns:
+            Tuple of (content_delta, finished).
+        """
+        if not line.startswith("data:"):
+            return ("", False)
+
+        data = line[len("data:") :].strip()
+        if data == "[DONE]":
+            return ("", True)
+
+        try:
+            event: object = json.loads(data)
+        except json.JSONDecodeError:
+            return ("", False)
+
+        if not isinstance(event, dict):
+            return ("", False)
+        choices = event.get("choices")
+        if not isinstance(choices, list) or not choices:
+            return ("", False)
+        choice = choices[0]
+        if not isinstance(choice, dict):
+            return ("", False)
+
+        delta = choice.get("delta")
+        content = delta.get("content") if isinstance(delta, dict) else None
+        return (
+            content if isinstance(content, str) else "",
+            choice.get("finish_reason") is not None,
+        )
 
     def _parse_response(self, response_text: str) -> str | None:
         """
@@ -0,0 +1,92 @@
+"""Circuit breaker guarding calls to the local assistant."""
+
+import logging
+import time
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated failures of a dependency.
+
+    The breaker starts closed. After ``failure_threshold`` consecutive
+    failures it opens, and requests are refused until something (here the
+    assistant's background probe) reports that the dependency has recovered.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the breaker.
+            clock: Wall-clock time source for the state change timestamps.
+        """
+        self._failure_threshold = failure_threshold
+        self._clock = clock
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._changed_at = clock()
+        self.opens = 0
+
+    @property
+    def state(self) -> str:
+        """'closed' or 'open'."""
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """Whether requests are currently refused."""
+        return self._state == self.OPEN
+
+    @property
+    def consecutive_failures(self) -> int:
+        """Failures since the last success."""
+        return self._consecutive_failures
+
+    @property
+    def changed_at(self) -> float:
+        """Wall-clock time of the last state change."""
+        return self._changed_at
+
+    def allow_request(self) -> bool:
+        """Whether a request may be sent to the dependency."""
+        return self._state == self.CLOSED
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the breaker if it was open."""
+        self._consecutive_failures = 0
+        if self._state == self.OPEN:
+            self._set_state(self.CLOSED)
+
+    def record_failure(self) -> bool:
+        """
+        Record a failed call.
+
+        Returns:
+            True if this failure opened the breaker.
+        """
+        self._consecutive_failures += 1
+        if (
+            self._state == self.CLOSED
+            and self._consecutive_failures >= self._failure_threshold
+        ):
+            self.opens += 1
+            self._set_state(self.OPEN)
+            return True
+        return False
+
+    def _set_state(self, state: str) -> None:
+        """Change state and log the transition."""
+        logger.warning("Assistant circuit breaker %s -> %s", self._state, state)
+        self._state = state
+        self._changed_at = self._clock()
@@ -0,0 +1,509 @@
+"""Sharing one console between several server processes over a Unix socket."""
+
+import asyncio
+import contextlib
+import itertools
+import json
+import logging
+import uuid
+from pathlib import Path
+from typing import Any
+
+from copilot_interactive.config.settings import Settings
+from copilot_interactive.services.console_service import ConsoleService
+from copilot_interactive.services.metrics import Metrics
+from copilot_interactive.utils.platform import bind_unix_socket
+from copilot_interactive.utils.text import normalize_context
+
+logger = logging.getLogger(__name__)
+
+# Extra seconds a worker waits past the prompt timeout for the broker's reply
+REPLY_MARGIN = 1.0
+
+# Backoff between reconnection attempts, in seconds
+RECONNECT_DELAYS = (0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _encode(message: dict[str, Any]) -> bytes:
+    """One protocol message as a JSON line."""
+    return json.dumps(message).encode() + b"\n"
+
+
+class BrokeredPrompt:
+    """A prompt shown on the broker's console on behalf of a worker."""
+
+    def __init__(
+        self,
+        worker: str,
+        prompt_id: int,
+        context_key: str,
+        task: asyncio.Task[Any],
+        deadline: float,
+    ) -> None:
+        """Initialize the prompt; ``deadline`` is in event loop time."""
+        self.worker = worker
+        self.prompt_id = prompt_id
+        self.context_key = context_key
+        self.task = task
+        self.deadline = deadline
+        self.expiry: asyncio.TimerHandle | None = None
+
+
+class ConsoleBroker:
+    """
+    Owns the console and answers prompts forwarded by server workers.
+
+    Workers connect over a Unix domain socket and exchange JSON lines:
+
+    - ``{"op": "hello", "worker": ID}`` identifies the worker, also after a
+      reconnect;
+    - ``{"op": "ask", "id": N, "context": ..., "timeout": ..., "suggestion":
+      ...}`` shows a prompt, and the broker replies ``{"id": N, "answer":
+      ..., "timed_out": ...}`` once it is answered; an optional
+      ``"choices": [...]`` shows it as a menu;
+    - an ask with ``"form": [...]`` and ``"suggestions": [...]`` instead of
+      a context shows a form, answered with ``"answers": [...]``;
+    - ``{"op": "cancel", "id": N}`` withdraws a prompt.
+
+    Prompts belong to the worker, not the connection. When a worker's
+    connection drops, its prompts stay on the console for ``grace`` seconds
+    and answers given meanwhile are kept. A reconnecting worker re-sends its
+    asks under the same IDs and receives them; if the worker crashed, the
+    next ask with the same context (e.g. the agent retrying against another
+    worker) adopts the orphaned prompt instead of showing a duplicate.
+    """
+
+    def __init__(self, console: ConsoleService, grace: float) -> None:
+        """
+        Initialize the broker.
+
+        Args:
+            console: The console prompts are shown on.
+            grace: Seconds the prompts of a disconnected worker are kept.
+        """
+        self._console = console
+        self._grace = grace
+        self._prompts: dict[tuple[str, int], BrokeredPrompt] = {}
+        self._orphans: dict[str, BrokeredPrompt] = {}
+        self._connections: dict[str, asyncio.StreamWriter] = {}
+        self._server: asyncio.AbstractServer | None = None
+
+    @property
+    def prompts(self) -> list[BrokeredPrompt]:
+        """Prompts that are pending or answered but not yet delivered."""
+        return list(self._prompts.values())
+
+    async def start(self, path: Path) -> None:
+        """
+        Listen for workers on a Unix domain socket.
+
+        Args:
+            path: Socket path; a stale socket left there is replaced.
+        """
+        self._server = await asyncio.start_unix_server(
+            self._serve, sock=bind_unix_socket(path)
+        )
+        logger.info("Console broker listening on %s", path)
+
+    async def aclose(self) -> None:
+        """Stop listening and withdraw every prompt."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for writer in list(self._connections.values()):
+            writer.close()
+        for prompt in list(self._prompts.values()):
+            prompt.task.cancel()
+        self._prompts.clear()
+        self._orphans.clear()
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Handle one worker connection."""
+        worker: str | None = None
+        try:
+            while line := await reader.readline():
+                try:
+                    message = json.loads(line)
+                    op = message["op"]
+                    if op == "hello":
+                        worker = str(message["worker"])
+                        self._on_hello(worker, writer)
+                    elif worker is None:
+                        logger.warning("Broker message before hello: %s", op)
+                    elif op == "ask":
+                        self._on_ask(worker, message)
+                    elif op == "cancel":
+                        self._on_cancel(worker, int(message["id"]))
+                    else:
+                        logger.warning("Unknown broker message: %s", op)
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.warning("Invalid broker message %r: %s", line, e)
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            logger.debug("Worker connection failed: %s", e)
+        finally:
+            writer.close()
+            if worker is not None and self._connections.get(worker) is writer:
+                self._on_disconnect(worker)
+
+    def _on_hello(self, worker: str, writer: asyncio.StreamWriter) -> None:
+        """Attach a (re)connected worker and hand over what it missed."""
+        self._connections[worker] = writer
+        for prompt in list(self._prompts.values()):
+            if prompt.worker == worker:
+                self._claim(prompt)
+                if prompt.task.done():
+                    self._deliver(prompt)
+
+    def _on_ask(self, worker: str, message: dict[str, Any]) -> None:
+        """Show a worker's prompt, or reattach it if it is already known."""
+        prompt_id = int(message["id"])
+        form = message.get("form")
+        if form is not None:
+            key = "form:" + "\x1f".join(normalize_context(str(c)) for c in form)
+        else:
+            key = normalize_context(str(message.get("context", "")))
+            if message.get("choices"):
+                key += "\x1f" + "\x1f".join(map(str, message["choices"]))
+
+        prompt = self._prompts.get((worker, prompt_id))
+        if prompt is None:
+            prompt = self._adopt(worker, prompt_id, key)
+        if prompt is None:
+            deadline = asyncio.get_running_loop().time() + float(message["timeout"])
+            task = asyncio.create_task(self._show(message), name="brokered-prompt")
+            prompt = BrokeredPrompt(worker, prompt_id, key, task, deadline)
+            self._prompts[worker, prompt_id] = prompt
+            task.add_done_callback(lambda _t: self._deliver(prompt))
+        elif prompt.task.done():
+            self._deliver(prompt)
+
+    async def _show(self, message: dict[str, Any]) -> str | None | list[str | None]:
+        """Show a prompt or form on the console and wait for the answers."""
+        timeout = float(message["timeout"])
+        form = message.get("form")
+        if form is not None:
+            return await self._console.ask_form(
+                [str(context) for context in form],
+                timeout,
+                message.get("suggestions"),
+            )
+        return await self._console.ask(
+            str(message.get("context", "")),
+            timeout,
+            message.get("suggestion"),
+            message.get("choices"),
+        )
+
+    def _adopt(self, worker: str, prompt_id: int, key: str) -> BrokeredPrompt | None:
+        """Hand an orphaned prompt with the same context to a new ask."""
+        prompt = self._orphans.get(key)
+        if prompt is None or not prompt.context_key:
+            return None
+        logger.info("Prompt of disconnected worker adopted by a new request")
+        del self._prompts[prompt.worker, prompt.prompt_id]
+        self._claim(prompt)
+        prompt.worker, prompt.prompt_id = worker, prompt_id
+        self._prompts[worker, prompt_id] = prompt
+        return prompt
+
+    def _on_cancel(self, worker: str, prompt_id: int) -> None:
+        """Withdraw a prompt the worker no longer waits for."""
+        prompt = self._prompts.pop((worker, prompt_id), None)
+        if prompt is not None:
+            self._claim(prompt)
+            prompt.task.cancel()
+
+    def _on_disconnect(self, worker: str) -> None:
+        """Keep a disconnected worker's prompts for the grace period."""
+        del self._connections[worker]
+        loop = asyncio.get_running_loop()
+        for prompt in list(self._prompts.values()):
+            if prompt.worker != worker:
+                continue
+            self._orphans.setdefault(prompt.context_key, prompt)
+            prompt.expiry = loop.call_later(self._grace, self._expire, prompt)
+        logger.info("Worker disconnected; keeping its prompts for %ss", self._grace)
+
+    def _claim(self, prompt: BrokeredPrompt) -> None:
+        """Mark a prompt as owned by a connected worker again."""
+        if prompt.expiry is not None:
+            prompt.expiry.cancel()
+            prompt.expiry = None
+        if self._orphans.get(prompt.context_key) is prompt:
+            del self._orphans[prompt.context_key]
+
+    def _expire(self, prompt: BrokeredPrompt) -> None:
+        """Drop a prompt whose worker did not come back in time."""
+        if self._prompts.get((prompt.worker, prompt.prompt_id)) is not prompt:
+            return
+        logger.info("Dropping prompt of a worker that did not reconnect")
+        del self._prompts[prompt.worker, prompt.prompt_id]
+        self._claim(prompt)
+        prompt.task.cancel()
+
+    def _deliver(self, prompt: BrokeredPrompt) -> None:
+        """Send a finished prompt's answer if its worker is connected."""
+        if prompt.task.cancelled():
+            return
+        writer = self._connections.get(prompt.worker)
+        if writer is None or writer.is_closing():
+            return  # kept until the worker reconnects or the grace period ends
+        if self._prompts.get((prompt.worker, prompt.prompt_id)) is not prompt:
+            return
+        del self._prompts[prompt.worker, prompt.prompt_id]
+
+        error = prompt.task.exception()
+        result = None if error is not None else prompt.task.result()
+        if error is not None:
+            logger.error("Brokered prompt failed: %s", error)
+        expired = asyncio.get_running_loop().time() >= prompt.deadline
+        reply: dict[str, Any] = {"id": prompt.prompt_id}
+        if isinstance(result, list):
+            reply["answers"] = result
+            reply["timed_out"] = expired and None in result
+        else:
+            reply["answer"] = result
+            reply["timed_out"] = expired and result is None
+        try:
+            writer.write(_encode(reply))
+        except Exception as e:
+            logger.warning("Failed to deliver answer to worker: %s", e)
+
+
+async def serve_console_broker(settings: Settings, path: Path) -> None:
+    """
+    Run a broker for this process's console until cancelled.
+
+    Args:
+        settings: Application settings.
+        path: Unix domain socket to listen on; removed on exit.
+    """
+    broker = ConsoleBroker(ConsoleService(settings), settings.console_broker_grace)
+    await broker.start(path)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await broker.aclose()
+        with contextlib.suppress(OSError):
+            path.unlink()
+
+
+class RemotePrompt:
+    """A prompt forwarded to the broker, waiting for its reply."""
+
+    def __init__(
+        self,
+        prompt_id: int,
+        request: dict[str, Any],
+        deadline: float,
+        future: asyncio.Future[dict[str, Any]],
+    ) -> None:
+        """Initialize the prompt; ``deadline`` is in event loop time."""
+        self.id = prompt_id
+        self.request = request
+        self.deadline = deadline
+        self.future = future
+
+
+class RemoteConsoleService:
+    """
+    Console for server workers: prompts are forwarded to the broker.
+
+    It has the same ``ask`` and ``ask_form`` interface as
+    ``ConsoleService``. The connection is opened on the first prompt and
+    re-established with backoff while prompts are outstanding; after a
+    reconnect every outstanding prompt is re-sent with its remaining
+    timeout, so none are lost. If the broker cannot be reached, prompts time
+    out as usual.
+    """
+
+    def __init__(
+        self, settings: Settings, path: Path, metrics: Metrics | None = None
+    ) -> None:
+        """
+        Initialize the remote console.
+
+        Args:
+            settings: Application settings.
+            path: The broker's Unix domain socket.
+            metrics: Metrics to record prompt timeouts in.
+        """
+        self._settings = settings
+        self._path = path
+        self._metrics = metrics or Metrics()
+        self._worker = uuid.uuid4().hex
+        self._ids = itertools.count(1)
+        self._pending: dict[int, RemotePrompt] = {}
+        self._writer: asyncio.StreamWriter | None = None
+        self._connection: asyncio.Task[None] | None = None
+
+    @property
+    def pending_prompts(self) -> list[RemotePrompt]:
+        """Prompts of this worker still waiting for an answer, oldest first."""
+        return list(self._pending.values())
+
+    @property
+    def is_connected(self) -> bool:
+        """Whether the connection to the broker is currently open."""
+        return self._writer is not None
+
+    async def ask(
+        self,
+        context: str,
+        timeout: float,
+        suggestion: str | None = None,
+        choices: list[str] | None = None,
+    ) -> str | None:
+        """
+        Show a prompt on the broker's console and wait for its answer.
+
+        Args:
+            context: The context/reason for requesting input.
+            timeout: Seconds to wait for an answer.
+            suggestion: Answer shown as the default.
+            choices: Allowed answers, shown as a numbered menu.
+
+        Returns:
+            The answer, or None if the prompt timed out, the answer was empty,
+            or the broker could not be reached in time.
+        """
+        message: dict[str, Any] = {"context": context, "suggestion": suggestion}
+        if choices:
+            message["choices"] = choices
+        reply = await self._request(message, timeout)
+        answer = reply.get("answer") if reply is not None else None
+        return answer if isinstance(answer, str) and answer else None
+
+    async def ask_form(
+        self,
+        contexts: list[str],
+        timeout: float,
+        suggestions: list[str | None] | None = None,
+    ) -> list[str | None]:
+        """
+        Show several questions as one form on the broker's console.
+
+        Args:
+            contexts: The questions, in the order they are asked.
+            timeout: Seconds to wait for all answers.
+            suggestions: Default answer shown with each question, if any.
+
+        Returns:
+            One answer per question; None where there is no answer.
+        """
+        reply = await self._request(
+            {"form": contexts, "suggestions": suggestions}, timeout
+        )
+        answers = reply.get("answers") if reply is not None else None
+        if not isinstance(answers, list) or len(answers) != len(contexts):
+            return [None] * len(contexts)
+        return [a if isinstance(a, str) and a else None for a in answers]
+
+    async def _request(
+        self, request: dict[str, Any], timeout: float
+    ) -> dict[str, Any] | None:
+        """Forward a prompt and wait for the broker's reply; None on timeout."""
+        loop = asyncio.get_running_loop()
+        prompt = RemotePrompt(
+            next(self._ids), request, loop.time() + timeout, loop.create_future()
+        )
+        self._pending[prompt.id] = prompt
+        self._send_ask(prompt)
+        self._ensure_connection()
+
+        try:
+            return await asyncio.wait_for(prompt.future, timeout + REPLY_MARGIN)
+        except TimeoutError:
+            self._metrics.input_timeouts.inc()
+            logger.info("Brokered prompt %d timed out", prompt.id)
+            self._send({"op": "cancel", "id": prompt.id})
+            return None
+        except asyncio.CancelledError:
+            self._send({"op": "cancel", "id": prompt.id})
+            raise
+        finally:
+            self._pending.pop(prompt.id, None)
+
+    async def aclose(self) -> None:
+        """Close the connection to the broker."""
+        if self._connection is not None:
+            self._connection.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._connection
+            self._connection = None
+
+    def _ensure_connection(self) -> None:
+        """Start the connection task unless it is already running."""
+        if self._connection is None or self._connection.done():
+            self._connection = asyncio.create_task(
+                self._maintain_connection(), name="console-broker-client"
+            )
+
+    async def _maintain_connection(self) -> None:
+        """Stay connected while prompts are outstanding."""
+        attempt = 0
+        while self._pending:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self._path)
+            except OSError as e:
+                delay = RECONNECT_DELAYS[min(attempt, len(RECONNECT_DELAYS) - 1)]
+                logger.debug(
+                    "Console broker unavailable (%s); retrying in %ss", e, delay
+                )
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            attempt = 0
+            self._writer = writer
+            try:
+                self._send({"op": "hello", "worker": self._worker})
+                for prompt in list(self._pending.values()):
+                    self._send_ask(prompt)
+                while line := await reader.readline():
+                    self._on_reply(line)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                logger.debug("Console broker connection failed: %s", e)
+            finally:
+                self._writer = None
+                writer.close()
+            if self._pending:
+                logger.warning("Lost connection to the console broker; reconnecting")
+
+    def _on_reply(self, line: bytes) -> None:
+        """Resolve the prompt a broker reply is for."""
+        try:
+            message = json.loads(line)
+            prompt = self._pending.get(int(message["id"]))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Invalid broker reply %r: %s", line, e)
+            return
+        if prompt is None or prompt.future.done():
+            return
+        if message.get("timed_out"):
+            self._metrics.input_timeouts.inc()
+        prompt.future.set_result(message)
+
+    def _send_ask(self, prompt: RemotePrompt) -> None:
+        """Forward a prompt with its remaining timeout."""
+        remaining = prompt.deadline - asyncio.get_running_loop().time()
+        self._send(
+            {
+                "op": "ask",
+                "id": prompt.id,
+                "timeout": max(remaining, 0.0),
+                **prompt.request,
+            }
+        )
+
+    def _send(self, message: dict[str, Any]) -> None:
+        """Write a message if connected; asks are re-sent on reconnect."""
+        if self._writer is None:
+            return
+        try:
+            self._writer.write(_encode(message))
+        except Exception as e:
+            logger.debug("Failed to write to the console broker: %s", e)
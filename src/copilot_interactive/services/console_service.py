@@ -0,0 +1,564 @@
+"""Service multiplexing concurrent prompts onto a single terminal."""
+
+import asyncio
+import atexit
+import codecs
+import contextlib
+import itertools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any, TextIO
+
+from copilot_interactive.config.settings import Settings
+from copilot_interactive.services.metrics import Metrics
+from copilot_interactive.utils.platform import is_windows
+from copilot_interactive.utils.text import match_choice
+
+logger = logging.getLogger(__name__)
+
+
+class PendingPrompt:
+    """A prompt waiting for an answer from the console."""
+
+    def __init__(
+        self,
+        prompt_id: int,
+        context: str,
+        future: asyncio.Future[str],
+        suggestion: str | None = None,
+        form: int | None = None,
+        choices: list[str] | None = None,
+    ) -> None:
+        """
+        Initialize the pending prompt.
+
+        ``form`` is set for form questions and ``choices`` for multiple-choice
+        prompts, whose answer is always one of the choices.
+        """
+        self.id = prompt_id
+        self.context = context
+        self.future = future
+        self.suggestion = suggestion
+        self.form = form
+        self.choices = choices
+        self.created_at = time.monotonic()
+
+
+class ConsoleService:
+    """
+    Service routing terminal answers to concurrent prompts.
+
+    Every prompt gets a numeric ID and is listed on the console together with
+    its context. A line of the form ``<id>: <answer>`` answers that prompt;
+    any other line, such as ``10:30`` when no prompt 10 is pending, answers
+    the only pending prompt when there is exactly one, or the next question
+    when only the questions of one form are pending.
+    Stdin is read by the event loop itself (``add_reader`` on its file
+    descriptor) and only while prompts are pending, so a timed-out or
+    cancelled prompt never leaves a blocked read behind that could swallow
+    the next answer. Platforms without ``add_reader`` support (e.g. the
+    Windows proactor loop) fall back to a single dispatching reader thread.
+
+    A multiple-choice prompt accepts the number or the text of a choice.
+    While it is the only pending prompt and stdin is a terminal, the terminal
+    is switched to cbreak mode so a single digit key answers it and Enter
+    skips it; the previous mode is restored as soon as it is answered.
+    """
+
+    ANSWER_PATTERN = re.compile(r"^\s*(\d+)\s*:\s?(.*)$", re.DOTALL)
+    MAX_KEY_CHOICES = 9
+    # Seconds input is still read after a key answer, to drop a trailing Enter
+    KEY_ENTER_GRACE = 0.5
+
+    def __init__(
+        self,
+        settings: Settings,
+        input_stream: TextIO | None = None,
+        output_stream: TextIO | None = None,
+        metrics: Metrics | None = None,
+    ) -> None:
+        """
+        Initialize the console service.
+
+        Args:
+            settings: Application settings.
+            input_stream: Stream to read answers from (defaults to stdin).
+            output_stream: Stream to render prompts to (defaults to stdout).
+            metrics: Metrics to record prompt timeouts in.
+        """
+        self._settings = settings
+        self._metrics = metrics or Metrics()
+        self._input = input_stream
+        self._output = output_stream
+        self._ids = itertools.count(1)
+        self._pending: dict[int, PendingPrompt] = {}
+        self._buffered: deque[str] = deque()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._reader: threading.Thread | None = None
+        self._reader_loop: asyncio.AbstractEventLoop | None = None
+        self._reader_fd: int | None = None
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+        self._eof = False
+        self._key_attrs: list[Any] | None = None
+        self._key_fd: int | None = None
+        self._key_restore_registered = False
+        self._key_answered_at = 0.0
+
+    @property
+    def is_reading(self) -> bool:
+        """Whether the event loop is currently watching the input for answers."""
+        return self._reader_loop is not None
+
+    @property
+    def pending_prompts(self) -> list[PendingPrompt]:
+        """Prompts that are still waiting for an answer, oldest first."""
+        return list(self._pending.values())
+
+    async def ask(
+        self,
+        context: str,
+        timeout: float,
+        suggestion: str | None = None,
+        choices: list[str] | None = None,
+    ) -> str | None:
+        """
+        Show a prompt and wait for its answer.
+
+        Args:
+            context: The context/reason for requesting input.
+            timeout: Seconds to wait for an answer.
+            suggestion: Answer shown as the default, used by the caller when
+                the prompt is skipped or times out.
+            choices: Allowed answers, shown as a numbered menu.
+
+        Returns:
+            The stripped answer, which is one of the choices if any were
+            given, or None if the prompt timed out, the answer was empty,
+            or stdin is closed.
+        """
+        if self._eof:
+            return None
+
+        self._loop = asyncio.get_running_loop()
+        prompt = PendingPrompt(
+            next(self._ids),
+            context,
+            self._loop.create_future(),
+            suggestion,
+            choices=choices or None,
+        )
+        self._pending[prompt.id] = prompt
+        self._render(prompt)
+        self._drain_buffered()
+        if not prompt.future.done():
+            self._start_reading()
+        self._update_key_mode()
+
+        try:
+            answer = await asyncio.wait_for(prompt.future, timeout=timeout)
+        except TimeoutError:
+            self._metrics.input_timeouts.inc()
+            logger.info("Prompt %d timed out after %s seconds", prompt.id, timeout)
+            self._write(f"\n[Prompt {prompt.id} timed out]\n")
+            return None
+        except asyncio.CancelledError:
+            # The requester went away; tell the user not to bother answering
+            self._write(f"\n[Prompt {prompt.id} withdrawn]\n")
+            raise
+        finally:
+            self._pending.pop(prompt.id, None)
+            if self._pending:
+                self._update_key_mode()
+            else:
+                self._finish_reading()
+
+        return answer or None
+
+    async def ask_form(
+        self,
+        contexts: list[str],
+        timeout: float,
+        suggestions: list[str | None] | None = None,
+    ) -> list[str | None]:
+        """
+        Show several questions as one form and wait for their answers.
+
+        Every question is a prompt with its own ID. Bare lines answer the
+        questions in order while no other prompt is pending; ``<id>: <answer>``
+        answers a specific question. The timeout covers the whole form.
+
+        Args:
+            contexts: The questions, in the order they are asked.
+            timeout: Seconds to wait for all answers.
+            suggestions: Default answer shown with each question, if any.
+
+        Returns:
+            One answer per question; None where the question was skipped,
+            left unanswered when the form timed out, or stdin is closed.
+        """
+        if self._eof or not contexts:
+            return [None] * len(contexts)
+
+        self._loop = loop = asyncio.get_running_loop()
+        suggestions = suggestions or [None] * len(contexts)
+        ids = [next(self._ids) for _ in contexts]
+        form = ids[0]
+        prompts = [
+            PendingPrompt(prompt_id, context, loop.create_future(), suggestion, form)
+            for prompt_id, context, suggestion in zip(
+                ids, contexts, suggestions, strict=True
+            )
+        ]
+        for prompt in prompts:
+            self._pending[prompt.id] = prompt
+        self._render_form(prompts)
+        self._drain_buffered()
+        if not all(p.future.done() for p in prompts):
+            self._start_reading()
+        self._update_key_mode()
+
+        try:
+            _, unanswered = await asyncio.wait(
+                [p.future for p in prompts], timeout=timeout
+            )
+        except asyncio.CancelledError:
+            self._write(f"\n[Form {form} withdrawn]\n")
+            raise
+        finally:
+            for prompt in prompts:
+                self._pending.pop(prompt.id, None)
+            if self._pending:
+                self._update_key_mode()
+            else:
+                self._stop_reading()
+
+        if unanswered:
+            self._metrics.input_timeouts.inc()
+            logger.info("Form %d timed out with %d unanswered", form, len(unanswered))
+            self._write(f"\n[Form {form} timed out, {len(unanswered)} unanswered]\n")
+        return [
+            (p.future.result() or None) if p.future.done() else None for p in prompts
+        ]
+
+    def handle_line(self, line: str) -> bool:
+        """
+        Route a line typed on the console to its prompt.
+
+        Args:
+            line: The raw line, with or without trailing newline.
+
+        Returns:
+            True if the line answered a prompt, False otherwise.
+        """
+        line = line.rstrip("\r\n")
+        match = self.ANSWER_PATTERN.match(line)
+        if match:
+            prompt = self._pending.get(int(match.group(1)))
+            if prompt is not None:
+                return self._resolve(prompt, match.group(2))
+
+        prompts = list(self._pending.values())
+        form = prompts[0].form if prompts else None
+        single = len(prompts) == 1 or (
+            form is not None and all(p.form == form for p in prompts)
+        )
+        if match and not single:
+            # Only an answer like "10:30" for the one pending prompt may
+            # start with something that looks like an ID
+            self._write(f"[No pending prompt with ID {match.group(1)}]\n")
+            return False
+
+        if not self._pending:
+            # Keep typed-ahead input for the next prompt; a stray Enter (e.g.
+            # after answering with a single key) must not skip it
+            if line.strip():
+                self._buffered.append(line)
+            return False
+
+        if not single:
+            ids = ", ".join(str(prompt_id) for prompt_id in self._pending)
+            self._write(
+                f"[{len(self._pending)} prompts pending ({ids}); "
+                "answer with '<id>: <answer>']\n"
+            )
+            return False
+
+        resolved = self._resolve(prompts[0], line)
+        if resolved and len(prompts) > 1:
+            # Walk through the form one question at a time
+            self._write(f"  [{prompts[1].id}] {prompts[1].context or '(none)'}: ")
+        return resolved
+
+    def _resolve(self, prompt: PendingPrompt, answer: str) -> bool:
+        """Resolve a prompt's future with the given answer."""
+        if prompt.choices and answer.strip():
+            choice = match_choice(answer, prompt.choices)
+            if choice is None:
+                self._write(
+                    f"[Prompt {prompt.id}: choose 1-{len(prompt.choices)} "
+                    "or one of the listed answers]\n"
+                )
+                return False
+            answer = choice
+
+        # Unregister right away so further lines from the same read are
+        # routed to the remaining prompts or kept for the next one
+        self._pending.pop(prompt.id, None)
+        self._update_key_mode()
+        if prompt.future.done():
+            return False
+        prompt.future.set_result(answer.strip())
+        return True
+
+    def _drain_buffered(self) -> None:
+        """Hand lines typed ahead of time to the pending prompts."""
+        while self._buffered and self._pending:
+            self.handle_line(self._buffered.popleft())
+
+    def _render(self, prompt: PendingPrompt) -> None:
+        """Print the new prompt and the list of outstanding prompts."""
+        lines = ["", f"[{prompt.id}] Input requested: {prompt.context or '(none)'}"]
+        choices = prompt.choices or []
+        lines.extend(
+            f"    {number}) {choice}" for number, choice in enumerate(choices, 1)
+        )
+        if prompt.suggestion:
+            lines.append(f"    (Enter or timeout answers: {prompt.suggestion})")
+        others = [p for p in self._pending.values() if p.id != prompt.id]
+        if others:
+            lines.append("Other pending prompts:")
+            lines.extend(f"  [{p.id}] {p.context or '(none)'}" for p in others)
+            lines.append(">>> Answer with '<id>: <answer>' and press Enter: ")
+        elif choices:
+            lines.append(f">>> Choose 1-{len(choices)}: ")
+        else:
+            lines.append(">>> Please enter your input and press Enter: ")
+        self._write("\n".join(lines))
+
+    def _render_form(self, prompts: list[PendingPrompt]) -> None:
+        """Print a form's questions and the list of outstanding prompts."""
+        first, last = prompts[0].id, prompts[-1].id
+        lines = [
+            "",
+            f"[{first}-{last}] Input requested: {len(prompts)} questions",
+        ]
+        for prompt in prompts:
+            lines.append(f"  [{prompt.id}] {prompt.context or '(none)'}")
+            if prompt.suggestion:
+                lines.append(f"      (Enter or timeout answers: {prompt.suggestion})")
+        others = [p for p in self._pending.values() if p.form != first]
+        if others:
+            lines.append("Other pending prompts:")
+            lines.extend(f"  [{p.id}] {p.context or '(none)'}" for p in others)
+            lines.append(">>> Answer with '<id>: <answer>' and press Enter: ")
+        else:
+            lines.append(
+                ">>> Answer each question in order, or with '<id>: <answer>':\n"
+                f"  [{first}] {prompts[0].context or '(none)'}: "
+            )
+        self._write("\n".join(lines))
+
+    def _write(self, text: str) -> None:
+        """Write text to the console output."""
+        output = self._output or sys.stdout
+        try:
+            output.write(text)
+            output.flush()
+        except Exception as e:
+            logger.debug("Failed to write to console: %s", e)
+
+    def _start_reading(self) -> None:
+        """Watch the input for answers on the running event loop."""
+        if self._eof or self._reader is not None:
+            return
+        loop = self._loop
+        if loop is None or self._reader_loop is loop:
+            return
+        self._stop_reading()
+
+        try:
+            fd = (self._input or sys.stdin).fileno()
+            loop.add_reader(fd, self._on_readable, fd)
+        except (NotImplementedError, OSError, ValueError) as e:
+            # No readiness notifications for this input (e.g. Windows proactor
+            # loop or a regular file): dispatch lines from a thread instead
+            logger.debug("Falling back to a reader thread: %s", e)
+            self._start_reader_thread()
+            return
+
+        self._reader_loop = loop
+        self._reader_fd = fd
+
+    def _stop_reading(self) -> None:
+        """Stop watching the input so no read is left waiting."""
+        self._leave_key_mode()
+        loop, fd = self._reader_loop, self._reader_fd
+        self._reader_loop = None
+        self._reader_fd = None
+        if loop is not None and fd is not None and not loop.is_closed():
+            loop.remove_reader(fd)
+
+    def _finish_reading(self) -> None:
+        """
+        Stop reading once no prompt is pending.
+
+        Right after a single-key answer, input is read a little longer: an
+        Enter pressed out of habit is then dropped as a stray empty line
+        instead of waiting in the terminal to skip the next prompt.
+        """
+        loop = self._reader_loop
+        linger = self._key_answered_at + self.KEY_ENTER_GRACE - time.monotonic()
+        if loop is None or linger <= 0:
+            self._stop_reading()
+            return
+        self._leave_key_mode()
+        loop.call_later(linger, self._stop_reading_if_idle)
+
+    def _stop_reading_if_idle(self) -> None:
+        """Stop reading unless a new prompt is waiting for input."""
+        if not self._pending:
+            self._stop_reading()
+
+    def _on_readable(self, fd: int) -> None:
+        """Read the available input and dispatch complete lines."""
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.error("Error reading input: %s", e)
+            data = b""
+
+        if not data:
+            self._stop_reading()
+            text = self._partial + self._decoder.decode(b"", final=True)
+            self._partial = ""
+            if text:
+                self.handle_line(text)
+            self._on_eof()
+            return
+
+        text = self._partial + self._decoder.decode(data)
+        if self._key_attrs is not None:
+            self._partial = ""
+            text = self._handle_keys(text)
+        *lines, self._partial = text.split("\n")
+        for line in lines:
+            self.handle_line(line)
+
+    def _key_prompt(self) -> PendingPrompt | None:
+        """The prompt to answer with single keys, if the input allows it."""
+        if not self._settings.input_single_key or self._reader_fd is None:
+            return None
+        if len(self._pending) != 1:
+            return None
+        prompt = next(iter(self._pending.values()))
+        if not prompt.choices or len(prompt.choices) > self.MAX_KEY_CHOICES:
+            return None
+        return prompt
+
+    def _update_key_mode(self) -> None:
+        """Switch the terminal in or out of single-key mode as prompts change."""
+        if self._key_prompt() is None:
+            self._leave_key_mode()
+        elif self._key_attrs is None:
+            self._enter_key_mode()
+
+    def _enter_key_mode(self) -> None:
+        """Put the input terminal into cbreak mode, keeping its old settings."""
+        fd = self._reader_fd
+        if fd is None or is_windows() or not os.isatty(fd):
+            return
+        import termios
+        import tty
+
+        try:
+            attrs = termios.tcgetattr(fd)
+            tty.setcbreak(fd, termios.TCSANOW)
+        except termios.error as e:
+            logger.debug("Cannot switch the terminal to single-key mode: %s", e)
+            return
+        self._key_attrs, self._key_fd = attrs, fd
+        if not self._key_restore_registered:
+            # Never leave the user's shell in cbreak mode
+            atexit.register(self._leave_key_mode)
+            self._key_restore_registered = True
+
+    def _leave_key_mode(self) -> None:
+        """Restore the terminal settings saved by ``_enter_key_mode``."""
+        attrs, fd = self._key_attrs, self._key_fd
+        self._key_attrs = self._key_fd = None
+        if attrs is None or fd is None:
+            return
+        import termios
+
+        try:
+            termios.tcsetattr(fd, termios.TCSANOW, attrs)
+        except termios.error as e:
+            logger.debug("Cannot restore the terminal settings: %s", e)
+
+    def _handle_keys(self, text: str) -> str:
+        """
+        Answer the single-key prompt from keys read in cbreak mode.
+
+        A digit picks that choice and Enter skips the prompt; other keys are
+        ignored. Once the prompt is answered the terminal is back in line
+        mode, and the rest of the text is returned for line handling.
+        """
+        for index, key in enumerate(text):
+            prompt = self._key_prompt()
+            if prompt is None or self._key_attrs is None or prompt.choices is None:
+                return text[index:]
+            if key in "\r\n":
+                self._write("\n")
+                self._resolve(prompt, "")
+            elif key in "123456789" and int(key) <= len(prompt.choices):
+                self._write(f"{key}) {prompt.choices[int(key) - 1]}\n")
+                self._key_answered_at = time.monotonic()
+                self._resolve(prompt, key)
+        return ""
+
+    def _start_reader_thread(self) -> None:
+        """Start the fallback stdin reader thread."""
+        self._reader = threading.Thread(
+            target=self._read_lines, name="console-reader", daemon=True
+        )
+        self._reader.start()
+
+    def _read_lines(self) -> None:
+        """Read lines from the input stream and dispatch them to the loop."""
+        stream = self._input or sys.stdin
+        while True:
+            try:
+                line = stream.readline()
+            except Exception as e:
+                logger.error("Error reading input: %s", e)
+                line = ""
+
+            if not line:
+                self._call_in_loop(self._on_eof)
+                return
+            self._call_in_loop(self.handle_line, line)
+
+    def _call_in_loop(self, callback: Callable[..., object], *args: str) -> None:
+        """Schedule a callback on the loop that owns the pending prompts."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        # The loop may close between the check and the call
+        with contextlib.suppress(RuntimeError):
+            loop.call_soon_threadsafe(callback, *args)
+
+    def _on_eof(self) -> None:
+        """Release every pending prompt once stdin is closed."""
+        logger.info("Console input closed")
+        self._eof = True
+        for prompt in list(self._pending.values()):
+            self._resolve(prompt, "")
@@ -0,0 +1,223 @@
+"""App-scoped container holding the long-lived service instances."""
+
+import logging
+import os
+from pathlib import Path
+
+from copilot_interactive.config.settings import Settings
+from copilot_interactive.services.answer_memory import AnswerMemory
+from copilot_interactive.services.assistant_service import AssistantService
+from copilot_interactive.services.console_broker import RemoteConsoleService
+from copilot_interactive.services.console_service import ConsoleService
+from copilot_interactive.services.input_service import InputService
+from copilot_interactive.services.job_service import JobService
+from copilot_interactive.services.metrics import Metrics
+from copilot_interactive.services.notification_service import NotificationService
+from copilot_interactive.services.transcript import TranscriptLog
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """Holds the services shared by every request for the app's lifetime."""
+
+    def __init__(
+        self,
+        settings: Settings,
+        notification_service: NotificationService,
+        assistant_service: AssistantService,
+        console_service: ConsoleService | RemoteConsoleService,
+        input_service: InputService,
+        job_service: JobService,
+        metrics: Metrics,
+        answer_memory: AnswerMemory | None = None,
+        transcript: TranscriptLog | None = None,
+    ) -> None:
+        """Initialize the container with already constructed services."""
+        self.settings = settings
+        self.notification_service = notification_service
+        self.assistant_service = assistant_service
+        self.console_service = console_service
+        self.input_service = input_service
+        self.job_service = job_service
+        self.metrics = metrics
+        self.answer_memory = answer_memory
+        self.transcript = transcript
+
+    @classmethod
+    def create(cls, settings: Settings) -> "ServiceContainer":
+        """
+        Build the services for the given settings.
+
+        Args:
+            settings: Application settings.
+
+        Returns:
+            A container wired with fresh service instances.
+        """
+        metrics = Metrics()
+        notification_service = NotificationService(settings, metrics=metrics)
+        assistant_service = AssistantService(settings, metrics=metrics)
+        console_service: ConsoleService | RemoteConsoleService
+        if settings.console_broker_path:
+            # A worker process: the console is owned by the broker
+            console_service = RemoteConsoleService(
+                settings, Path(settings.console_broker_path), metrics=metrics
+            )
+        else:
+            console_service = ConsoleService(settings, metrics=metrics)
+        answer_memory = None
+        if settings.answer_memory_path:
+            answer_memory = AnswerMemory(
+                Path(settings.answer_memory_path).expanduser(),
+                settings.answer_memory_min_similarity,
+            )
+        transcript = None
+        if settings.transcript_path:
+            path = Path(settings.transcript_path).expanduser()
+            if settings.console_broker_path:
+                # Workers can't share a file they each rotate: one per process
+                path = path.with_name(f"{path.stem}.{os.getpid()}{path.suffix}")
+            transcript = TranscriptLog(
+                path,
+                settings.transcript_max_bytes,
+                settings.transcript_backup_count,
+                compress=settings.transcript_compress,
+                fsync_interval=settings.transcript_fsync_interval,
+                queue_size=settings.transcript_queue_size,
+            )
+        input_service = InputService(
+            settings,
+            notification_service,
+            assistant_service,
+            console_service,
+            metrics=metrics,
+            memory=answer_memory,
+            transcript=transcript,
+        )
+        container = cls(
+            settings,
+            notification_service,
+            assistant_service,
+            console_service,
+            input_service,
+            JobService(settings, input_service),
+            metrics,
+            answer_memory,
+            transcript,
+        )
+        container._register_service_metrics()
+        return container
+
+    def _register_service_metrics(self) -> None:
+        """Expose the services' own state and counters as metrics."""
+        metrics = self.metrics
+        console = self.console_service
+        metrics.gauge(
+            "pending_prompts",
+            "Prompts waiting for an answer on the terminal.",
+            lambda: len(console.pending_prompts),
+        )
+
+        notifications = self.notification_service.stats
+        metrics.counter(
+            "notifications_dispatched_total",
+            "Notifications started in the background.",
+            lambda: notifications.dispatched,
+        )
+        metrics.counter(
+            "notification_timeouts_total",
+            "Notifiers killed for exceeding the timeout.",
+            lambda: notifications.timed_out,
+        )
+
+        prefetch = self.input_service.prefetch_stats
+        metrics.counter(
+            "assistant_prefetch_started_total",
+            "Speculative assistant requests started.",
+            lambda: prefetch.started,
+        )
+        metrics.counter(
+            "assistant_prefetch_used_total",
+            "Speculative assistant requests whose answer was used.",
+            lambda: prefetch.used,
+        )
+        metrics.counter(
+            "assistant_prefetch_discarded_total",
+            "Speculative assistant requests thrown away unused.",
+            lambda: prefetch.discarded,
+        )
+
+        breaker = self.assistant_service.breaker
+        if breaker is not None:
+            metrics.gauge(
+                "assistant_circuit_open",
+                "1 while the assistant circuit breaker is open.",
+                lambda: 1 if breaker.is_open else 0,
+            )
+            metrics.counter(
+                "assistant_circuit_opens_total",
+                "Times the assistant circuit breaker opened.",
+                lambda: breaker.opens,
+            )
+
+        cache = self.assistant_service.cache_stats
+        if cache is not None:
+            metrics.counter(
+                "assistant_cache_hits_total",
+                "Suggestions served from the cache.",
+                lambda: cache.hits,
+            )
+            metrics.counter(
+                "assistant_cache_misses_total",
+                "Suggestions fetched from the assistant.",
+                lambda: cache.misses,
+            )
+
+        if self.transcript is not None:
+            transcript = self.transcript.stats
+            metrics.counter(
+                "transcript_records_written_total",
+                "Records appended to the transcript.",
+                lambda: transcript.written,
+            )
+            metrics.counter(
+                "transcript_records_dropped_total",
+                "Records dropped because the transcript queue was full.",
+                lambda: transcript.dropped,
+            )
+            metrics.counter(
+                "transcript_write_failures_total",
+                "Records lost because writing the transcript failed.",
+                lambda: transcript.failed,
+            )
+
+    async def aclose(self) -> None:
+        """Release resources held by the services."""
+        if self.transcript is not None:
+            try:
+                await self.transcript.aclose()
+            except Exception as e:
+                logger.warning("Failed to close transcript: %s", e)
+        try:
+            await self.job_service.aclose()
+        except Exception as e:
+            logger.warning("Failed to close job service: %s", e)
+        try:
+            await self.notification_service.aclose()
+        except Exception as e:
+            logger.warning("Failed to close notification service: %s", e)
+        try:
+            await self.assistant_service.aclose()
+        except Exception as e:
+            logger.warning("Failed to close assistant service: %s", e)
+        if isinstance(self.console_service, RemoteConsoleService):
+            try:
+                await self.console_service.aclose()
+            except Exception as e:
+                logger.warning("Failed to close console broker connection: %s", e)
+        if self.answer_memory is not None:
+            try:
+                self.answer_memory.close()
+            except Exception as e:
+                logger.warning("Failed to close answer memory: %s", e)
@@ -2,116 +2,580 @@
 
 import asyncio
 import logging
-import sys
-from concurrent.futures import ThreadPoolExecutor
+import time
+import uuid
+from contextvars import Token
+from typing import TYPE_CHECKING
 
 from copilot_interactive.config.settings import Settings
 from copilot_interactive.models.responses import UserInputResponse
+from copilot_interactive.services.answer_memory import AnswerMemory, MemoryMatch
 from copilot_interactive.services.assistant_service import AssistantService
+from copilot_interactive.services.console_broker import RemoteConsoleService
+from copilot_interactive.services.console_service import ConsoleService
+from copilot_interactive.services.metrics import Metrics
 from copilot_interactive.services.notification_service import NotificationService
+from copilot_interactive.services.transcript import TranscriptLog
+from copilot_interactive.utils.text import match_choice, normalize_context
+from copilot_interactive.utils.timing import RequestTiming, current_timing, span
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
 
 logger = logging.getLogger(__name__)
 
-# Thread pool for blocking input operations
-_input_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="input")
+
+class PrefetchStats:
+    """Counters describing how speculative assistant prefetches were used."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.started = 0
+        self.used = 0
+        self.discarded = 0
+
+
+class SharedInput:
+    """An input request shared by concurrent callers with the same context."""
+
+    def __init__(
+        self, task: asyncio.Task[UserInputResponse], deadline: float | None = None
+    ) -> None:
+        """Initialize with the task collecting the input and its deadline."""
+        self.task = task
+        self.deadline = deadline
+        self.waiters = 0
 
 
 class InputService:
-    """Service for collecting user input from the terminal."""
+    """
+    Service for collecting user input from the terminal.
+
+    A request may carry a deadline (Unix time). The terminal wait then ends
+    early enough for the assistant fallback to get its share of the time
+    left, and the fallback is cut off at the deadline.
+    """
+
+    # Seconds kept free before a deadline for sending the response
+    DEADLINE_MARGIN = 0.05
 
     def __init__(
         self,
         settings: Settings,
         notification_service: NotificationService,
         assistant_service: AssistantService,
+        console_service: ConsoleService | RemoteConsoleService | None = None,
+        metrics: Metrics | None = None,
+        memory: AnswerMemory | None = None,
+        transcript: TranscriptLog | None = None,
     ) -> None:
         """Initialize the input service."""
         self._settings = settings
+        self._memory = memory
+        self._transcript = transcript
+        self._metrics = metrics or Metrics()
         self._notification_service = notification_service
         self._assistant_service = assistant_service
+        self._console_service = console_service or ConsoleService(settings)
+        self._prefetch_stats = PrefetchStats()
+        self._shared: dict[str, SharedInput] = {}
+
+    @property
+    def prefetch_stats(self) -> PrefetchStats:
+        """Counters for speculative assistant prefetches."""
+        return self._prefetch_stats
 
-    async def get_user_input(self, context: str = "") -> UserInputResponse:
+    async def get_user_input(
+        self,
+        context: str = "",
+        choices: list[str] | None = None,
+        default_choice: str | None = None,
+        deadline: float | None = None,
+    ) -> UserInputResponse:
         """
         Get user input, with fallback to assistant if timeout.
 
+        With ``choices`` the answer is always one of them, whichever step
+        provides it. An unanswered prompt with a ``default_choice`` returns
+        the default at once, without asking the assistant.
+
         Args:
             context: The context/reason for requesting input.
+            choices: Allowed answers, shown as a numbered menu.
+            default_choice: Choice used when the user doesn't answer.
+            deadline: Unix time by which the caller needs the answer.
 
         Returns:
             UserInputResponse with the input and its source.
         """
-        # Send notification
-        await self._notification_service.send_input_request_notification(context)
+        start = time.perf_counter()
+        timing, token = self._start_timing()
+        try:
+            if self._settings.input_coalescing and context:
+                response = await self._collect_shared_input(
+                    context, choices, default_choice, deadline
+                )
+            else:
+                response = await self._collect_input(
+                    context, choices, default_choice, deadline
+                )
+        finally:
+            if token is not None:
+                RequestTiming.deactivate(token)
+        elapsed = time.perf_counter() - start
+        self._metrics.input_seconds.observe(elapsed, response.source)
+        self._transcribe(context, response, elapsed, timing)
+        return response
+
+    async def _collect_shared_input(
+        self,
+        context: str,
+        choices: list[str] | None = None,
+        default_choice: str | None = None,
+        deadline: float | None = None,
+    ) -> UserInputResponse:
+        """
+        Collect input once for all concurrent requests with the same context.
+
+        The first request starts the usual flow; identical requests arriving
+        while it is pending attach to it and receive the same response, so
+        the prompt, notification and assistant fallback happen only once.
+        The shared flow is cancelled only when every waiter has gone away.
+        Requests only match when their choices and default match as well,
+        and only join a flow that ends by their own deadline; otherwise
+        they are asked on their own.
+        """
+        key = normalize_context(context)
+        if choices:
+            key = "\x1f".join([key, *choices, default_choice or ""])
+        shared = self._shared.get(key)
+        if (
+            shared is not None
+            and deadline is not None
+            and (shared.deadline is None or shared.deadline > deadline)
+        ):
+            return await self._collect_input(context, choices, default_choice, deadline)
+        if shared is None:
+            task = asyncio.create_task(
+                self._collect_input(context, choices, default_choice, deadline),
+                name="shared-input",
+            )
+            shared = SharedInput(task, deadline)
+            self._shared[key] = shared
+            task.add_done_callback(lambda _t: self._forget_shared(key, shared))
+        else:
+            self._metrics.input_coalesced.inc()
+            logger.debug("Joining pending prompt for identical context")
+
+        shared.waiters += 1
+        try:
+            return await asyncio.shield(shared.task)
+        except asyncio.CancelledError:
+            if shared.waiters == 1:
+                shared.task.cancel()
+            raise
+        finally:
+            shared.waiters -= 1
+
+    def _forget_shared(self, key: str, shared: SharedInput) -> None:
+        """Remove a finished shared request from the registry."""
+        if self._shared.get(key) is shared:
+            del self._shared[key]
+
+    async def _collect_input(
+        self,
+        context: str,
+        choices: list[str] | None = None,
+        default_choice: str | None = None,
+        deadline: float | None = None,
+    ) -> UserInputResponse:
+        """Run the notify, terminal, assistant and default steps in order."""
+        remembered = self._recall(context, choices)
+        if remembered is not None and self._settings.answer_memory_policy == "auto":
+            logger.info("Answered from memory (similarity %.2f)", remembered.similarity)
+            return UserInputResponse(input=remembered.answer, source="memory")
+
+        # Notify in the background so the terminal wait starts immediately
+        notification = self._notification_service.dispatch_input_request_notification(
+            context
+        )
+
+        # Optionally ask the assistant while we wait for the user; never
+        # needed when a default choice or a remembered answer answers an
+        # unanswered prompt
+        prefetch = (
+            None
+            if default_choice or remembered is not None
+            else self._start_prefetch(context, choices)
+        )
+        try:
+            # Try to get user input from terminal
+            fallback = bool(context) and not default_choice and remembered is None
+            with span("terminal_wait"):
+                user_input, success = await self._read_terminal_input(
+                    context,
+                    default_choice or (remembered.answer if remembered else None),
+                    choices,
+                    self._terminal_timeout(deadline, fallback),
+                )
+
+            if success and user_input:
+                self._discard_prefetch(prefetch)
+                self._remember(context, user_input)
+                return UserInputResponse(input=user_input, source="user")
+
+            # The caller's default is the answer it expects without a human
+            if default_choice:
+                return UserInputResponse(input=default_choice, source="default")
+
+            # Fall back to the remembered answer shown with the prompt
+            if remembered is not None:
+                self._discard_prefetch(prefetch)
+                return UserInputResponse(input=remembered.answer, source="memory")
+
+            # User didn't respond - try assistant if we have context
+            return await self._fall_back(context, prefetch, choices, deadline)
+        except asyncio.CancelledError:
+            # The caller is gone: don't keep notifying about the question
+            if notification is not None:
+                notification.cancel()
+            raise
+        finally:
+            if prefetch is not None and not prefetch.done():
+                prefetch.cancel()
+
+    async def get_user_inputs(
+        self, contexts: list[str], deadline: float | None = None
+    ) -> list[UserInputResponse]:
+        """
+        Get answers to several questions through one console form.
+
+        The questions share one notification and one terminal wait. Each
+        unanswered question falls back to its remembered answer or the
+        assistant on its own; the assistant requests run concurrently.
+        Batches are not coalesced with other requests.
+
+        Args:
+            contexts: The questions, in the order they are asked.
+            deadline: Unix time by which the caller needs the answers.
+
+        Returns:
+            One UserInputResponse per question, in the same order.
+        """
+        start = time.perf_counter()
+        timing, token = self._start_timing()
+        try:
+            responses = await self._collect_inputs(contexts, deadline)
+        finally:
+            if token is not None:
+                RequestTiming.deactivate(token)
+        elapsed = time.perf_counter() - start
+        for context, response in zip(contexts, responses, strict=True):
+            self._metrics.input_seconds.observe(elapsed, response.source)
+            self._transcribe(context, response, elapsed, timing)
+        return responses
+
+    def _start_timing(
+        self,
+    ) -> tuple[RequestTiming | None, Token[RequestTiming | None] | None]:
+        """
+        The request's timing, started here if only the transcript needs it.
+
+        With the timing middleware the request already has a timing and its
+        ID. Otherwise, when a transcript is kept, a timing with a fresh ID is
+        activated for the duration of the flow so its spans are recorded.
+
+        Returns:
+            The timing, if any, and the token to deactivate it with if it
+            was started here.
+        """
+        timing = current_timing()
+        if timing is not None or self._transcript is None:
+            return timing, None
+        timing = RequestTiming(uuid.uuid4().hex)
+        return timing, timing.activate()
+
+    def _transcribe(
+        self,
+        context: str,
+        response: UserInputResponse,
+        seconds: float,
+        timing: RequestTiming | None,
+    ) -> None:
+        """Queue the answered prompt for the transcript, if one is kept."""
+        if self._transcript is None:
+            return
+        self._transcript.record(
+            {
+                "time": round(time.time(), 3),
+                "request_id": timing.request_id if timing else None,
+                "context": context,
+                "answer": response.input,
+                "source": response.source,
+                "duration_ms": round(seconds * 1000, 3),
+                "spans": [
+                    {
+                        "name": s.name,
+                        "start_ms": round(s.start * 1000, 3),
+                        "duration_ms": round(s.duration * 1000, 3),
+                    }
+                    for s in (timing.spans if timing else [])
+                ],
+            }
+        )
 
-        # Try to get user input from terminal
-        user_input, success = await self._read_terminal_input()
+    async def _collect_inputs(
+        self, contexts: list[str], deadline: float | None = None
+    ) -> list[UserInputResponse]:
+        """Run the form flow: notify once, one terminal wait, fall back each."""
+        remembered = [self._recall(context) for context in contexts]
+        responses: list[UserInputResponse | None] = [None] * len(contexts)
+        if self._settings.answer_memory_policy == "auto":
+            for i, match in enumerate(remembered):
+                if match is not None:
+                    responses[i] = UserInputResponse(
+                        input=match.answer, source="memory"
+                    )
+        asked = [i for i, response in enumerate(responses) if response is None]
+        if not asked:
+            logger.info("Answered all %d questions from memory", len(contexts))
+            return [r for r in responses if r is not None]
 
-        if success and user_input:
-            return UserInputResponse(input=user_input, source="user")
+        questions = [contexts[i] for i in asked]
+        notification = self._notification_service.dispatch_input_request_notification(
+            f"{len(questions)} questions: " + " | ".join(questions)
+        )
+        # Questions with a remembered answer never reach the assistant
+        prefetches = [
+            None if remembered[i] is not None else self._start_prefetch(contexts[i])
+            for i in asked
+        ]
+        try:
+            with span("terminal_wait"):
+                answers = await self._read_terminal_form(
+                    questions,
+                    [m.answer if (m := remembered[i]) else None for i in asked],
+                    self._terminal_timeout(
+                        deadline, any(remembered[i] is None for i in asked)
+                    ),
+                )
+
+            fallbacks = {}
+            for i, context, answer, prefetch in zip(
+                asked, questions, answers, prefetches, strict=True
+            ):
+                match = remembered[i]
+                if answer:
+                    self._discard_prefetch(prefetch)
+                    self._remember(context, answer)
+                    responses[i] = UserInputResponse(input=answer, source="user")
+                elif match is not None:
+                    self._discard_prefetch(prefetch)
+                    responses[i] = UserInputResponse(
+                        input=match.answer, source="memory"
+                    )
+                else:
+                    fallbacks[i] = self._fall_back(context, prefetch, deadline=deadline)
+
+            # Unanswered questions are handed to the assistant all at once
+            for i, response in zip(
+                fallbacks, await asyncio.gather(*fallbacks.values()), strict=True
+            ):
+                responses[i] = response
+        except asyncio.CancelledError:
+            if notification is not None:
+                notification.cancel()
+            raise
+        finally:
+            for prefetch in prefetches:
+                if prefetch is not None and not prefetch.done():
+                    prefetch.cancel()
 
-        # User didn't respond - try assistant if we have context
+        return [r for r in responses if r is not None]
+
+    async def _fall_back(
+        self,
+        context: str,
+        prefetch: asyncio.Task[str | None] | None,
+        choices: list[str] | None = None,
+        deadline: float | None = None,
+    ) -> UserInputResponse:
+        """Answer an unanswered prompt with the assistant or the default."""
         if context:
-            suggestion = await self._assistant_service.get_suggested_input(context)
+            with span("assistant"):
+                suggestion = await self._get_suggestion(
+                    context, prefetch, choices, deadline
+                )
             if suggestion:
                 return UserInputResponse(input=suggestion, source="assistant")
 
         # No response available
         return UserInputResponse(input="no response provided", source="default")
 
-    async def _read_terminal_input(self) -> tuple[str, bool]:
+    def _recall(
+        self, context: str, choices: list[str] | None = None
+    ) -> MemoryMatch | None:
+        """
+        Look up a remembered answer for the context, if memory is enabled.
+
+        With choices, a remembered answer that is not one of them is ignored.
+        """
+        if self._memory is None or not context:
+            return None
+        try:
+            with span("memory"):
+                match = self._memory.lookup(context)
+        except Exception as e:
+            logger.error("Failed to look up answer memory: %s", e)
+            return None
+        if match is not None and choices:
+            choice = match_choice(match.answer, choices)
+            if choice is None:
+                return None
+            match.answer = choice
+        return match
+
+    def _remember(self, context: str, answer: str) -> None:
+        """Record a human answer, if memory is enabled."""
+        if self._memory is None or not context:
+            return
+        try:
+            self._memory.record(context, answer)
+        except Exception as e:
+            logger.error("Failed to record answer memory: %s", e)
+
+    def _start_prefetch(
+        self, context: str, choices: list[str] | None = None
+    ) -> asyncio.Task[str | None] | None:
+        """Start a speculative assistant request if prefetching is enabled."""
+        if not self._settings.assistant_prefetch or not context:
+            return None
+        self._prefetch_stats.started += 1
+        return asyncio.create_task(
+            self._assistant_service.get_suggested_input(context, choices),
+            name="assistant-prefetch",
+        )
+
+    def _discard_prefetch(self, prefetch: asyncio.Task[str | None] | None) -> None:
+        """Throw away a prefetch that is no longer needed."""
+        if prefetch is None:
+            return
+        self._prefetch_stats.discarded += 1
+        prefetch.cancel()
+
+    async def _get_suggestion(
+        self,
+        context: str,
+        prefetch: asyncio.Task[str | None] | None,
+        choices: list[str] | None = None,
+        deadline: float | None = None,
+    ) -> str | None:
+        """
+        Get the assistant's suggestion, reusing the prefetch if there is one.
+
+        With a deadline, the suggestion is given up on once it is reached.
+        """
+        suggestion: Awaitable[str | None]
+        if prefetch is None:
+            suggestion = self._assistant_service.get_suggested_input(context, choices)
+        else:
+            self._prefetch_stats.used += 1
+            suggestion = prefetch
+        if deadline is None:
+            return await suggestion
+
+        budget = deadline - time.time() - self.DEADLINE_MARGIN
+        try:
+            return await asyncio.wait_for(suggestion, max(0.0, budget))
+        except TimeoutError:
+            logger.info("Assistant fallback cut off by the request deadline")
+            return None
+
+    def _terminal_timeout(self, deadline: float | None, fallback: bool) -> float:
+        """
+        Seconds to wait for an answer on the terminal.
+
+        Without a deadline this is ``input_timeout``. With one, the wait
+        ends in time to leave the assistant fallback, if one may be needed,
+        up to ``assistant_timeout`` but at most half of the time left.
+
+        Args:
+            deadline: Unix time by which the caller needs the answer.
+            fallback: Whether an unanswered prompt goes to the assistant.
+
+        Returns:
+            The timeout, 0 if no time is left for the terminal.
+        """
+        timeout = self._settings.input_timeout
+        if deadline is None:
+            return timeout
+        remaining = deadline - time.time() - self.DEADLINE_MARGIN
+        reserve = (
+            min(self._settings.assistant_timeout, remaining / 2) if fallback else 0
+        )
+        return max(0.0, min(timeout, remaining - reserve))
+
+    async def _read_terminal_input(
+        self,
+        context: str,
+        suggestion: str | None = None,
+        choices: list[str] | None = None,
+        timeout: float | None = None,
+    ) -> tuple[str, bool]:
         """
         Read input from the terminal with timeout.
 
+        The prompt is registered with the console service, which multiplexes
+        concurrent prompts and routes each answer to its request.
+
+        Args:
+            context: The context/reason for requesting input.
+            suggestion: Default or remembered answer shown with the prompt.
+            choices: Allowed answers, shown as a numbered menu.
+            timeout: Seconds to wait; defaults to ``input_timeout``.
+
         Returns:
             Tuple of (input_text, success).
         """
+        if timeout is None:
+            timeout = self._settings.input_timeout
+        if timeout <= 0:
+            return ("", False)
         try:
-            return await self._read_terminal_input_blocking()
+            answer = await self._console_service.ask(
+                context, timeout, suggestion, choices
+            )
         except Exception as e:
             logger.error("Failed to read terminal input: %s", e)
             return ("", False)
 
-    async def _read_terminal_input_blocking(self) -> tuple[str, bool]:
-        """
-        Read terminal input using blocking I/O in a thread pool.
+        if answer:
+            return (answer, True)
+        return ("", False)
 
-        This reads directly from the terminal where the server is running,
-        allowing the user to type their response.
+    async def _read_terminal_form(
+        self,
+        contexts: list[str],
+        suggestions: list[str | None],
+        timeout: float | None = None,
+    ) -> list[str | None]:
         """
-        loop = asyncio.get_event_loop()
-        timeout = self._settings.input_timeout
+        Show the questions as one console form and wait for the answers.
 
-        def blocking_input() -> str:
-            """Blocking function to read input from stdin."""
-            try:
-                # Print prompt to stderr so it shows even if stdout is captured
-                print(
-                    "\n>>> Please enter your input and press Enter: ",
-                    end="",
-                    flush=True,
-                )
-                # Read from stdin
-                line = sys.stdin.readline()
-                return line.strip() if line else ""
-            except EOFError:
-                return ""
-            except Exception as e:
-                logger.error("Error reading input: %s", e)
-                return ""
+        Args:
+            contexts: The questions.
+            suggestions: Remembered answer shown with each question.
+            timeout: Seconds to wait; defaults to ``input_timeout``.
 
+        Returns:
+            One answer per question, None where there is none.
+        """
+        if timeout is None:
+            timeout = self._settings.input_timeout
+        if timeout <= 0:
+            return [None] * len(contexts)
         try:
-            # Run the blocking input in a thread pool with timeout
-            result = await asyncio.wait_for(
-                loop.run_in_executor(_input_executor, blocking_input),
-                timeout=timeout,
-            )
-            if result:
-                return (result, True)
-            return ("", False)
-        except TimeoutError:
-            logger.info("Input timed out after %d seconds", timeout)
-            print("\n[Input timed out]", flush=True)
-            return ("", False)
+            return await self._console_service.ask_form(contexts, timeout, suggestions)
         except Exception as e:
             logger.error("Failed to read terminal input: %s", e)
-            return ("", False)
+            return [None] * len(contexts)
@@ -0,0 +1,118 @@
+"""Service running input requests as jobs that clients can poll."""
+
+import asyncio
+import logging
+import time
+import uuid
+
+from copilot_interactive.config.settings import Settings
+from copilot_interactive.models.responses import UserInputResponse
+from copilot_interactive.services.input_service import InputService
+
+logger = logging.getLogger(__name__)
+
+
+class InputJob:
+    """An input request running in the background."""
+
+    def __init__(self, job_id: str, context: str) -> None:
+        """Initialize the job; the task is attached by JobService."""
+        self.id = job_id
+        self.context = context
+        self.created_at = time.monotonic()
+        self.finished_at: float | None = None
+        self.task: asyncio.Task[UserInputResponse] | None = None
+
+    @property
+    def result(self) -> UserInputResponse | None:
+        """The response, once the job has finished."""
+        if self.task is None or not self.task.done() or self.task.cancelled():
+            return None
+        return self.task.result()
+
+    @property
+    def status(self) -> str:
+        """'pending' while waiting, otherwise the source of the response."""
+        result = self.result
+        return result.source if result is not None else "pending"
+
+
+class JobService:
+    """
+    Service decoupling input requests from the HTTP connection.
+
+    A job runs the regular InputService flow in the background, so a client
+    whose connection drops can reconnect and fetch the answer instead of
+    asking again. Finished jobs are kept for ``job_retention`` seconds.
+    """
+
+    def __init__(self, settings: Settings, input_service: InputService) -> None:
+        """Initialize the job service."""
+        self._settings = settings
+        self._input_service = input_service
+        self._jobs: dict[str, InputJob] = {}
+
+    @property
+    def max_wait(self) -> float:
+        """Longest a client may long-poll for a job."""
+        return self._settings.job_max_wait
+
+    def submit(self, context: str) -> InputJob:
+        """
+        Start an input request in the background.
+
+        Args:
+            context: The context/reason for requesting input.
+
+        Returns:
+            The new job.
+        """
+        self._purge_expired()
+        job = InputJob(uuid.uuid4().hex, context)
+        job.task = asyncio.create_task(self._run(job), name=f"input-job-{job.id}")
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> InputJob | None:
+        """Look up a job by ID."""
+        self._purge_expired()
+        return self._jobs.get(job_id)
+
+    async def wait(self, job: InputJob, timeout: float) -> None:
+        """
+        Wait until the job finishes or the timeout expires.
+
+        The job keeps running if the waiter gives up or is cancelled.
+        """
+        if job.task is None or job.task.done() or timeout <= 0:
+            return
+        await asyncio.wait({job.task}, timeout=timeout)
+
+    async def aclose(self) -> None:
+        """Cancel jobs that are still running."""
+        tasks = [job.task for job in self._jobs.values() if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._jobs.clear()
+
+    async def _run(self, job: InputJob) -> UserInputResponse:
+        """Run the input flow for a job."""
+        try:
+            return await self._input_service.get_user_input(job.context)
+        except Exception as e:
+            logger.error("Input job %s failed: %s", job.id, e)
+            return UserInputResponse(input="no response provided", source="default")
+        finally:
+            job.finished_at = time.monotonic()
+
+    def _purge_expired(self) -> None:
+        """Forget finished jobs older than the retention period."""
+        cutoff = time.monotonic() - self._settings.job_retention
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
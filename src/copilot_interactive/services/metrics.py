@@ -0,0 +1,279 @@
+"""In-process metrics rendered in the Prometheus text exposition format."""
+
+import bisect
+import math
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator, Sequence
+
+PREFIX = "copilot_interactive_"
+
+# Sample produced by a metric: (name suffix, label pairs, value)
+Sample = tuple[str, tuple[tuple[str, str], ...], float]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value for the text format."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Metric(ABC):
+    """
+    Base class for a named metric family.
+
+    Recording only touches plain Python objects from the event loop thread,
+    so no locks are taken on the request path; the cost of formatting is
+    paid when the metrics are scraped.
+    """
+
+    kind = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        """
+        Initialize the metric.
+
+        Args:
+            name: Metric name, including the application prefix.
+            documentation: Help text shown with the metric.
+            labelnames: Names of the labels, in the order values are passed.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterator[Sample]:
+        """Yield the current samples of the metric."""
+
+    def render(self) -> list[str]:
+        """Render the metric family as text format lines."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for suffix, labels, value in self.samples():
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            name = self.name + suffix
+            if label_text:
+                name += "{" + label_text + "}"
+            lines.append(f"{name} {_format_value(value)}")
+        return lines
+
+    def _labels(self, values: tuple[str, ...]) -> tuple[tuple[str, str], ...]:
+        """Pair label values with their names."""
+        return tuple(zip(self.labelnames, values, strict=True))
+
+
+class Counter(Metric):
+    """A monotonically increasing count, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        """Initialize the counter; an unlabelled counter starts at zero."""
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        if not self.labelnames:
+            self._values[()] = 0
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """
+        Increase the counter.
+
+        Args:
+            labels: Label values, one per label name.
+            amount: How much to add.
+        """
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        """Current value for the given label values."""
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterator[Sample]:
+        """Yield one sample per label combination."""
+        for labels, value in sorted(self._values.items()):
+            yield ("", self._labels(labels), value)
+
+
+class Histogram(Metric):
+    """Observations counted into fixed buckets, optionally split by labels."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float],
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        """
+        Initialize the histogram.
+
+        Args:
+            name: Metric name, including the application prefix.
+            documentation: Help text shown with the metric.
+            buckets: Upper bounds of the buckets, in increasing order.
+            labelnames: Names of the labels, in the order values are passed.
+        """
+        super().__init__(name, documentation, labelnames)
+        self._buckets = tuple(sorted(buckets))
+        # Per label values: [count per bucket..., count above the last bucket]
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value: The observed value (e.g. seconds).
+            labels: Label values, one per label name.
+        """
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self._buckets) + 1)
+            self._sums[labels] = 0.0
+        counts[bisect.bisect_left(self._buckets, value)] += 1
+        self._sums[labels] += value
+
+    def count(self, *labels: str) -> int:
+        """Number of observations for the given label values."""
+        return sum(self._counts.get(labels, ()))
+
+    def samples(self) -> Iterator[Sample]:
+        """Yield cumulative bucket, sum and count samples."""
+        for labels, counts in sorted(self._counts.items()):
+            pairs = self._labels(labels)
+            cumulative = 0
+            for bound, count in zip((*self._buckets, math.inf), counts, strict=True):
+                cumulative += count
+                yield ("_bucket", (*pairs, ("le", _format_value(bound))), cumulative)
+            yield ("_sum", pairs, self._sums[labels])
+            yield ("_count", pairs, cumulative)
+
+
+class FunctionMetric(Metric):
+    """A metric whose value is read from a callback at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], float],
+        kind: str = "gauge",
+    ) -> None:
+        """
+        Initialize the metric.
+
+        Args:
+            name: Metric name, including the application prefix.
+            documentation: Help text shown with the metric.
+            callback: Returns the current value.
+            kind: Metric type reported to the scraper ("gauge" or "counter").
+        """
+        super().__init__(name, documentation)
+        self.kind = kind
+        self._callback = callback
+
+    def samples(self) -> Iterator[Sample]:
+        """Yield the callback's current value."""
+        yield ("", (), float(self._callback()))
+
+
+class Metrics:
+    """The metrics recorded by the input pipeline."""
+
+    INPUT_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600)
+    ASSISTANT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    NOTIFICATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+    def __init__(self) -> None:
+        """Create the pipeline's counters and histograms."""
+        self.input_seconds = Histogram(
+            PREFIX + "input_request_seconds",
+            "Time to answer an input request, by response source.",
+            self.INPUT_BUCKETS,
+            labelnames=("source",),
+        )
+        self.input_coalesced = Counter(
+            PREFIX + "input_coalesced_total",
+            "Requests that joined an identical pending prompt.",
+        )
+        self.input_timeouts = Counter(
+            PREFIX + "input_timeouts_total",
+            "Prompts that timed out without an answer from the terminal.",
+        )
+        self.input_abandoned = Counter(
+            PREFIX + "input_abandoned_total",
+            "Input requests abandoned because the client disconnected.",
+        )
+        self.assistant_seconds = Histogram(
+            PREFIX + "assistant_request_seconds",
+            "Duration of calls to the local assistant.",
+            self.ASSISTANT_BUCKETS,
+        )
+        self.assistant_errors = Counter(
+            PREFIX + "assistant_errors_total",
+            "Failed calls to the local assistant, by error type.",
+            labelnames=("type",),
+        )
+        self.notification_seconds = Histogram(
+            PREFIX + "notification_seconds",
+            "Time taken to show a notification.",
+            self.NOTIFICATION_BUCKETS,
+        )
+        self.notification_failures = Counter(
+            PREFIX + "notification_failures_total",
+            "Notifications that could not be shown.",
+        )
+        self._metrics: list[Metric] = [
+            self.input_seconds,
+            self.input_coalesced,
+            self.input_timeouts,
+            self.input_abandoned,
+            self.assistant_seconds,
+            self.assistant_errors,
+            self.notification_seconds,
+            self.notification_failures,
+        ]
+
+    def register(self, metric: Metric) -> None:
+        """Add a metric to the exposition output."""
+        self._metrics.append(metric)
+
+    def gauge(
+        self, name: str, documentation: str, callback: Callable[[], float]
+    ) -> None:
+        """Register a gauge read from a callback at scrape time."""
+        self.register(FunctionMetric(PREFIX + name, documentation, callback))
+
+    def counter(
+        self, name: str, documentation: str, callback: Callable[[], float]
+    ) -> None:
+        """Register a counter read from a callback at scrape time."""
+        self.register(
+            FunctionMetric(PREFIX + name, documentation, callback, kind="counter")
+        )
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
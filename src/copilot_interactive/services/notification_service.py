@@ -2,21 +2,143 @@
 
 import asyncio
 import logging
-import shutil
+import time
+from typing import TYPE_CHECKING
 
 from copilot_interactive.config.settings import Settings
-from copilot_interactive.utils.platform import is_windows
+from copilot_interactive.services.metrics import Metrics
 from copilot_interactive.utils.text import truncate_text
+from copilot_interactive.utils.timing import span
+
+if TYPE_CHECKING:
+    from copilot_interactive.services.notifiers import NotifierBackend
 
 logger = logging.getLogger(__name__)
 
 
+class NotificationStats:
+    """Counters describing notification delivery."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.dispatched = 0
+        self.sent = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+
 class NotificationService:
     """Service for sending system notifications."""
 
-    def __init__(self, settings: Settings) -> None:
-        """Initialize the notification service."""
+    TITLE = "Input requested"
+
+    def __init__(
+        self,
+        settings: Settings,
+        backend: "NotifierBackend | None" = None,
+        metrics: Metrics | None = None,
+    ) -> None:
+        """
+        Initialize the notification service.
+
+        Args:
+            settings: Application settings.
+            backend: Notifier to use; discovered from the settings on first
+                use if omitted.
+            metrics: Metrics to record notification latency and failures in.
+        """
         self._settings = settings
+        self._metrics = metrics or Metrics()
+        self._backend = backend
+        self._discovered = backend is not None
+        self._semaphore = asyncio.Semaphore(
+            max(1, settings.notification_max_concurrency)
+        )
+        self._tasks: set[asyncio.Task[bool]] = set()
+        self._stats = NotificationStats()
+
+    @property
+    def stats(self) -> NotificationStats:
+        """Delivery, failure and latency counters."""
+        return self._stats
+
+    def dispatch_input_request_notification(
+        self, context: str | None = None
+    ) -> asyncio.Task[bool] | None:
+        """
+        Send the input request notification in the background.
+
+        The caller does not wait for the notifier; at most
+        ``notification_max_concurrency`` notifiers run at the same time.
+
+        Args:
+            context: Optional context/reason for the input request.
+
+        Returns:
+            The background task, or None if notifications are disabled or
+            no notifier is available.
+        """
+        if not self._settings.notification_enabled or self.backend is None:
+            return None
+
+        self._stats.dispatched += 1
+        task = asyncio.create_task(
+            self._send_in_background(context), name="input-notification"
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    @property
+    def backend(self) -> "NotifierBackend | None":
+        """
+        The notifier backend in use, if any.
+
+        The backend modules are imported and the platform's notifier looked
+        up on first access, keeping them out of the server's startup path.
+        """
+        if not self._discovered and self._settings.notification_enabled:
+            from copilot_interactive.services.notifiers import discover_notifier
+
+            self._backend = discover_notifier(self._settings)
+            self._discovered = True
+        return self._backend
+
+    async def aclose(self) -> None:
+        """Cancel pending notifications and stop the notifier backend."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._backend is not None:
+            await self._backend.aclose()
+
+    async def _send_in_background(self, context: str | None) -> bool:
+        """Send a notification under the concurrency limit and record it."""
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                with span("notify"):
+                    success = await self.send_input_request_notification(context)
+            except Exception as e:
+                logger.warning("Notification failed: %s", e)
+                success = False
+            elapsed = time.perf_counter() - start
+
+        self._stats.total_seconds += elapsed
+        self._stats.max_seconds = max(self._stats.max_seconds, elapsed)
+        self._metrics.notification_seconds.observe(elapsed)
+        if success:
+            self._stats.sent += 1
+        else:
+            self._stats.failed += 1
+            self._metrics.notification_failures.inc()
+        logger.debug(
+            "Notification %s in %.3f seconds", "sent" if success else "failed", elapsed
+        )
+        return success
 
     async def send_input_request_notification(self, context: str | None = None) -> bool:
         """
@@ -32,127 +154,24 @@ class NotificationService:
             logger.debug("Notifications are disabled")
             return False
 
-        if is_windows():
-            return await self._send_windows_notification(context)
-        else:
-            return await self._send_termux_notification(context)
-
-    async def _send_windows_notification(self, context: str | None = None) -> bool:
-        """Send a Windows toast notification using PowerShell."""
-        try:
-            title = "Input Requested"
-            content = self._format_notification_content(context)
-
-            # Use PowerShell to show a toast notification
-            script = f"""
-            [Windows.UI.Notifications.ToastNotificationManager, Windows.UI.Notifications, ContentType = WindowsRuntime] | Out-Null
-            [Windows.Data.Xml.Dom.XmlDocument, Windows.Data.Xml.Dom.XmlDocument, ContentType = WindowsRuntime] | Out-Null
-
-            $template = @"
-            <toast>
-                <visual>
-                    <binding template="ToastText02">
-                        <text id="1">{title}</text>
-                        <text id="2">{content}</text>
-                    </binding>
-                </visual>
-            </toast>
-"@
-
-            $xml = New-Object Windows.Data.Xml.Dom.XmlDocument
-            $xml.LoadXml($template)
-            $toast = [Windows.UI.Notifications.ToastNotification]::new($xml)
-            [Windows.UI.Notifications.ToastNotificationManager]::CreateToastNotifier("Copilot Interactive").Show($toast)
-            """
-
-            process = await asyncio.create_subprocess_exec(
-                "powershell",
-                "-NoProfile",
-                "-NonInteractive",
-                "-Command",
-                script,
-                stdout=asyncio.subprocess.DEVNULL,
-                stderr=asyncio.subprocess.PIPE,
-            )
-
-            _, stderr = await process.communicate()
-
-            if process.returncode != 0:
-                logger.warning(
-                    "Windows notification failed: %s",
-                    stderr.decode() if stderr else "unknown error",
-                )
-                return False
-
-            return True
-
-        except Exception as e:
-            logger.warning("Failed to send Windows notification: %s", e)
-            return False
-
-    async def _send_termux_notification(self, context: str | None = None) -> bool:
-        """Send a Termux notification (Linux/Android)."""
-        if not shutil.which("termux-notification"):
-            logger.debug("termux-notification not available")
+        backend = self.backend
+        if backend is None:
+            logger.debug("No notifier available")
             return False
 
+        content = self._format_notification_content(context)
         try:
-            content = self._format_notification_content(context)
-            title = "Input requested"
-
-            # Try with inline reply first
-            success = await self._try_termux_notification_with_reply(title, content)
-            if success:
-                return True
-
-            # Fallback to plain notification
-            return await self._try_termux_notification_plain(title, content)
-
-        except Exception as e:
-            logger.warning("Failed to send Termux notification: %s", e)
-            return False
-
-    async def _try_termux_notification_with_reply(
-        self, title: str, content: str
-    ) -> bool:
-        """Try to send a Termux notification with inline reply support."""
-        try:
-            process = await asyncio.create_subprocess_exec(
-                "termux-notification",
-                "--title",
-                title,
-                "--content",
-                content,
-                "--input",
-                "--input-label",
-                "Reply",
-                stdout=asyncio.subprocess.DEVNULL,
-                stderr=asyncio.subprocess.PIPE,
+            return await backend.send(self.TITLE, content)
+        except TimeoutError:
+            self._stats.timed_out += 1
+            logger.warning(
+                "%s notifier did not finish within %s seconds",
+                backend.name,
+                self._settings.notification_timeout,
             )
-
-            _, _stderr = await process.communicate()
-            return process.returncode == 0
-
-        except Exception:
             return False
-
-    async def _try_termux_notification_plain(self, title: str, content: str) -> bool:
-        """Send a plain Termux notification without inline reply."""
-        try:
-            process = await asyncio.create_subprocess_exec(
-                "termux-notification",
-                "--title",
-                title,
-                "--content",
-                content,
-                stdout=asyncio.subprocess.DEVNULL,
-                stderr=asyncio.subprocess.PIPE,
-            )
-
-            _, _stderr = await process.communicate()
-            return process.returncode == 0
-
-        except Exception:
+        except Exception as e:
+            logger.warning("Failed to send %s notification: %s", backend.name, e)
             return False
 
     def _format_notification_content(self, context: str | None) -> str:
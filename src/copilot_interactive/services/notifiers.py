@@ -0,0 +1,332 @@
+"""Notifier backends used by the notification service."""
+
+import asyncio
+import contextlib
+import json
+import logging
+import shlex
+import shutil
+from abc import ABC, abstractmethod
+
+from copilot_interactive.config.settings import Settings
+from copilot_interactive.utils.platform import is_windows
+
+logger = logging.getLogger(__name__)
+
+
+async def run_process(*args: str, timeout: float) -> tuple[int, bytes]:
+    """
+    Run a notifier process, killing it if it exceeds the timeout.
+
+    Args:
+        args: The command line to execute.
+        timeout: Seconds the process may run.
+
+    Returns:
+        Tuple of (returncode, stderr).
+
+    Raises:
+        TimeoutError: If the process was killed for exceeding the timeout.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except BaseException:
+        await _kill(process)
+        raise
+
+    return (process.returncode or 0, stderr)
+
+
+async def _kill(process: asyncio.subprocess.Process) -> None:
+    """Kill a process and reap it."""
+    with contextlib.suppress(ProcessLookupError):
+        process.kill()
+    await process.wait()
+
+
+class NotifierBackend(ABC):
+    """Base class for a way of showing a notification."""
+
+    name = "base"
+
+    def __init__(self, timeout: float) -> None:
+        """
+        Initialize the backend.
+
+        Args:
+            timeout: Seconds a single notification may take.
+        """
+        self._timeout = timeout
+
+    @abstractmethod
+    async def send(self, title: str, content: str) -> bool:
+        """
+        Show a notification.
+
+        Args:
+            title: Notification title.
+            content: Notification body.
+
+        Returns:
+            True if the notification was shown, False otherwise.
+
+        Raises:
+            TimeoutError: If the notifier did not finish in time.
+        """
+
+    async def aclose(self) -> None:  # noqa: B027 - optional, most hold nothing
+        """Release resources held by the backend."""
+
+
+class CommandNotifier(NotifierBackend):
+    """Spawns a command-line notifier for every notification."""
+
+    name = "command"
+
+    def __init__(self, command: list[str], timeout: float) -> None:
+        """
+        Initialize the backend.
+
+        Args:
+            command: Command line; title and content are appended as arguments.
+            timeout: Seconds a single notification may take.
+        """
+        super().__init__(timeout)
+        self._command = command
+
+    async def send(self, title: str, content: str) -> bool:
+        """Spawn the notifier with the title and content as arguments."""
+        returncode, stderr = await run_process(
+            *self._command, title, content, timeout=self._timeout
+        )
+        if returncode != 0:
+            logger.warning(
+                "Notifier %s failed: %s",
+                self._command[0],
+                stderr.decode(errors="replace").strip() or "unknown error",
+            )
+            return False
+        return True
+
+
+class TermuxNotifier(NotifierBackend):
+    """Termux notifications (Linux/Android), spawned per notification."""
+
+    name = "termux"
+
+    def __init__(self, executable: str, timeout: float) -> None:
+        """
+        Initialize the backend.
+
+        Args:
+            executable: Resolved path of termux-notification.
+            timeout: Seconds a single spawn may take.
+        """
+        super().__init__(timeout)
+        self._executable = executable
+
+    async def send(self, title: str, content: str) -> bool:
+        """Send a notification with inline reply, falling back to a plain one."""
+        base = (self._executable, "--title", title, "--content", content)
+
+        # Try with inline reply first
+        returncode, _ = await run_process(
+            *base, "--input", "--input-label", "Reply", timeout=self._timeout
+        )
+        if returncode == 0:
+            return True
+
+        # Fallback to plain notification
+        returncode, _ = await run_process(*base, timeout=self._timeout)
+        return returncode == 0
+
+
+class HelperProcessNotifier(NotifierBackend):
+    """
+    Sends notifications to one long-lived helper process.
+
+    Each notification is written to the helper's stdin as a JSON line
+    ``{"title": ..., "content": ...}``; the helper answers with a line that is
+    ``ok`` on success. The helper is started on first use and restarted if it
+    dies or stops answering.
+    """
+
+    name = "helper"
+
+    def __init__(self, command: list[str], timeout: float) -> None:
+        """
+        Initialize the backend.
+
+        Args:
+            command: Command line starting the helper.
+            timeout: Seconds to wait for the helper's acknowledgement.
+        """
+        super().__init__(timeout)
+        self._command = command
+        self._process: asyncio.subprocess.Process | None = None
+        self._lock = asyncio.Lock()
+        self.starts = 0
+
+    async def send(self, title: str, content: str) -> bool:
+        """Send the notification to the helper, restarting it if needed."""
+        message = json.dumps({"title": title, "content": content}) + "\n"
+
+        async with self._lock:
+            # One retry covers a helper that died since the last notification
+            for _ in range(2):
+                process = await self._ensure_started()
+                assert process.stdin is not None
+                assert process.stdout is not None
+                try:
+                    process.stdin.write(message.encode())
+                    await process.stdin.drain()
+                    reply = await asyncio.wait_for(
+                        process.stdout.readline(), timeout=self._timeout
+                    )
+                except (BrokenPipeError, ConnectionResetError):
+                    reply = b""
+                except BaseException:
+                    # Timed out or cancelled mid-message: the helper's state
+                    # is unknown, so replace it on the next notification
+                    await self._stop()
+                    raise
+
+                if not reply:
+                    logger.warning("Notifier helper exited; restarting it")
+                    await self._stop()
+                    continue
+
+                text = reply.decode(errors="replace").strip()
+                if text != "ok":
+                    logger.warning("Notifier helper reported: %s", text)
+                    return False
+                return True
+
+        return False
+
+    async def aclose(self) -> None:
+        """Stop the helper process."""
+        async with self._lock:
+            await self._stop()
+
+    async def _ensure_started(self) -> asyncio.subprocess.Process:
+        """Start the helper if it is not running."""
+        process = self._process
+        if process is not None and process.returncode is None:
+            return process
+
+        process = await asyncio.create_subprocess_exec(
+            *self._command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        self._process = process
+        self.starts += 1
+        logger.debug("Started notifier helper (pid %d)", process.pid)
+        return process
+
+    async def _stop(self) -> None:
+        """Terminate the helper process, if any."""
+        process, self._process = self._process, None
+        if process is None or process.returncode is not None:
+            return
+        if process.stdin is not None:
+            process.stdin.close()
+        try:
+            await asyncio.wait_for(process.wait(), timeout=1)
+        except TimeoutError:
+            await _kill(process)
+
+
+class WindowsToastNotifier(HelperProcessNotifier):
+    """Windows toast notifications from one persistent PowerShell helper."""
+
+    name = "windows"
+
+    SCRIPT = """
+    [Windows.UI.Notifications.ToastNotificationManager, Windows.UI.Notifications, ContentType = WindowsRuntime] | Out-Null
+    [Windows.Data.Xml.Dom.XmlDocument, Windows.Data.Xml.Dom.XmlDocument, ContentType = WindowsRuntime] | Out-Null
+
+    $notifier = [Windows.UI.Notifications.ToastNotificationManager]::CreateToastNotifier("Copilot Interactive")
+    while ($null -ne ($line = [Console]::In.ReadLine())) {
+        try {
+            $message = $line | ConvertFrom-Json
+            $xml = [Windows.UI.Notifications.ToastNotificationManager]::GetTemplateContent(
+                [Windows.UI.Notifications.ToastTemplateType]::ToastText02)
+            $texts = $xml.GetElementsByTagName("text")
+            $texts.Item(0).AppendChild($xml.CreateTextNode($message.title)) | Out-Null
+            $texts.Item(1).AppendChild($xml.CreateTextNode($message.content)) | Out-Null
+            $notifier.Show([Windows.UI.Notifications.ToastNotification]::new($xml))
+            [Console]::Out.WriteLine("ok")
+        } catch {
+            [Console]::Out.WriteLine("error: " + $_.Exception.Message)
+        }
+        [Console]::Out.Flush()
+    }
+    """
+
+    def __init__(self, executable: str, timeout: float) -> None:
+        """
+        Initialize the backend.
+
+        Args:
+            executable: Resolved path of powershell.
+            timeout: Seconds to wait for the helper's acknowledgement.
+        """
+        super().__init__(
+            [executable, "-NoProfile", "-NonInteractive", "-Command", self.SCRIPT],
+            timeout,
+        )
+
+
+def discover_notifier(settings: Settings) -> NotifierBackend | None:
+    """
+    Pick the notifier backend for this platform and configuration.
+
+    Executables are resolved once here rather than on every notification.
+
+    Args:
+        settings: Application settings.
+
+    Returns:
+        The backend to use, or None if no notifier is available.
+    """
+    backend = settings.notification_backend.lower()
+    timeout = settings.notification_timeout
+    command = shlex.split(settings.notification_command)
+
+    if backend == "none":
+        return None
+
+    if backend in ("command", "helper"):
+        if not command:
+            logger.warning(
+                "NOTIFICATION_BACKEND=%s requires NOTIFICATION_COMMAND", backend
+            )
+            return None
+        if backend == "command":
+            return CommandNotifier(command, timeout)
+        return HelperProcessNotifier(command, timeout)
+
+    if backend in ("auto", "windows") and (backend == "windows" or is_windows()):
+        powershell = shutil.which("powershell")
+        if powershell:
+            return WindowsToastNotifier(powershell, timeout)
+        logger.debug("powershell not available")
+        return None
+
+    if backend in ("auto", "termux"):
+        termux = shutil.which("termux-notification")
+        if termux:
+            return TermuxNotifier(termux, timeout)
+        logger.debug("termux-notification not available")
+        return None
+
+    logger.warning("Unknown notification backend: %s", settings.notification_backend)
+    return None
@@ -0,0 +1,236 @@
+"""Bounded LRU + TTL cache for assistant suggestions."""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from copilot_interactive.utils.text import normalize_context
+
+logger = logging.getLogger(__name__)
+
+
+class CacheStats:
+    """Counters describing cache effectiveness."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.evictions = 0
+        self.expirations = 0
+
+
+class SuggestionCache:
+    """
+    LRU cache of assistant suggestions with a time-to-live per entry.
+
+    Concurrent lookups for a key that is being fetched share the in-flight
+    call instead of issuing their own (single-flight); the call is cancelled
+    once every caller waiting for it has gone away. Entries can be saved
+    to and restored from a JSON snapshot so the cache survives restarts.
+    """
+
+    SNAPSHOT_VERSION = 1
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        snapshot_path: Path | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries kept.
+            ttl: Seconds an entry stays valid.
+            snapshot_path: Optional file used to persist entries.
+            clock: Wall-clock time source (expiries survive restarts).
+        """
+        self._max_size = max_size
+        self._ttl = ttl
+        self._snapshot_path = snapshot_path
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task[str | None]] = {}
+        self._waiters: dict[str, int] = {}
+        self._stats = CacheStats()
+
+        if snapshot_path is not None:
+            self.load_snapshot()
+
+    @property
+    def stats(self) -> CacheStats:
+        """Hit, miss and eviction counters."""
+        return self._stats
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(context: str, model: str, choices: list[str] | None = None) -> str:
+        """Build the cache key for a context, assistant model and choices."""
+        key = f"{model}\0{normalize_context(context)}"
+        if choices:
+            key += "\0" + "\x1f".join(choices)
+        return key
+
+    def get(self, key: str) -> str | None:
+        """
+        Look up a cached suggestion.
+
+        Args:
+            key: Cache key from make_key.
+
+        Returns:
+            The cached suggestion, or None if missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self._stats.expirations += 1
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        """Store a suggestion, evicting the least recently used entries."""
+        self._entries[key] = (value, self._clock() + self._ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    async def get_or_fetch(
+        self, key: str, fetch: Callable[[], Awaitable[str | None]]
+    ) -> str | None:
+        """
+        Return the cached suggestion or fetch it once for all concurrent callers.
+
+        Args:
+            key: Cache key from make_key.
+            fetch: Coroutine factory producing the suggestion on a miss.
+
+        Returns:
+            The suggestion, or None if it could not be fetched.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            self._stats.hits += 1
+            return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats.shared += 1
+        else:
+            self._stats.misses += 1
+            task = asyncio.ensure_future(self._fetch(key, fetch))
+            self._inflight[key] = task
+            # Also runs if the fetch is cancelled before it has started
+            task.add_done_callback(lambda t: self._forget_inflight(key, t))
+
+        # Shield so one cancelled caller does not cancel the shared fetch,
+        # but don't keep fetching for nobody once the last caller is gone
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[key] == 1:
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    async def _fetch(
+        self, key: str, fetch: Callable[[], Awaitable[str | None]]
+    ) -> str | None:
+        """Run the fetch and cache a successful result."""
+        value = await fetch()
+        if value:
+            self.put(key, value)
+        return value
+
+    def _forget_inflight(self, key: str, task: asyncio.Task[str | None]) -> None:
+        """Remove a finished fetch from the in-flight registry."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def load_snapshot(self) -> None:
+        """Restore unexpired entries from the snapshot file, if present."""
+        path = self._snapshot_path
+        if path is None or not path.exists():
+            return
+
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to load suggestion cache snapshot: %s", e)
+            return
+        if not isinstance(data, dict) or not isinstance(data.get("entries"), list):
+            logger.warning("Ignoring suggestion cache snapshot: not a snapshot")
+            return
+        if data.get("version") != self.SNAPSHOT_VERSION:
+            logger.warning("Ignoring suggestion cache snapshot: unknown version")
+            return
+
+        now = self._clock()
+        malformed = 0
+        for entry in data["entries"]:
+            if not _is_snapshot_entry(entry):
+                malformed += 1
+            elif entry[2] > now:
+                self._entries[entry[0]] = (entry[1], entry[2])
+        if malformed:
+            logger.warning(
+                "Skipped %d malformed suggestion cache snapshot entries", malformed
+            )
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+        logger.info("Loaded %d cached suggestions from %s", len(self._entries), path)
+
+    def save_snapshot(self) -> None:
+        """Write unexpired entries to the snapshot file, if configured."""
+        path = self._snapshot_path
+        if path is None:
+            return
+
+        now = self._clock()
+        entries = [
+            [key, value, expires_at]
+            for key, (value, expires_at) in self._entries.items()
+            if expires_at > now
+        ]
+        data = {"version": self.SNAPSHOT_VERSION, "entries": entries}
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(path.suffix + ".tmp")
+            tmp_path.write_text(json.dumps(data), encoding="utf-8")
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning("Failed to save suggestion cache snapshot: %s", e)
+
+
+def _is_snapshot_entry(entry: object) -> bool:
+    """Whether a snapshot entry is a ``[key, value, expires_at]`` triple."""
+    return (
+        isinstance(entry, list)
+        and len(entry) == 3
+        and isinstance(entry[0], str)
+        and isinstance(entry[1], str)
+        and isinstance(entry[2], int | float)
+        and not isinstance(entry[2], bool)
+    )
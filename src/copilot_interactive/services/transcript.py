@@ -0,0 +1,226 @@
+"""Append-only JSONL transcript of every prompt and its answer."""
+
+import asyncio
+import contextlib
+import gzip
+import json
+import logging
+import os
+import shutil
+import time
+from collections import deque
+from pathlib import Path
+from typing import IO, Any
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptStats:
+    """Counters describing what happened to transcript records."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.rotations = 0
+
+
+class TranscriptLog:
+    """
+    Background writer of a JSON Lines transcript.
+
+    ``record`` only appends the entry to a bounded in-memory queue, so a
+    request never waits for the disk. When the queue is full the entry is
+    dropped and counted instead. A flusher task, started with the first
+    record, takes everything queued at once and appends it to the file as
+    one batch from a worker thread. The file is fsynced at most once every
+    ``fsync_interval`` seconds, and no later than that after a write.
+
+    Segments are rotated like ``logging.handlers.RotatingFileHandler`` does:
+    before a batch would take the file past ``max_bytes`` it is renamed to
+    ``<name>.1``, older segments move up by one and only ``backup_count`` of
+    them are kept. With ``compress`` the rotated segments are gzipped
+    (``<name>.1.gz``).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int,
+        backup_count: int,
+        compress: bool = False,
+        fsync_interval: float = 1.0,
+        queue_size: int = 10_000,
+    ) -> None:
+        """
+        Initialize the transcript; the file is opened on the first write.
+
+        Args:
+            path: The JSONL file currently written to.
+            max_bytes: Size a segment may reach before it is rotated.
+            backup_count: Number of rotated segments to keep.
+            compress: Whether to gzip rotated segments.
+            fsync_interval: Longest time, in seconds, written records may
+                stay unsynced.
+            queue_size: Records held in memory before new ones are dropped.
+        """
+        self._path = path
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._compress = compress
+        self._fsync_interval = fsync_interval
+        self._queue_size = queue_size
+        self._stats = TranscriptStats()
+        self._pending: deque[dict[str, Any]] = deque()
+        self._wakeup = asyncio.Event()
+        self._flusher: asyncio.Task[None] | None = None
+        self._closed = False
+        self._dropping = False
+        self._file: IO[bytes] | None = None
+        self._size = 0
+        self._unsynced = False
+        self._synced_at = 0.0
+
+    @property
+    def stats(self) -> TranscriptStats:
+        """Counters for written, dropped and failed records."""
+        return self._stats
+
+    def record(self, entry: dict[str, Any]) -> bool:
+        """
+        Queue an entry to be appended to the transcript.
+
+        Args:
+            entry: JSON-serializable record, written as one line.
+
+        Returns:
+            True if the entry was queued, False if it was dropped because
+            the queue is full or the transcript is closed.
+        """
+        if self._closed:
+            logger.warning("Transcript is closed, dropping record")
+            self._stats.dropped += 1
+            return False
+        if len(self._pending) >= self._queue_size:
+            # Warn once per stall rather than for every dropped record
+            if not self._dropping:
+                logger.warning("Transcript queue full, dropping records")
+                self._dropping = True
+            self._stats.dropped += 1
+            return False
+
+        self._dropping = False
+        self._pending.append(entry)
+        self._wakeup.set()
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(
+                self._flush_loop(), name="transcript-flusher"
+            )
+        return True
+
+    async def aclose(self) -> None:
+        """Write the queued records, sync the file and stop the flusher."""
+        self._closed = True
+        if self._flusher is None:
+            return
+        self._wakeup.set()
+        await self._flusher
+
+    async def _flush_loop(self) -> None:
+        """Write queued records in batches until the transcript is closed."""
+        while True:
+            if not self._pending and not self._closed:
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), self._sync_delay())
+                self._wakeup.clear()
+
+            batch = list(self._pending)
+            self._pending.clear()
+            closing = self._closed
+            await asyncio.to_thread(self._write, batch, closing)
+            if closing:
+                return
+
+    def _sync_delay(self) -> float | None:
+        """Seconds until written records are due to be synced, if any are."""
+        if not self._unsynced:
+            return None
+        return max(0.0, self._synced_at + self._fsync_interval - time.monotonic())
+
+    def _write(self, batch: list[dict[str, Any]], closing: bool) -> None:
+        """Append a batch, syncing and rotating as needed (worker thread)."""
+        try:
+            if batch:
+                data = "".join(
+                    json.dumps(entry, ensure_ascii=False) + "\n" for entry in batch
+                ).encode()
+                file = self._open()
+                if self._size and self._size + len(data) > self._max_bytes:
+                    self._rotate()
+                    file = self._open()
+                file.write(data)
+                file.flush()
+                self._size += len(data)
+                self._unsynced = True
+                self._stats.written += len(batch)
+
+            now = time.monotonic()
+            due = closing or now - self._synced_at >= self._fsync_interval
+            if self._file is not None and self._unsynced and due:
+                os.fsync(self._file.fileno())
+                self._unsynced = False
+                self._synced_at = now
+        except (OSError, TypeError, ValueError) as e:
+            logger.error("Failed to write %d transcript records: %s", len(batch), e)
+            self._stats.failed += len(batch)
+            self._close_file()
+
+        if closing:
+            self._close_file()
+
+    def _open(self) -> IO[bytes]:
+        """The open transcript file, opened for appending if needed."""
+        if self._file is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self._path.open("ab")
+            self._size = os.fstat(self._file.fileno()).st_size
+        return self._file
+
+    def _close_file(self) -> None:
+        """Close the transcript file, if it is open."""
+        if self._file is not None:
+            with contextlib.suppress(OSError):
+                self._file.close()
+            self._file = None
+            self._unsynced = False
+
+    def _segment(self, index: int) -> Path:
+        """Path of the rotated segment with the given number."""
+        suffix = ".gz" if self._compress else ""
+        return self._path.with_name(f"{self._path.name}.{index}{suffix}")
+
+    def _rotate(self) -> None:
+        """Move the current file to the first backup segment."""
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+        self._close_file()
+        if self._backup_count > 0:
+            for index in range(self._backup_count - 1, 0, -1):
+                segment = self._segment(index)
+                if segment.exists():
+                    segment.replace(self._segment(index + 1))
+            if self._compress:
+                with (
+                    self._path.open("rb") as src,
+                    gzip.open(self._segment(1), "wb") as dst,
+                ):
+                    shutil.copyfileobj(src, dst)
+                self._path.unlink()
+            else:
+                self._path.replace(self._segment(1))
+        else:
+            self._path.unlink()
+        self._size = 0
+        self._stats.rotations += 1
+        logger.info("Rotated transcript %s", self._path)
@@ -1,10 +1,21 @@
 """Utility functions for the application."""
 
-from copilot_interactive.utils.platform import get_platform_name, is_windows
-from copilot_interactive.utils.text import truncate_text
+from copilot_interactive.utils.platform import (
+    bind_unix_socket,
+    get_platform_name,
+    is_windows,
+)
+from copilot_interactive.utils.text import (
+    match_choice,
+    normalize_context,
+    truncate_text,
+)
 
 __all__ = [
+    "bind_unix_socket",
     "get_platform_name",
     "is_windows",
+    "match_choice",
+    "normalize_context",
     "truncate_text",
 ]
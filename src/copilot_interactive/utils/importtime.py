@@ -0,0 +1,102 @@
+"""Import-time profiling of the server's startup path."""
+
+import subprocess
+import sys
+from collections import defaultdict
+
+
+class ImportTiming:
+    """Time spent importing one module, as reported by ``-X importtime``."""
+
+    def __init__(
+        self, module: str, self_us: int, cumulative_us: int, depth: int
+    ) -> None:
+        """Initialize the timing."""
+        self.module = module
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.depth = depth
+
+    @property
+    def package(self) -> str:
+        """Top-level package the module belongs to."""
+        return self.module.split(".", 1)[0]
+
+
+def parse_importtime(output: str) -> list[ImportTiming]:
+    """
+    Parse the report written to stderr by ``python -X importtime``.
+
+    Args:
+        output: The captured stderr.
+
+    Returns:
+        One timing per imported module, in import order.
+    """
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        timings.append(
+            ImportTiming(
+                stripped,
+                int(fields[0]),
+                int(fields[1]),
+                depth=(len(name) - len(stripped) - 1) // 2,
+            )
+        )
+    return timings
+
+
+def profile_imports(module: str) -> list[ImportTiming]:
+    """
+    Import a module in a fresh interpreter and collect the import times.
+
+    Args:
+        module: Dotted name of the module to import.
+
+    Returns:
+        One timing per imported module, in import order.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return parse_importtime(result.stderr)
+
+
+def format_import_profile(
+    module: str, timings: list[ImportTiming], top: int = 15
+) -> str:
+    """
+    Summarise import timings per package and per module.
+
+    Args:
+        module: The module that was profiled.
+        timings: Timings from profile_imports.
+        top: Number of packages and modules to list.
+
+    Returns:
+        A human-readable report.
+    """
+    total = sum(t.self_us for t in timings)
+    by_package: defaultdict[str, int] = defaultdict(int)
+    for timing in timings:
+        by_package[timing.package] += timing.self_us
+
+    lines = [f"Import profile for {module}: {total / 1000:.1f} ms total", ""]
+    lines.append("Slowest packages (self time):")
+    for package, self_us in sorted(by_package.items(), key=lambda i: -i[1])[:top]:
+        lines.append(f"  {self_us / 1000:8.1f} ms  {package}")
+
+    lines.extend(["", "Slowest modules (cumulative time):"])
+    for timing in sorted(timings, key=lambda t: -t.cumulative_us)[:top]:
+        lines.append(f"  {timing.cumulative_us / 1000:8.1f} ms  {timing.module}")
+    return "\n".join(lines)
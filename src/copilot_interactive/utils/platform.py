@@ -1,7 +1,12 @@
 """Platform-specific utility functions."""
 
+import contextlib
+import os
 import platform
+import socket
+import stat
 import sys
+from pathlib import Path
 
 
 def is_windows() -> bool:
@@ -17,3 +22,36 @@ def is_linux() -> bool:
 def get_platform_name() -> str:
     """Get the name of the current platform."""
     return platform.system()
+
+
+def bind_unix_socket(path: Path) -> socket.socket:
+    """
+    Bind a Unix domain stream socket only the current user can connect to.
+
+    A stale socket left at the path by an earlier run is replaced; any other
+    file there is left alone and binding fails.
+
+    Args:
+        path: Socket path.
+
+    Returns:
+        The bound socket, not yet listening.
+
+    Raises:
+        OSError: If the socket cannot be bound.
+    """
+    with contextlib.suppress(FileNotFoundError):
+        if stat.S_ISSOCK(path.stat().st_mode):
+            path.unlink()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Create the socket file private rather than chmod it afterwards, which
+    # would leave a window where others could connect
+    umask = os.umask(0o177)
+    try:
+        sock.bind(str(path))
+    except OSError:
+        sock.close()
+        raise
+    finally:
+        os.umask(umask)
+    return sock
@@ -1,5 +1,10 @@
 """Text utility functions."""
 
+import re
+
+# A menu number: "2", "2)" or "2." with optional text after the mark
+_CHOICE_NUMBER = re.compile(r"^(\d+)(?:[.)](?:\s.*)?)?$", re.DOTALL)
+
 
 def truncate_text(text: str, max_length: int, suffix: str = "...") -> str:
     """
@@ -35,3 +40,49 @@ def sanitize_input(text: str) -> str:
         The sanitized text.
     """
     return text.strip() if text else ""
+
+
+def normalize_context(text: str) -> str:
+    """
+    Normalize a prompt context for equality comparisons.
+
+    Case and runs of whitespace are ignored, so "Run the tests?" and
+    "run  the tests? " normalize to the same string.
+
+    Args:
+        text: The context to normalize.
+
+    Returns:
+        The normalized context.
+    """
+    return " ".join(text.casefold().split())
+
+
+def match_choice(answer: str, choices: list[str]) -> str | None:
+    """
+    Map an answer onto one of a fixed set of choices.
+
+    The text of a choice matches ignoring case, surrounding whitespace and
+    quotes, and is tried first, so choices that start with a number (e.g.
+    "1 minute") are matched by their text. Otherwise the answer may be the
+    1-based number of a choice, bare or as "2)" or "2.", optionally followed
+    by more text as in "2) no".
+
+    Args:
+        answer: The answer as typed by the user or returned by the assistant.
+        choices: The allowed choices, in menu order.
+
+    Returns:
+        The matching choice, or None if the answer matches none of them.
+    """
+    text = answer.strip()
+    wanted = normalize_context(text.strip("\"'`.").strip())
+    for choice in choices:
+        if choice == text or normalize_context(choice) == wanted:
+            return choice
+
+    match = _CHOICE_NUMBER.match(text)
+    if match is None:
+        return None
+    index = int(match.group(1))
+    return choices[index - 1] if 1 <= index <= len(choices) else None
@@ -0,0 +1,172 @@
+"""Named timing spans collected per request through a context variable."""
+
+import importlib
+import logging
+import time
+from collections.abc import Callable
+from contextlib import AbstractContextManager, nullcontext
+from contextvars import ContextVar, Token
+from types import TracebackType
+
+logger = logging.getLogger(__name__)
+
+# Callable starting an external tracer span, e.g. an OpenTelemetry tracer's
+# ``start_as_current_span``
+Tracer = Callable[[str], AbstractContextManager[object]]
+
+_current: ContextVar["RequestTiming | None"] = ContextVar(
+    "request_timing", default=None
+)
+_tracer: Tracer | None = None
+_NO_SPAN: AbstractContextManager[None] = nullcontext()
+
+
+class TimingSpan:
+    """A finished span: its name, offset from the request start and length."""
+
+    __slots__ = ("duration", "name", "start")
+
+    def __init__(self, name: str, start: float, duration: float) -> None:
+        """Initialize the span; times are in seconds."""
+        self.name = name
+        self.start = start
+        self.duration = duration
+
+
+class RequestTiming:
+    """The spans recorded while one request was handled."""
+
+    def __init__(self, request_id: str) -> None:
+        """
+        Initialize the timing with the request's start time.
+
+        Args:
+            request_id: ID reported with the spans.
+        """
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.spans: list[TimingSpan] = []
+
+    def add(self, name: str, start: float, end: float) -> None:
+        """
+        Record a span.
+
+        Args:
+            name: Span name, e.g. ``terminal_wait``.
+            start: ``time.perf_counter()`` value when the span began.
+            end: ``time.perf_counter()`` value when the span ended.
+        """
+        self.spans.append(TimingSpan(name, start - self.started, end - start))
+
+    @property
+    def last_end(self) -> float | None:
+        """``time.perf_counter()`` value when the latest span ended."""
+        if not self.spans:
+            return None
+        return self.started + max(s.start + s.duration for s in self.spans)
+
+    def server_timing(self) -> str:
+        """The spans as a ``Server-Timing`` header value, in milliseconds."""
+        return ", ".join(f"{s.name};dur={s.duration * 1000:.1f}" for s in self.spans)
+
+    def activate(self) -> Token["RequestTiming | None"]:
+        """Make this the current request's timing; returns the reset token."""
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token: Token["RequestTiming | None"]) -> None:
+        """Restore the timing that was current before ``activate``."""
+        _current.reset(token)
+
+
+class _Span:
+    """Context manager timing one span of the current request."""
+
+    __slots__ = ("_name", "_start", "_timing", "_traced")
+
+    def __init__(self, timing: RequestTiming, name: str) -> None:
+        self._timing = timing
+        self._name = name
+        self._start = 0.0
+        self._traced: AbstractContextManager[object] | None = None
+
+    def __enter__(self) -> None:
+        if _tracer is not None:
+            try:
+                self._traced = _tracer(self._name)
+                self._traced.__enter__()
+            except Exception as e:
+                logger.warning("Tracer failed to start span %s: %s", self._name, e)
+                self._traced = None
+        self._start = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self._timing.add(self._name, self._start, time.perf_counter())
+        if self._traced is not None:
+            try:
+                self._traced.__exit__(exc_type, exc, tb)
+            except Exception as e:
+                logger.warning("Tracer failed to end span %s: %s", self._name, e)
+
+
+def current_timing() -> RequestTiming | None:
+    """The timing of the request being handled, if timing is enabled."""
+    return _current.get()
+
+
+def span(name: str) -> AbstractContextManager[None]:
+    """
+    Time a block as a named span of the current request.
+
+    Outside a timed request this returns a shared no-op context manager, so
+    instrumented code costs one context variable lookup when timing is off.
+
+    Args:
+        name: Span name, e.g. ``assistant``.
+
+    Returns:
+        A context manager recording the span when it exits.
+    """
+    timing = _current.get()
+    if timing is None:
+        return _NO_SPAN
+    return _Span(timing, name)
+
+
+def set_tracer(tracer: Tracer | None) -> None:
+    """
+    Forward every span to an external tracer as well.
+
+    Args:
+        tracer: Called with the span name; the returned context manager is
+            entered and exited around the span. None removes the tracer.
+    """
+    global _tracer
+    _tracer = tracer
+
+
+def load_tracer(path: str) -> Tracer | None:
+    """
+    Import a tracer given as ``module:attribute``.
+
+    Args:
+        path: Import path, e.g. ``myapp.tracing:start_span``.
+
+    Returns:
+        The tracer, or None if it could not be imported.
+    """
+    module_name, _, attribute = path.partition(":")
+    try:
+        tracer: Tracer = getattr(importlib.import_module(module_name), attribute)
+    except (ImportError, AttributeError, ValueError) as e:
+        logger.error("Failed to load tracer %s: %s", path, e)
+        return None
+    if not callable(tracer):
+        logger.error("Tracer %s is not callable", path)
+        return None
+    return tracer
@@ -0,0 +1,53 @@
+"""
+Stand-in notifier used by the tests and the benchmarks.
+
+Spawn mode, one notification per process::
+
+    python tests/stub_notifier.py TITLE CONTENT
+
+Helper mode, reading JSON lines from stdin and acknowledging each with ``ok``::
+
+    python tests/stub_notifier.py --serve
+
+Notifications are appended to the file named by ``STUB_NOTIFIER_LOG`` when
+set. In helper mode ``STUB_NOTIFIER_EXIT_AFTER`` makes the helper exit after
+that many notifications, simulating a crash.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+
+def _record(title: str, content: str) -> None:
+    """Append the notification to the log file, if configured."""
+    log = os.environ.get("STUB_NOTIFIER_LOG")
+    if log:
+        with Path(log).open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"title": title, "content": content}) + "\n")
+
+
+def _serve() -> None:
+    """Handle notifications from stdin until it is closed."""
+    exit_after = int(os.environ.get("STUB_NOTIFIER_EXIT_AFTER", "0"))
+    for handled, line in enumerate(sys.stdin, start=1):
+        message = json.loads(line)
+        _record(message["title"], message["content"])
+        print("ok", flush=True)
+        if exit_after and handled >= exit_after:
+            return
+
+
+def main() -> None:
+    """Run in spawn or helper mode depending on the arguments."""
+    if sys.argv[1:] == ["--serve"]:
+        _serve()
+    elif len(sys.argv) == 3:
+        _record(sys.argv[1], sys.argv[2])
+    else:
+        sys.exit("usage: stub_notifier.py TITLE CONTENT | --serve")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Local stub servers shared by the tests and the benchmarks."""
+
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+import uvicorn
+
+STUB_NOTIFIER = Path(__file__).with_name("stub_notifier.py")
+
+
+def stub_notifier_command(*args: str) -> list[str]:
+    """Command line running the stand-in notifier script."""
+    return [sys.executable, str(STUB_NOTIFIER), *args]
+
+
+class StubAssistant:
+    """
+    OpenAI-compatible assistant stub served by uvicorn in a background thread.
+
+    Answers ``POST /chat/completions`` with a fixed reply after an optional
+    latency, failing a configurable fraction of requests with HTTP 500.
+    Requests with ``"stream": true`` get the reply as server-sent events,
+    one chunk every ``chunk_delay`` seconds, until the client disconnects.
+    """
+
+    def __init__(
+        self,
+        reply: str = "stub suggestion",
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+        chunk_size: int = 4,
+        chunk_delay: float = 0.0,
+    ) -> None:
+        """Initialize the stub without starting it."""
+        self.reply = reply
+        self.latency = latency
+        self.error_rate = error_rate
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.requests = 0
+        self.chunks_sent = 0
+        self.disconnects = 0
+        self.connections: set[tuple[str, int]] = set()
+        self._random = random.Random(seed)
+        self._port: int | None = None
+        self._server: uvicorn.Server | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def host(self) -> str:
+        """Host the stub listens on."""
+        return "127.0.0.1"
+
+    @property
+    def port(self) -> int:
+        """Port the stub listens on."""
+        if self._port is None:
+            raise RuntimeError("Stub assistant has not been started")
+        return self._port
+
+    @property
+    def base_url(self) -> str:
+        """Base URL of the stub."""
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> None:
+        """Start serving in a background thread."""
+        config = uvicorn.Config(
+            self._app,
+            host=self.host,
+            port=0,
+            log_level="warning",
+            lifespan="off",
+            loop="asyncio",
+            interface="asgi3",
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Stub assistant failed to start")
+            time.sleep(0.01)
+        sockets = self._server.servers[0].sockets
+        self._port = int(sockets[0].getsockname()[1])
+
+    def stop(self) -> None:
+        """Stop the server and wait for the thread to finish."""
+        if self._server is not None:
+            self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    def __enter__(self) -> "StubAssistant":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.stop()
+
+    async def _app(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        """Minimal ASGI app implementing the chat completions endpoint."""
+        if scope["type"] != "http":
+            return
+        self.requests += 1
+        if scope.get("client"):
+            self.connections.add(tuple(scope["client"]))
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if scope["path"] != "/chat/completions":
+            await self._send(send, 404, {"error": "not found"})
+            return
+        if self.error_rate and self._random.random() < self.error_rate:
+            await self._send(send, 500, {"error": "stub failure"})
+            return
+
+        if json.loads(body or b"{}").get("stream"):
+            await self._stream(receive, send)
+            return
+
+        payload = {
+            "choices": [{"message": {"role": "assistant", "content": self.reply}}]
+        }
+        await self._send(send, 200, payload)
+
+    async def _stream(self, receive: Any, send: Any) -> None:
+        """Send the reply as OpenAI-style SSE chunks until done or disconnected."""
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        watcher = asyncio.create_task(watch_disconnect())
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/event-stream")],
+            }
+        )
+        chunks = [
+            self.reply[i : i + self.chunk_size]
+            for i in range(0, len(self.reply), self.chunk_size)
+        ]
+        events = [{"choices": [{"delta": {"content": c}}]} for c in chunks]
+        events.append({"choices": [{"delta": {}, "finish_reason": "stop"}]})
+        try:
+            for event in events:
+                if disconnected.is_set():
+                    self.disconnects += 1
+                    return
+                data = f"data: {json.dumps(event)}\n\n".encode()
+                await send(
+                    {"type": "http.response.body", "body": data, "more_body": True}
+                )
+                self.chunks_sent += 1
+                await asyncio.sleep(self.chunk_delay)
+            await send({"type": "http.response.body", "body": b"data: [DONE]\n\n"})
+        finally:
+            watcher.cancel()
+
+    @staticmethod
+    async def _send(send: Any, status: int, payload: object) -> None:
+        """Send a JSON response."""
+        body = json.dumps(payload).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -1,10 +1,25 @@
 """Tests for API endpoints."""
 
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
 import pytest
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from starlette.types import Message, Receive, Scope, Send
 
 from copilot_interactive import __version__
-from copilot_interactive.main import app
+from copilot_interactive.config.settings import Settings
+from copilot_interactive.main import app, create_app
+from copilot_interactive.middleware import DisconnectMiddleware, UserInputFastPath
+from copilot_interactive.models.responses import UserInputResponse
+from copilot_interactive.routers.dependencies import get_input_service, get_services
+from copilot_interactive.services.container import ServiceContainer
+from copilot_interactive.services.metrics import Metrics
 
 
 class TestHealthEndpoint:
@@ -30,6 +45,32 @@ class TestHealthEndpoint:
         assert data["version"] == __version__
 
 
+class TestHealthAssistantState:
+    """Tests for the assistant state reported by /health."""
+
+    def test_reports_closed_circuit(self) -> None:
+        """Test that a running server reports the breaker state."""
+        with TestClient(app) as client:
+            data = client.get("/health").json()
+        assert data["status"] == "healthy"
+        assert data["assistant"] == {
+            "circuit": "closed",
+            "consecutive_failures": 0,
+            "last_probe": None,
+        }
+
+    def test_open_circuit_is_degraded(self) -> None:
+        """Test that an open breaker marks the service as degraded."""
+        with TestClient(app) as client:
+            breaker = app.state.services.assistant_service.breaker
+            while not breaker.is_open:
+                breaker.record_failure()
+            data = client.get("/health").json()
+        assert data["status"] == "degraded"
+        assert data["assistant"]["circuit"] == "open"
+        assert data["assistant"]["consecutive_failures"] >= 1
+
+
 class TestOpenAPISchema:
     """Tests for OpenAPI schema."""
 
@@ -51,3 +92,626 @@ class TestOpenAPISchema:
         assert "/health" in paths
         assert "/user-input" in paths
         assert "/user-input/json" in paths
+        assert "/user-input/jobs" in paths
+        assert "/user-input/jobs/{job_id}" in paths
+
+
+class TestServiceContainer:
+    """Tests for the app-scoped service container."""
+
+    def test_lifespan_creates_services(self) -> None:
+        """Test that services are created once at startup."""
+        with TestClient(app) as client:
+            services = app.state.services
+            assert isinstance(services, ServiceContainer)
+            client.get("/health")
+            assert app.state.services is services
+
+    def test_input_service_dependency_is_shared(self) -> None:
+        """Test that the dependency returns the container's InputService."""
+        with TestClient(app):
+            services = app.state.services
+            request = MagicMock()
+            request.app = app
+            assert get_input_service(get_services(request)) is services.input_service
+
+    def test_transcript_flushed_on_shutdown(self, tmp_path: Path) -> None:
+        """Test that answers are in the transcript once the server stops."""
+        path = tmp_path / "transcript.jsonl"
+        test_app = create_app(
+            Settings(notification_enabled=False, transcript_path=str(path))
+        )
+        with TestClient(test_app) as client:
+            services = test_app.state.services
+            services.console_service.ask = AsyncMock(return_value="yes")
+            client.post(
+                "/user-input", content="Deploy?", headers={"Content-Type": "text/plain"}
+            )
+            metrics = client.get("/metrics").text
+        assert "copilot_interactive_transcript_records_dropped_total 0" in metrics
+        (line,) = path.read_text().splitlines()
+        assert json.loads(line)["answer"] == "yes"
+
+    def test_assistant_client_closed_on_shutdown(self) -> None:
+        """Test that the pooled assistant client is closed at shutdown."""
+        with TestClient(app):
+            assistant = app.state.services.assistant_service
+            client = assistant._get_client()
+        assert client.is_closed
+
+
+class TestMetricsEndpoint:
+    """Tests for the /metrics endpoint."""
+
+    def test_metrics_text_format(self) -> None:
+        """Test that the endpoint serves the Prometheus text format."""
+        with TestClient(app) as client:
+            response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "version=0.0.4" in response.headers["content-type"]
+        assert "# TYPE copilot_interactive_input_request_seconds histogram" in (
+            response.text
+        )
+        assert "copilot_interactive_pending_prompts 0" in response.text
+        assert "copilot_interactive_input_timeouts_total 0" in response.text
+        assert "copilot_interactive_assistant_prefetch_used_total 0" in response.text
+        assert (
+            "copilot_interactive_assistant_prefetch_discarded_total 0" in response.text
+        )
+
+    def test_user_input_latency_recorded(self) -> None:
+        """Test that a /user-input request shows up in the histogram."""
+        with TestClient(app) as client:
+            services = app.state.services
+            services.console_service.ask = AsyncMock(return_value="yes")
+            client.post(
+                "/user-input",
+                content="Deploy?",
+                headers={"Content-Type": "text/plain"},
+            )
+            response = client.get("/metrics")
+        assert (
+            'copilot_interactive_input_request_seconds_count{source="user"} 1'
+            in response.text
+        )
+
+
+class TestTimingMiddleware:
+    """Tests for the Server-Timing header and the per-request log line."""
+
+    @pytest.fixture
+    def timed_app(self) -> FastAPI:
+        """Create an app with the timing middleware installed."""
+        return create_app(Settings(timing_enabled=True, notification_enabled=False))
+
+    def test_user_input_spans(
+        self, timed_app: FastAPI, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        """Test that the input flow's spans are reported and logged."""
+        with TestClient(timed_app) as client:
+            services = timed_app.state.services
+            services.console_service.ask = AsyncMock(return_value="yes")
+            with caplog.at_level(logging.INFO, "copilot_interactive.middleware"):
+                response = client.post(
+                    "/user-input",
+                    content="Deploy?",
+                    headers={"Content-Type": "text/plain", "X-Request-ID": "abc"},
+                )
+
+        assert response.status_code == 200
+        assert response.headers["x-request-id"] == "abc"
+        names = [
+            entry.split(";")[0]
+            for entry in response.headers["server-timing"].split(", ")
+        ]
+        assert names == ["terminal_wait", "serialize", "total"]
+
+        (line,) = (
+            r.getMessage()
+            for r in caplog.records
+            if r.name == "copilot_interactive.middleware.timing"
+        )
+        record = json.loads(line)
+        assert record["request_id"] == "abc"
+        assert (record["method"], record["path"], record["status"]) == (
+            "POST",
+            "/user-input",
+            200,
+        )
+        assert [s["name"] for s in record["spans"]] == names
+
+    def test_generates_request_id(self, timed_app: FastAPI) -> None:
+        """Test that requests without an ID get a fresh one."""
+        with TestClient(timed_app) as client:
+            first = client.get("/missing")
+            second = client.get("/missing")
+        assert first.status_code == 404
+        assert first.headers["server-timing"].startswith("total;dur=")
+        assert len(first.headers["x-request-id"]) == 32
+        assert first.headers["x-request-id"] != second.headers["x-request-id"]
+
+    def test_disabled_by_default(self, client: TestClient) -> None:
+        """Test that the default app does not add timing headers."""
+        response = client.get("/health")
+        assert "server-timing" not in response.headers
+
+
+class TestUserInputFastPath:
+    """Tests for the raw ASGI /user-input handler."""
+
+    @staticmethod
+    async def _get_user_input(
+        context: str = "", *_args: object, **_kwargs: object
+    ) -> UserInputResponse:
+        """Answer with text that needs JSON escaping."""
+        return UserInputResponse(
+            input=f'reply to <{context}>: "yes" \\ \n\t\u00e9\u2028\U0001f600',
+            source="user",
+        )
+
+    @classmethod
+    def _post(
+        cls, settings: Settings, path: str, body: bytes, content_type: str | None
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Send one request to a fresh app and return the raw response."""
+        headers = {"Content-Type": content_type} if content_type else {}
+        test_app = create_app(settings)
+        with TestClient(test_app) as client:
+            test_app.state.services.input_service.get_user_input = cls._get_user_input
+            response = client.post(path, content=body, headers=headers)
+        return response.status_code, dict(response.headers), response.content
+
+    @pytest.mark.parametrize(
+        ("path", "body", "content_type"),
+        [
+            ("/user-input", b"  Deploy now?  ", "text/plain"),
+            ("/user-input", "Überschreiben?".encode(), "text/plain; charset=utf-8"),
+            ("/user-input", b"", "text/plain"),
+            ("/user-input", b'"quoted"', "application/json"),
+            ("/user-input", b"no content type", None),
+            ("/user-input", b"a=b", "application/x-www-form-urlencoded"),
+            ("/user-input/json", b'{"context": "Run tests?"}', "application/json"),
+            ("/user-input/json", b'{"context": "x", "extra": 1}', "application/json"),
+            ("/user-input/json", b"{}", "application/json"),
+            (
+                "/user-input/json",
+                b'{"context": "Go?", "choices": ["yes", "no"]}',
+                "application/json",
+            ),
+            (
+                "/user-input/json",
+                b'{"context": "Go?", "choices": ["yes"], "default_choice": "no"}',
+                "application/json",
+            ),
+            ("/user-input/json", b'{"context": 1}', "application/json"),
+            ("/user-input/json", b"[]", "application/json"),
+            ("/user-input/json", b"not json", "application/json"),
+            ("/user-input/json", b"", "application/json"),
+        ],
+    )
+    def test_same_wire_format(
+        self, path: str, body: bytes, content_type: str | None
+    ) -> None:
+        """Test that responses match the FastAPI routes byte for byte."""
+        fast = self._post(
+            Settings(notification_enabled=False), path, body, content_type
+        )
+        routed = self._post(
+            Settings(notification_enabled=False, input_fast_path=False),
+            path,
+            body,
+            content_type,
+        )
+        assert fast == routed
+
+    async def test_bypasses_app(self) -> None:
+        """Test that handled requests never reach the wrapped app."""
+        inner = AsyncMock()
+        services = MagicMock()
+        services.input_service.get_user_input = AsyncMock(
+            return_value=UserInputResponse(input="yes", source="user")
+        )
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/user-input",
+            "headers": [(b"content-type", b"text/plain")],
+            "app": MagicMock(state=MagicMock(services=services)),
+        }
+        chunks = iter(
+            [
+                {"type": "http.request", "body": b"Dep", "more_body": True},
+                {"type": "http.request", "body": b"loy?", "more_body": False},
+            ]
+        )
+        sent: list[Message] = []
+
+        async def receive() -> Message:
+            return next(chunks)
+
+        async def send(message: Message) -> None:
+            sent.append(message)
+
+        await UserInputFastPath(inner)(scope, receive, send)
+        inner.assert_not_called()
+        services.input_service.get_user_input.assert_awaited_once_with(
+            "Deploy?", deadline=None
+        )
+        assert sent[0]["status"] == 200
+        assert sent[1]["body"] == b'{"input":"yes","source":"user"}'
+
+    @pytest.mark.parametrize(
+        ("path", "content_type", "body"),
+        [
+            ("/user-input", b"text/plain", b"\xff\xfe"),
+            # Fields the fast path doesn't know, e.g. ones added later
+            ("/user-input/json", b"application/json", b'{"context": "x", "new": 1}'),
+        ],
+    )
+    async def test_replays_body_to_app(
+        self, path: str, content_type: bytes, body: bytes
+    ) -> None:
+        """Test that rejected bodies are passed on intact."""
+        received: list[Message] = []
+
+        async def inner(_scope: Scope, receive: Receive, _send: Send) -> None:
+            received.append(await receive())
+
+        services = MagicMock()
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": path,
+            "headers": [(b"content-type", content_type)],
+            "app": MagicMock(state=MagicMock(services=services)),
+        }
+
+        async def receive() -> Message:
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        await UserInputFastPath(inner)(scope, receive, AsyncMock())
+        assert received == [{"type": "http.request", "body": body, "more_body": False}]
+        services.input_service.get_user_input.assert_not_called()
+
+
+class TestDisconnectMiddleware:
+    """Tests for abandoning input requests when the client disconnects."""
+
+    @staticmethod
+    async def _request(
+        fast_path: bool,
+        path: str,
+        body: bytes,
+        content_type: str,
+        *,
+        disconnect_early: bool,
+    ) -> tuple[list[Message], Metrics, list[str]]:
+        """Drive one request through the app straight over ASGI."""
+        test_app = create_app(
+            Settings(notification_enabled=False, input_fast_path=fast_path)
+        )
+        events: list[str] = []
+
+        async def answer(*_args: object, **_kwargs: object) -> object:
+            events.append("started")
+            try:
+                await asyncio.sleep(10 if disconnect_early else 0)
+            except asyncio.CancelledError:
+                events.append("cancelled")
+                raise
+            response = UserInputResponse(input="yes", source="user")
+            return [response] if path.endswith("batch") else response
+
+        services = MagicMock()
+        services.metrics = metrics = Metrics()
+        services.input_service.get_user_input.side_effect = answer
+        services.input_service.get_user_inputs.side_effect = answer
+        test_app.state.services = services
+
+        # Like uvicorn, the disconnect only arrives once the client is gone
+        gone = asyncio.Event()
+        messages = iter([{"type": "http.request", "body": body, "more_body": False}])
+        sent: list[Message] = []
+
+        async def receive() -> Message:
+            for message in messages:
+                return message
+            await gone.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Message) -> None:
+            sent.append(message)
+            if message["type"] == "http.response.body":
+                gone.set()
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"content-type", content_type.encode())],
+            "client": ("127.0.0.1", 50000),
+            "server": ("127.0.0.1", 8000),
+        }
+        request = asyncio.create_task(test_app(scope, receive, send))
+        await asyncio.sleep(0.05)
+        if disconnect_early:
+            gone.set()
+        await asyncio.wait_for(request, timeout=5)
+        return sent, metrics, events
+
+    @pytest.mark.parametrize("fast_path", [True, False])
+    @pytest.mark.parametrize(
+        ("path", "body", "content_type"),
+        [
+            ("/user-input", b"Deploy?", "text/plain"),
+            ("/user-input/json", b'{"context": "Deploy?"}', "application/json"),
+            ("/user-input/batch", b'{"questions": ["Deploy?"]}', "application/json"),
+        ],
+    )
+    async def test_disconnect_abandons_request(
+        self, path: str, body: bytes, content_type: str, *, fast_path: bool
+    ) -> None:
+        """Test that a disconnect cancels the request and sends nothing."""
+        sent, metrics, events = await self._request(
+            fast_path, path, body, content_type, disconnect_early=True
+        )
+        assert events == ["started", "cancelled"]
+        assert sent == []
+        assert metrics.input_abandoned.value() == 1
+
+    @pytest.mark.parametrize("fast_path", [True, False])
+    async def test_answered_request_not_abandoned(self, *, fast_path: bool) -> None:
+        """Test that a disconnect after the response is not counted."""
+        sent, metrics, events = await self._request(
+            fast_path,
+            "/user-input",
+            b"Deploy?",
+            "text/plain",
+            disconnect_early=False,
+        )
+        assert events == ["started"]
+        assert sent[0]["status"] == 200
+        assert metrics.input_abandoned.value() == 0
+
+    async def test_messages_after_body_end_watch(self) -> None:
+        """Test that a receive that never blocks doesn't stall the request."""
+        sent: list[Message] = []
+
+        async def inner(_scope: Scope, receive: Receive, send: Send) -> None:
+            await receive()
+            await asyncio.sleep(0.01)
+            await send({"type": "http.response.start", "status": 200})
+            await send({"type": "http.response.body", "body": b"yes"})
+
+        async def receive() -> Message:
+            return {"type": "http.request", "body": b"Deploy?", "more_body": False}
+
+        async def send(message: Message) -> None:
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/user-input"}
+        await asyncio.wait_for(DisconnectMiddleware(inner)(scope, receive, send), 5)
+        assert sent[-1]["body"] == b"yes"
+
+    def test_abandoned_metric_exposed(self, client: TestClient) -> None:
+        """Test that abandoned requests are listed on /metrics."""
+        response = client.get("/metrics")
+        assert "copilot_interactive_input_abandoned_total 0" in response.text
+
+
+class TestUserInputBatchEndpoint:
+    """Tests for the batch input endpoint."""
+
+    def test_returns_one_response_per_question(self) -> None:
+        """Test that the questions are passed on and answered in order."""
+        with TestClient(app) as client:
+            input_service = app.state.services.input_service
+            input_service.get_user_inputs = AsyncMock(
+                return_value=[
+                    UserInputResponse(input="staging", source="user"),
+                    UserInputResponse(input="Yes.", source="assistant"),
+                ]
+            )
+            response = client.post(
+                "/user-input/batch", json={"questions": ["Where?", "Migrate?"]}
+            )
+        assert response.status_code == 200
+        assert response.json() == [
+            {"input": "staging", "source": "user"},
+            {"input": "Yes.", "source": "assistant"},
+        ]
+        input_service.get_user_inputs.assert_awaited_once_with(
+            ["Where?", "Migrate?"], None
+        )
+
+    def test_empty_batch_rejected(self) -> None:
+        """Test that a batch needs at least one question."""
+        with TestClient(app) as client:
+            response = client.post("/user-input/batch", json={"questions": []})
+        assert response.status_code == 422
+
+
+class TestUserInputChoicesEndpoint:
+    """Tests for multiple-choice requests to the JSON endpoint."""
+
+    def test_choices_passed_on(self) -> None:
+        """Test that choices and the default reach the input service."""
+        with TestClient(app) as client:
+            input_service = app.state.services.input_service
+            input_service.get_user_input = AsyncMock(
+                return_value=UserInputResponse(input="staging", source="default")
+            )
+            response = client.post(
+                "/user-input/json",
+                json={
+                    "context": "Where?",
+                    "choices": ["staging", "production"],
+                    "default_choice": "staging",
+                },
+            )
+        assert response.json() == {"input": "staging", "source": "default"}
+        input_service.get_user_input.assert_awaited_once_with(
+            "Where?", ["staging", "production"], "staging", None
+        )
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            {"context": "Where?", "choices": []},
+            {"context": "Where?", "choices": ["staging"], "default_choice": "prod"},
+            {"context": "Where?", "default_choice": "staging"},
+        ],
+    )
+    def test_invalid_choices_rejected(self, body: dict[str, object]) -> None:
+        """Test that empty choices and a default outside them are rejected."""
+        with TestClient(app) as client:
+            response = client.post("/user-input/json", json=body)
+        assert response.status_code == 422
+
+
+class TestDeadline:
+    """Tests for request deadlines."""
+
+    @staticmethod
+    def _post(
+        fast_path: bool, path: str, headers: dict[str, str], **kwargs: object
+    ) -> tuple[int, AsyncMock]:
+        """Post a request and return the status and the input service mock."""
+        settings = Settings(notification_enabled=False, input_fast_path=fast_path)
+        with TestClient(create_app(settings)) as client:
+            input_service = client.app.state.services.input_service  # type: ignore[attr-defined]
+            input_service.get_user_input = AsyncMock(
+                return_value=UserInputResponse(input="yes", source="user")
+            )
+            response = client.post(path, headers=headers, **kwargs)  # type: ignore[arg-type]
+        return response.status_code, input_service.get_user_input
+
+    @pytest.mark.parametrize("fast_path", [True, False])
+    def test_header_passed_on(self, fast_path: bool) -> None:
+        """Test that a future X-Deadline reaches the input service."""
+        deadline = time.time() + 60
+        status, get_user_input = self._post(
+            fast_path,
+            "/user-input",
+            {"Content-Type": "text/plain", "X-Deadline": str(deadline)},
+            content="Deploy?",
+        )
+        assert status == 200
+        get_user_input.assert_awaited_once_with("Deploy?", deadline=deadline)
+
+    @pytest.mark.parametrize("fast_path", [True, False])
+    @pytest.mark.parametrize(("header", "status"), [("1", 504), ("soon", 422)])
+    def test_expired_or_invalid_header_rejected(
+        self, fast_path: bool, header: str, status: int
+    ) -> None:
+        """Test that nothing is prompted for an expired or invalid deadline."""
+        code, get_user_input = self._post(
+            fast_path,
+            "/user-input",
+            {"Content-Type": "text/plain", "X-Deadline": header},
+            content="Deploy?",
+        )
+        assert code == status
+        get_user_input.assert_not_called()
+
+    def test_earliest_of_header_and_body(self) -> None:
+        """Test that the earlier of the header and body deadlines applies."""
+        now = time.time()
+        status, get_user_input = self._post(
+            True,
+            "/user-input/json",
+            {"X-Deadline": str(now + 60)},
+            json={"context": "Deploy?", "deadline": now + 30},
+        )
+        assert status == 200
+        get_user_input.assert_awaited_once_with("Deploy?", None, None, now + 30)
+
+        status, _ = self._post(
+            True, "/user-input/json", {}, json={"context": "Deploy?", "deadline": now}
+        )
+        assert status == 504
+
+
+class TestUserInputJobsEndpoint:
+    """Tests for the async input job endpoints."""
+
+    @staticmethod
+    def _answer_after(delay: float, source: str = "user") -> AsyncMock:
+        """Create a get_user_input replacement answering after a delay."""
+
+        async def get_user_input(context: str = "") -> UserInputResponse:
+            await asyncio.sleep(delay)
+            return UserInputResponse(input=f"answer to {context}", source=source)
+
+        return AsyncMock(side_effect=get_user_input)
+
+    def test_submit_returns_immediately(self) -> None:
+        """Test that submitting a job does not wait for the answer."""
+        with TestClient(app) as client:
+            input_service = app.state.services.input_service
+            input_service.get_user_input = self._answer_after(30)
+            response = client.post(
+                "/user-input/jobs",
+                content="Deploy?",
+                headers={"Content-Type": "text/plain"},
+            )
+        assert response.status_code == 202
+        data = response.json()
+        assert data["status"] == "pending"
+        assert data["result"] is None
+        assert data["id"]
+
+    def test_long_poll_returns_answer(self) -> None:
+        """Test that a long-poll returns as soon as the answer is available."""
+        with TestClient(app) as client:
+            input_service = app.state.services.input_service
+            input_service.get_user_input = self._answer_after(0.2)
+            job_id = client.post(
+                "/user-input/jobs",
+                content="Deploy?",
+                headers={"Content-Type": "text/plain"},
+            ).json()["id"]
+
+            assert client.get(f"/user-input/jobs/{job_id}").json()["status"] == (
+                "pending"
+            )
+            data = client.get(f"/user-input/jobs/{job_id}?wait=10").json()
+            assert data["status"] == "user"
+            assert data["result"] == {"input": "answer to Deploy?", "source": "user"}
+
+            # The answer can be fetched again after reconnecting
+            assert client.get(f"/user-input/jobs/{job_id}").json() == data
+            input_service.get_user_input.assert_awaited_once_with("Deploy?")
+
+    def test_long_poll_times_out_with_pending(self) -> None:
+        """Test that a long-poll returns the pending status after the wait."""
+        with TestClient(app) as client:
+            input_service = app.state.services.input_service
+            input_service.get_user_input = self._answer_after(30)
+            job_id = client.post(
+                "/user-input/jobs",
+                content="Slow?",
+                headers={"Content-Type": "text/plain"},
+            ).json()["id"]
+            response = client.get(f"/user-input/jobs/{job_id}?wait=0.05")
+        assert response.status_code == 200
+        assert response.json()["status"] == "pending"
+
+    def test_unknown_job(self) -> None:
+        """Test that an unknown job ID returns 404."""
+        with TestClient(app) as client:
+            response = client.get("/user-input/jobs/does-not-exist")
+        assert response.status_code == 404
+
+    def test_negative_wait_rejected(self) -> None:
+        """Test that a negative wait is a validation error."""
+        with TestClient(app) as client:
+            response = client.get("/user-input/jobs/x?wait=-1")
+        assert response.status_code == 422
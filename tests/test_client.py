@@ -0,0 +1,153 @@
+"""Tests for the lightweight command line client."""
+
+import tempfile
+import threading
+import time
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+
+from copilot_interactive.cli import main as cli_main
+from copilot_interactive.client import ClientError, ask
+from copilot_interactive.config.settings import get_settings
+from copilot_interactive.utils.platform import bind_unix_socket
+
+
+class CannedServer:
+    """A Unix socket server answering one request with a fixed response."""
+
+    def __init__(self, path: Path, response: bytes) -> None:
+        self.path = path
+        self.request = b""
+        self._response = response
+        self._socket = bind_unix_socket(path)
+        self._socket.listen(1)
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self) -> None:
+        conn, _ = self._socket.accept()
+        with conn:
+            while b"\r\n\r\n" not in self.request:
+                self.request += conn.recv(65536)
+            conn.sendall(self._response)
+
+    def close(self) -> None:
+        """Stop serving."""
+        self._thread.join(timeout=5)
+        self._socket.close()
+
+
+@pytest.fixture
+def socket_path() -> Generator[Path, None, None]:
+    """A socket path short enough for AF_UNIX limits."""
+    with tempfile.TemporaryDirectory(prefix="cic") as directory:
+        yield Path(directory) / "server.sock"
+
+
+def _response(status: bytes, body: bytes) -> bytes:
+    return (
+        b"HTTP/1.1 " + status + b"\r\n"
+        b"content-type: application/json\r\n"
+        b"content-length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+    )
+
+
+class TestClient:
+    """Tests for copilot-interactive ask."""
+
+    def test_ask_over_unix_socket(self, socket_path: Path) -> None:
+        """Test that the question is posted and the response decoded."""
+        server = CannedServer(
+            socket_path, _response(b"200 OK", b'{"input":"yes","source":"user"}')
+        )
+        assert ask("Ship it?", str(socket_path)) == {"input": "yes", "source": "user"}
+        server.close()
+        head, _, _ = server.request.partition(b"\r\n\r\n")
+        assert head.startswith(b"POST /user-input HTTP/1.1\r\n")
+        assert b"Content-Type: text/plain; charset=utf-8" in head
+
+    def test_error_status_raises(self, socket_path: Path) -> None:
+        """Test that a non-200 response is reported with its body."""
+        server = CannedServer(
+            socket_path, _response(b"422 Unprocessable Entity", b'{"detail":"bad"}')
+        )
+        with pytest.raises(ClientError, match="422"):
+            ask("Ship it?", str(socket_path))
+        server.close()
+
+    def test_unreachable_server(self, socket_path: Path) -> None:
+        """Test that a missing socket is a ClientError, not a traceback."""
+        with pytest.raises(ClientError, match="cannot reach the server"):
+            ask("Ship it?", str(socket_path))
+
+    def test_cli_prints_only_the_answer(
+        self, socket_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Test that the ask subcommand prints the answer and exits cleanly."""
+        server = CannedServer(
+            socket_path, _response(b"200 OK", b'{"input":"go ahead","source":"user"}')
+        )
+        with pytest.raises(SystemExit) as exit_info:
+            cli_main(["ask", "--socket", str(socket_path), "Ship", "it?"])
+        server.close()
+        assert exit_info.value.code == 0
+        assert capsys.readouterr().out == "go ahead\n"
+        assert server.request.endswith(b"\r\n\r\nShip it?")
+
+    @pytest.mark.parametrize("from_env_file", [False, True])
+    def test_cli_default_socket_from_settings(
+        self,
+        socket_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+        *,
+        from_env_file: bool,
+    ) -> None:
+        """Test that APP_UDS is read like the server does, with ~ expanded."""
+        monkeypatch.setenv("HOME", str(socket_path.parent))
+        monkeypatch.chdir(socket_path.parent)
+        if from_env_file:
+            monkeypatch.delenv("APP_UDS", raising=False)
+            Path(".env").write_text("APP_UDS=~/server.sock\n")
+            get_settings.cache_clear()
+        else:
+            monkeypatch.setenv("APP_UDS", "~/server.sock")
+        server = CannedServer(
+            socket_path, _response(b"200 OK", b'{"input":"yes","source":"user"}')
+        )
+        try:
+            with pytest.raises(SystemExit) as exit_info:
+                cli_main(["ask", "Ship it?"])
+        finally:
+            get_settings.cache_clear()
+        server.close()
+        assert exit_info.value.code == 0
+        assert server.request.endswith(b"\r\n\r\nShip it?")
+
+    def test_cli_timeout_sends_deadline(self, socket_path: Path) -> None:
+        """Test that --timeout becomes an X-Deadline header."""
+        server = CannedServer(
+            socket_path, _response(b"200 OK", b'{"input":"yes","source":"user"}')
+        )
+        before = time.time()
+        with pytest.raises(SystemExit):
+            cli_main(["ask", "--socket", str(socket_path), "--timeout", "60", "Go?"])
+        server.close()
+        header = next(
+            line
+            for line in server.request.split(b"\r\n")
+            if line.startswith(b"X-Deadline: ")
+        )
+        assert before + 60 <= float(header.split(b" ", 1)[1]) + 0.001 < before + 61
+
+    def test_cli_reports_errors(
+        self, socket_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Test that failures go to stderr with a non-zero exit status."""
+        with pytest.raises(SystemExit) as exit_info:
+            cli_main(["ask", "--socket", str(socket_path), "Ship it?"])
+        assert exit_info.value.code == 1
+        captured = capsys.readouterr()
+        assert captured.out == ""
+        assert "cannot reach the server" in captured.err
@@ -0,0 +1,777 @@
+"""Tests for the console prompt multiplexer."""
+
+import asyncio
+import io
+import json
+import os
+import tempfile
+import threading
+from collections.abc import AsyncGenerator, Generator
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from copilot_interactive.config.settings import Settings
+from copilot_interactive.services import console_broker
+from copilot_interactive.services.console_broker import (
+    ConsoleBroker,
+    RemoteConsoleService,
+)
+from copilot_interactive.services.console_service import ConsoleService
+from copilot_interactive.services.input_service import InputService
+from copilot_interactive.services.metrics import Metrics
+
+
+class PipeConsole:
+    """A ConsoleService fed from an OS pipe instead of the terminal."""
+
+    def __init__(self, settings: Settings) -> None:
+        read_fd, self._write_fd = os.pipe()
+        self.input = os.fdopen(read_fd, "r")
+        self.output = io.StringIO()
+        self.service = ConsoleService(settings, self.input, self.output)
+
+    def type(self, line: str) -> None:
+        """Simulate the user typing a line."""
+        os.write(self._write_fd, f"{line}\n".encode())
+
+    def close(self) -> None:
+        """Close the write end so the reader sees EOF."""
+        os.close(self._write_fd)
+
+
+@pytest.fixture
+def console(settings: Settings) -> Generator[PipeConsole, None, None]:
+    """Create a console reading from a pipe."""
+    pipe_console = PipeConsole(settings)
+    yield pipe_console
+    pipe_console.close()
+
+
+async def _wait_for_prompts(service: ConsoleService, count: int) -> None:
+    """Wait until the given number of prompts are pending."""
+    while len(service.pending_prompts) < count:
+        await asyncio.sleep(0.001)
+
+
+class TestConsoleService:
+    """Tests for ConsoleService prompt routing."""
+
+    async def test_single_prompt_bare_answer(self, console: PipeConsole) -> None:
+        """Test that a bare line answers the only pending prompt."""
+        task = asyncio.create_task(console.service.ask("Continue?", timeout=5))
+        await _wait_for_prompts(console.service, 1)
+        console.type("yes")
+        assert await task == "yes"
+        assert console.service.pending_prompts == []
+        assert "Continue?" in console.output.getvalue()
+
+    async def test_answers_routed_by_id(self, console: PipeConsole) -> None:
+        """Test that '<id>: answer' goes to the matching prompt."""
+        first = asyncio.create_task(console.service.ask("First?", timeout=5))
+        second = asyncio.create_task(console.service.ask("Second?", timeout=5))
+        await _wait_for_prompts(console.service, 2)
+        first_id, second_id = (p.id for p in console.service.pending_prompts)
+
+        console.type(f"{second_id}: two")
+        assert await second == "two"
+        assert not first.done()
+
+        console.type(f"{first_id}:one")
+        assert await first == "one"
+
+    async def test_outstanding_prompts_are_listed(self, console: PipeConsole) -> None:
+        """Test that a new prompt lists the other outstanding prompts."""
+        first = asyncio.create_task(console.service.ask("Deploy?", timeout=5))
+        await _wait_for_prompts(console.service, 1)
+        second = asyncio.create_task(console.service.ask("Migrate?", timeout=5))
+        await _wait_for_prompts(console.service, 2)
+
+        output = console.output.getvalue()
+        assert "Other pending prompts:" in output
+        assert "Deploy?" in output.split("Migrate?")[1]
+
+        for prompt in console.service.pending_prompts:
+            console.type(f"{prompt.id}: ok")
+        assert await asyncio.gather(first, second) == ["ok", "ok"]
+
+    async def test_bare_answer_ambiguous(self, settings: Settings) -> None:
+        """Test that a bare line is rejected when several prompts are pending."""
+        output = io.StringIO()
+        service = ConsoleService(settings, output_stream=output)
+        service._start_reading = lambda: None  # type: ignore[method-assign]
+        first = asyncio.create_task(service.ask("A?", timeout=5))
+        second = asyncio.create_task(service.ask("B?", timeout=5))
+        await _wait_for_prompts(service, 2)
+
+        assert service.handle_line("yes") is False
+        assert "answer with '<id>: <answer>'" in output.getvalue()
+        assert not first.done()
+        assert not second.done()
+        first.cancel()
+        second.cancel()
+
+    async def test_answer_looking_like_id(self, settings: Settings) -> None:
+        """Test that "10:30" answers the only prompt when no prompt 10 exists."""
+        output = io.StringIO()
+        service = ConsoleService(settings, output_stream=output)
+        service._start_reading = lambda: None  # type: ignore[method-assign]
+        task = asyncio.create_task(service.ask("When?", timeout=5))
+        await _wait_for_prompts(service, 1)
+
+        assert service.handle_line("10:30") is True
+        assert await task == "10:30"
+        assert "No pending prompt" not in output.getvalue()
+
+    async def test_unknown_id(self, settings: Settings) -> None:
+        """Test that an answer for an unknown prompt is reported."""
+        output = io.StringIO()
+        service = ConsoleService(settings, output_stream=output)
+        assert service.handle_line("42: yes") is False
+        assert "No pending prompt with ID 42" in output.getvalue()
+
+    async def test_timeout_removes_prompt(self, console: PipeConsole) -> None:
+        """Test that a timed-out prompt returns None and is unregistered."""
+        assert await console.service.ask("Slow?", timeout=0.01) is None
+        assert console.service.pending_prompts == []
+        assert "timed out" in console.output.getvalue()
+        assert console.service._metrics.input_timeouts.value() == 1
+
+    async def test_cancelled_prompt_withdrawn(self, console: PipeConsole) -> None:
+        """Test that cancelled prompts and forms are marked as withdrawn."""
+        tasks = [
+            asyncio.create_task(console.service.ask("Gone?", timeout=5)),
+            asyncio.create_task(console.service.ask_form(["A?", "B?"], timeout=5)),
+        ]
+        await _wait_for_prompts(console.service, 3)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        output = console.output.getvalue()
+        assert "[Prompt 1 withdrawn]" in output
+        assert "[Form 2 withdrawn]" in output
+        assert console.service.pending_prompts == []
+
+    async def test_empty_answer_is_no_answer(self, console: PipeConsole) -> None:
+        """Test that pressing Enter without text skips to the fallback."""
+        task = asyncio.create_task(console.service.ask("Skip?", timeout=5))
+        await _wait_for_prompts(console.service, 1)
+        console.type("")
+        assert await task is None
+
+    async def test_suggestion_shown_with_prompt(self, console: PipeConsole) -> None:
+        """Test that a remembered answer is shown under the prompt."""
+        task = asyncio.create_task(
+            console.service.ask("Deploy?", timeout=5, suggestion="yes")
+        )
+        await _wait_for_prompts(console.service, 1)
+        assert "(Enter or timeout answers: yes)" in console.output.getvalue()
+        console.type("no")
+        assert await task == "no"
+
+    async def test_eof_releases_prompts(self, settings: Settings) -> None:
+        """Test that closed stdin releases pending and future prompts."""
+        pipe_console = PipeConsole(settings)
+        task = asyncio.create_task(pipe_console.service.ask("EOF?", timeout=5))
+        await _wait_for_prompts(pipe_console.service, 1)
+        pipe_console.close()
+        assert await task is None
+        assert await pipe_console.service.ask("Again?", timeout=5) is None
+
+
+class TestConsoleForm:
+    """Tests for several questions shown as one form."""
+
+    async def test_answered_in_sequence(self, console: PipeConsole) -> None:
+        """Test that bare lines answer the questions in order."""
+        task = asyncio.create_task(
+            console.service.ask_form(["Where?", "Version?", "Migrate?"], timeout=5)
+        )
+        await _wait_for_prompts(console.service, 3)
+        console.type("staging")
+        console.type("")
+        console.type("yes")
+        assert await task == ["staging", None, "yes"]
+        assert console.service.pending_prompts == []
+        output = console.output.getvalue()
+        assert "Input requested: 3 questions" in output
+        assert output.count("Version?") == 2  # listed, then asked in turn
+
+    async def test_answered_by_id(self, console: PipeConsole) -> None:
+        """Test that questions can be answered out of order by ID."""
+        task = asyncio.create_task(
+            console.service.ask_form(["A?", "B?", "C?"], timeout=0.2)
+        )
+        await _wait_for_prompts(console.service, 3)
+        first, _, third = (p.id for p in console.service.pending_prompts)
+        console.type(f"{third}: c")
+        console.type(f"{first}: a")
+        assert await task == ["a", None, "c"]
+        assert "timed out, 1 unanswered" in console.output.getvalue()
+        assert console.service._metrics.input_timeouts.value() == 1
+
+    async def test_typed_ahead_lines_fill_form(self, console: PipeConsole) -> None:
+        """Test that lines typed before the form answer it in order."""
+        console.type("one\ntwo")
+        assert await console.service.ask_form(["1?", "2?"], timeout=5) == [
+            "one",
+            "two",
+        ]
+
+    async def test_bare_line_ambiguous_with_other_prompts(
+        self, settings: Settings
+    ) -> None:
+        """Test that bare lines need an ID when other prompts are pending too."""
+        output = io.StringIO()
+        service = ConsoleService(settings, output_stream=output)
+        service._start_reading = lambda: None  # type: ignore[method-assign]
+        single = asyncio.create_task(service.ask("Alone?", timeout=5))
+        form = asyncio.create_task(service.ask_form(["X?", "Y?"], timeout=5))
+        await _wait_for_prompts(service, 3)
+
+        assert service.handle_line("yes") is False
+        assert "Other pending prompts:" in output.getvalue()
+        single.cancel()
+        form.cancel()
+
+
+class TestConsoleChoices:
+    """Tests for multiple-choice prompts."""
+
+    async def test_answered_by_number_or_text(self, console: PipeConsole) -> None:
+        """Test that a choice can be picked by its number or its text."""
+        choices = ["staging", "production"]
+        task = asyncio.create_task(
+            console.service.ask("Where?", timeout=5, choices=choices)
+        )
+        await _wait_for_prompts(console.service, 1)
+        console.type("2")
+        assert await task == "production"
+
+        task = asyncio.create_task(
+            console.service.ask("Where?", timeout=5, choices=choices)
+        )
+        await _wait_for_prompts(console.service, 1)
+        console.type(" Staging ")
+        assert await task == "staging"
+        output = console.output.getvalue()
+        assert "    1) staging\n    2) production" in output
+        assert ">>> Choose 1-2: " in output
+
+    async def test_invalid_answer_rejected(self, console: PipeConsole) -> None:
+        """Test that an answer outside the choices keeps the prompt pending."""
+        task = asyncio.create_task(
+            console.service.ask("Go?", timeout=5, choices=["yes", "no"])
+        )
+        await _wait_for_prompts(console.service, 1)
+        console.type("3")
+        console.type("maybe")
+        console.type("no")
+        assert await task == "no"
+        assert console.output.getvalue().count("choose 1-2") == 2
+
+    async def test_empty_answer_skips(self, console: PipeConsole) -> None:
+        """Test that Enter leaves the choice to the caller's default."""
+        task = asyncio.create_task(
+            console.service.ask(
+                "Go?", timeout=5, suggestion="no", choices=["yes", "no"]
+            )
+        )
+        await _wait_for_prompts(console.service, 1)
+        console.type("")
+        assert await task is None
+        assert "(Enter or timeout answers: no)" in console.output.getvalue()
+
+    @pytest.mark.skipif(not hasattr(os, "openpty"), reason="needs a pseudo-terminal")
+    async def test_single_keypress_on_terminal(self, settings: Settings) -> None:
+        """Test that one key answers on a terminal, which is then restored."""
+        import termios
+
+        master, slave = os.openpty()
+        output = io.StringIO()
+        with os.fdopen(slave, "r") as terminal:
+            service = ConsoleService(settings, terminal, output)
+            task = asyncio.create_task(
+                service.ask("Go?", timeout=5, choices=["yes", "no", "later"])
+            )
+            await _wait_for_prompts(service, 1)
+            # No newline: a terminal in line mode would never deliver this
+            os.write(master, b"3")
+            assert await task == "later"
+            assert termios.tcgetattr(slave)[3] & termios.ICANON
+            assert "3) later\n" in output.getvalue()
+
+            # An Enter pressed after the key does not skip the next prompt
+            os.write(master, b"\n")
+            await asyncio.sleep(ConsoleService.KEY_ENTER_GRACE + 0.1)
+            assert not service.is_reading
+            task = asyncio.create_task(service.ask("Next?", timeout=5))
+            await _wait_for_prompts(service, 1)
+            os.write(master, b"answer\n")
+            assert await task == "answer"
+
+            # Off while another prompt is pending, so '<id>: <answer>' works
+            settings.input_single_key = False
+            task = asyncio.create_task(
+                service.ask("Go?", timeout=5, choices=["yes", "no"])
+            )
+            await _wait_for_prompts(service, 1)
+            os.write(master, b"1")
+            await asyncio.sleep(0.05)
+            assert not task.done()
+            os.write(master, b"\n")
+            assert await task == "yes"
+        os.close(master)
+
+
+class TestInputServiceConcurrency:
+    """Tests for concurrent requests through InputService."""
+
+    async def test_concurrent_requests_answered_independently(
+        self, settings: Settings, console: PipeConsole
+    ) -> None:
+        """Test that N concurrent prompts are answered out of order by ID."""
+        notification_service = MagicMock()
+        assistant_service = AsyncMock()
+        service = InputService(
+            settings, notification_service, assistant_service, console.service
+        )
+
+        contexts = [f"Question {i}?" for i in range(5)]
+        tasks = [asyncio.create_task(service.get_user_input(c)) for c in contexts]
+        await _wait_for_prompts(console.service, len(contexts))
+
+        by_context = {p.context: p.id for p in console.service.pending_prompts}
+        for context in reversed(contexts):
+            console.type(f"{by_context[context]}: answer to {context}")
+
+        responses = await asyncio.gather(*tasks)
+        for context, response in zip(contexts, responses, strict=True):
+            assert response.source == "user"
+            assert response.input == f"answer to {context}"
+        assistant_service.get_suggested_input.assert_not_called()
+
+    async def test_timeout_falls_back_to_assistant(
+        self, settings: Settings, console: PipeConsole
+    ) -> None:
+        """Test that each request keeps its own timeout and fallback."""
+        settings.input_timeout = 0
+        assistant_service = AsyncMock()
+        assistant_service.get_suggested_input.return_value = "suggested"
+        service = InputService(
+            settings, MagicMock(), assistant_service, console.service
+        )
+
+        response = await service.get_user_input("Run tests?")
+        assert response.source == "assistant"
+        assert response.input == "suggested"
+
+        response = await service.get_user_input("")
+        assert response.source == "default"
+
+
+class TestInputCoalescing:
+    """Tests for sharing one prompt between identical concurrent requests."""
+
+    async def test_identical_requests_share_prompt(
+        self, settings: Settings, console: PipeConsole
+    ) -> None:
+        """Test that duplicates share one prompt, notification and answer."""
+        settings.input_coalescing = True
+        notification_service = MagicMock()
+        service = InputService(
+            settings, notification_service, AsyncMock(), console.service
+        )
+
+        contexts = ["Deploy to prod?", "deploy  to PROD?", "Deploy to prod?"]
+        tasks = [asyncio.create_task(service.get_user_input(c)) for c in contexts]
+        await _wait_for_prompts(console.service, 1)
+        await asyncio.sleep(0.01)
+        assert len(console.service.pending_prompts) == 1
+
+        console.type("yes")
+        responses = await asyncio.gather(*tasks)
+        assert {r.input for r in responses} == {"yes"}
+        assert {r.source for r in responses} == {"user"}
+        notification_service.dispatch_input_request_notification.assert_called_once()
+        assert service._metrics.input_coalesced.value() == 2
+
+    async def test_shared_assistant_fallback(
+        self, settings: Settings, console: PipeConsole
+    ) -> None:
+        """Test that duplicates that time out share one assistant call."""
+        settings.input_coalescing = True
+        settings.input_timeout = 0
+        assistant_service = AsyncMock()
+        assistant_service.get_suggested_input.return_value = "suggested"
+        service = InputService(
+            settings, MagicMock(), assistant_service, console.service
+        )
+
+        responses = await asyncio.gather(
+            *(service.get_user_input("Run tests?") for _ in range(4))
+        )
+        assert [r.source for r in responses] == ["assistant"] * 4
+        assistant_service.get_suggested_input.assert_awaited_once()
+
+    async def test_different_contexts_not_coalesced(
+        self, settings: Settings, console: PipeConsole
+    ) -> None:
+        """Test that distinct questions still get their own prompts."""
+        settings.input_coalescing = True
+        service = InputService(settings, MagicMock(), AsyncMock(), console.service)
+
+        first = asyncio.create_task(service.get_user_input("First?"))
+        second = asyncio.create_task(service.get_user_input("Second?"))
+        await _wait_for_prompts(console.service, 2)
+        by_context = {p.context: p.id for p in console.service.pending_prompts}
+        console.type(f"{by_context['Second?']}: two")
+        console.type(f"{by_context['First?']}: one")
+        assert (await first).input == "one"
+        assert (await second).input == "two"
+
+    async def test_cancelled_waiter_keeps_shared_prompt(
+        self, settings: Settings, console: PipeConsole
+    ) -> None:
+        """Test that the prompt survives while any waiter remains."""
+        settings.input_coalescing = True
+        service = InputService(settings, MagicMock(), AsyncMock(), console.service)
+
+        first = asyncio.create_task(service.get_user_input("Continue?"))
+        second = asyncio.create_task(service.get_user_input("Continue?"))
+        await _wait_for_prompts(console.service, 1)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert len(console.service.pending_prompts) == 1
+
+        second.cancel()
+        await asyncio.sleep(0.01)
+        assert console.service.pending_prompts == []
+        assert service._shared == {}
+
+    async def test_disabled_by_default(
+        self, settings: Settings, console: PipeConsole
+    ) -> None:
+        """Test that identical requests get separate prompts by default."""
+        service = InputService(settings, MagicMock(), AsyncMock(), console.service)
+        tasks = [asyncio.create_task(service.get_user_input("Same?")) for _ in range(2)]
+        await _wait_for_prompts(console.service, 2)
+        for prompt in console.service.pending_prompts:
+            console.type(f"{prompt.id}: ok")
+        await asyncio.gather(*tasks)
+
+
+class TestConsoleReader:
+    """Tests for the event-loop-native stdin reader."""
+
+    async def test_no_input_lost_or_stolen(self, console: PipeConsole) -> None:
+        """Test 1,000 back-to-back timed-out and answered prompts over a pipe."""
+        threads_before = threading.active_count()
+        for i in range(1000):
+            if i % 3 == 0:
+                # Times out with nothing typed
+                assert await console.service.ask(f"q{i}", timeout=0.001) is None
+            elif i % 3 == 1:
+                # Answer typed ahead of the prompt
+                console.type(f"answer-{i}")
+                assert await console.service.ask(f"q{i}", timeout=5) == f"answer-{i}"
+            else:
+                # Answer typed after the prompt is shown
+                task = asyncio.create_task(console.service.ask(f"q{i}", timeout=5))
+                await _wait_for_prompts(console.service, 1)
+                console.type(f"answer-{i}")
+                assert await task == f"answer-{i}"
+            assert not console.service.is_reading
+
+        assert console.service.pending_prompts == []
+        assert threading.active_count() == threads_before
+
+    async def test_line_typed_after_timeout_goes_to_next_prompt(
+        self, console: PipeConsole
+    ) -> None:
+        """Test that a timed-out prompt does not consume the next answer."""
+        assert await console.service.ask("first", timeout=0.001) is None
+        console.type("late answer")
+        assert await console.service.ask("second", timeout=5) == "late answer"
+
+    async def test_cancellation_releases_reader(self, console: PipeConsole) -> None:
+        """Test that cancelling a prompt stops watching stdin immediately."""
+        task = asyncio.create_task(console.service.ask("cancel me", timeout=5))
+        await _wait_for_prompts(console.service, 1)
+        assert console.service.is_reading
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not console.service.is_reading
+        assert console.service.pending_prompts == []
+
+        console.type("kept")
+        assert await console.service.ask("next", timeout=5) == "kept"
+
+    async def test_multiple_lines_in_one_read(self, console: PipeConsole) -> None:
+        """Test that extra lines from a single read are kept for later prompts."""
+        console.type("one\ntwo")
+        assert await console.service.ask("a", timeout=5) == "one"
+        assert await console.service.ask("b", timeout=5) == "two"
+
+    async def test_regular_file_falls_back_to_thread(
+        self, settings: Settings, tmp_path: Path
+    ) -> None:
+        """Test that inputs without readiness support use the reader thread."""
+        answers = tmp_path / "answers.txt"
+        answers.write_text("from file\n")
+        with answers.open() as stream:
+            service = ConsoleService(settings, stream, io.StringIO())
+            assert await service.ask("file?", timeout=5) == "from file"
+
+
+@pytest.fixture
+def broker_path() -> Generator[Path, None, None]:
+    """A socket path short enough for AF_UNIX limits."""
+    with tempfile.TemporaryDirectory(prefix="cib") as directory:
+        yield Path(directory) / "broker.sock"
+
+
+@pytest.fixture
+async def broker(
+    console: PipeConsole, broker_path: Path
+) -> AsyncGenerator[ConsoleBroker, None]:
+    """A broker answering prompts from the pipe console."""
+    console_broker = ConsoleBroker(console.service, grace=5.0)
+    await console_broker.start(broker_path)
+    yield console_broker
+    await console_broker.aclose()
+
+
+class RawWorker:
+    """A worker speaking the broker protocol directly."""
+
+    def __init__(self, worker: str) -> None:
+        self.worker = worker
+        self.reader: asyncio.StreamReader
+        self.writer: asyncio.StreamWriter
+
+    async def connect(self, path: Path) -> None:
+        """Connect and identify as this worker."""
+        self.reader, self.writer = await asyncio.open_unix_connection(path)
+        self.send({"op": "hello", "worker": self.worker})
+
+    def send(self, message: dict[str, object]) -> None:
+        """Send one protocol message."""
+        self.writer.write(json.dumps(message).encode() + b"\n")
+
+    async def crash(self) -> None:
+        """Drop the connection without cancelling anything."""
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class TestConsoleBroker:
+    """Tests for sharing the console between worker processes."""
+
+    async def test_prompt_answered_through_broker(
+        self,
+        settings: Settings,
+        console: PipeConsole,
+        broker: ConsoleBroker,
+        broker_path: Path,
+    ) -> None:
+        """Test that a worker's prompt is shown and answered on the console."""
+        remote = RemoteConsoleService(settings, broker_path)
+        task = asyncio.create_task(remote.ask("Deploy?", timeout=5, suggestion="no"))
+        await _wait_for_prompts(console.service, 1)
+        assert len(remote.pending_prompts) == 1
+        assert console.service.pending_prompts[0].suggestion == "no"
+
+        console.type("yes")
+        assert await task == "yes"
+        assert remote.pending_prompts == []
+        assert broker.prompts == []
+        await remote.aclose()
+
+    @pytest.mark.usefixtures("broker")
+    async def test_answers_routed_to_their_worker(
+        self,
+        settings: Settings,
+        console: PipeConsole,
+        broker_path: Path,
+    ) -> None:
+        """Test that prompts from several workers get their own answers."""
+        first = RemoteConsoleService(settings, broker_path)
+        second = RemoteConsoleService(settings, broker_path)
+        one = asyncio.create_task(first.ask("First?", timeout=5))
+        await _wait_for_prompts(console.service, 1)
+        two = asyncio.create_task(second.ask("Second?", timeout=5))
+        await _wait_for_prompts(console.service, 2)
+        first_id, second_id = (p.id for p in console.service.pending_prompts)
+
+        console.type(f"{second_id}: two")
+        console.type(f"{first_id}: one")
+        assert await asyncio.gather(one, two) == ["one", "two"]
+        await first.aclose()
+        await second.aclose()
+
+    @pytest.mark.usefixtures("broker")
+    async def test_form_answered_through_broker(
+        self, settings: Settings, console: PipeConsole, broker_path: Path
+    ) -> None:
+        """Test that a worker's form is shown once and answered per question."""
+        remote = RemoteConsoleService(settings, broker_path)
+        task = asyncio.create_task(
+            remote.ask_form(["Where?", "When?"], timeout=5, suggestions=["prod", None])
+        )
+        await _wait_for_prompts(console.service, 2)
+        assert console.service.pending_prompts[0].suggestion == "prod"
+        console.type("staging")
+        console.type("now")
+        assert await task == ["staging", "now"]
+        await remote.aclose()
+
+    @pytest.mark.usefixtures("broker")
+    async def test_choices_forwarded_to_broker(
+        self, settings: Settings, console: PipeConsole, broker_path: Path
+    ) -> None:
+        """Test that a worker's choices are shown as a menu by the broker."""
+        remote = RemoteConsoleService(settings, broker_path)
+        task = asyncio.create_task(
+            remote.ask("Where?", timeout=5, choices=["staging", "production"])
+        )
+        await _wait_for_prompts(console.service, 1)
+        assert console.service.pending_prompts[0].choices == ["staging", "production"]
+        console.type("1")
+        assert await task == "staging"
+        await remote.aclose()
+
+    @pytest.mark.usefixtures("broker")
+    async def test_timeout_reported_to_worker(
+        self,
+        settings: Settings,
+        console: PipeConsole,
+        broker_path: Path,
+    ) -> None:
+        """Test that a console timeout is returned and counted by the worker."""
+        metrics = Metrics()
+        remote = RemoteConsoleService(settings, broker_path, metrics=metrics)
+        assert await remote.ask("Slow?", timeout=0.05) is None
+        assert metrics.input_timeouts.value() == 1
+        assert console.service.pending_prompts == []
+        await remote.aclose()
+
+    @pytest.mark.usefixtures("broker")
+    async def test_cancel_withdraws_prompt(
+        self,
+        settings: Settings,
+        console: PipeConsole,
+        broker_path: Path,
+    ) -> None:
+        """Test that a cancelled request removes its prompt from the console."""
+        remote = RemoteConsoleService(settings, broker_path)
+        task = asyncio.create_task(remote.ask("Cancel?", timeout=5))
+        await _wait_for_prompts(console.service, 1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        while console.service.pending_prompts:
+            await asyncio.sleep(0.001)
+        await remote.aclose()
+
+    @pytest.mark.usefixtures("broker")
+    async def test_reconnect_keeps_prompt(
+        self,
+        settings: Settings,
+        console: PipeConsole,
+        broker_path: Path,
+    ) -> None:
+        """Test that a dropped connection neither loses nor repeats a prompt."""
+        remote = RemoteConsoleService(settings, broker_path)
+        task = asyncio.create_task(remote.ask("Keep?", timeout=5))
+        await _wait_for_prompts(console.service, 1)
+
+        dropped = remote._writer
+        assert dropped is not None
+        dropped.close()
+        while remote._writer in (None, dropped):
+            await asyncio.sleep(0.001)
+
+        assert len(console.service.pending_prompts) == 1
+        console.type("kept")
+        assert await task == "kept"
+        await remote.aclose()
+
+    async def test_answer_held_until_worker_reconnects(
+        self, console: PipeConsole, broker: ConsoleBroker, broker_path: Path
+    ) -> None:
+        """Test that an answer given while a worker is away is delivered later."""
+        worker = RawWorker("w1")
+        await worker.connect(broker_path)
+        worker.send({"op": "ask", "id": 7, "context": "Held?", "timeout": 5})
+        await _wait_for_prompts(console.service, 1)
+        await worker.crash()
+
+        console.type("later")
+        while console.service.pending_prompts:
+            await asyncio.sleep(0.001)
+        assert len(broker.prompts) == 1
+
+        await worker.connect(broker_path)
+        reply = json.loads(await worker.reader.readline())
+        assert reply == {"id": 7, "answer": "later", "timed_out": False}
+        assert broker.prompts == []
+        await worker.crash()
+
+    @pytest.mark.usefixtures("broker")
+    async def test_crashed_worker_prompt_adopted(
+        self,
+        settings: Settings,
+        console: PipeConsole,
+        broker_path: Path,
+    ) -> None:
+        """Test that a retried request takes over a crashed worker's prompt."""
+        worker = RawWorker("crashed")
+        await worker.connect(broker_path)
+        worker.send({"op": "ask", "id": 1, "context": "Retry me?", "timeout": 5})
+        await _wait_for_prompts(console.service, 1)
+        await worker.crash()
+
+        remote = RemoteConsoleService(settings, broker_path)
+        task = asyncio.create_task(remote.ask("Retry me?", timeout=5))
+        while not remote.is_connected:
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.01)
+        assert len(console.service.pending_prompts) == 1
+
+        console.type("adopted")
+        assert await task == "adopted"
+        await remote.aclose()
+
+    async def test_orphaned_prompt_expires(
+        self, console: PipeConsole, broker_path: Path
+    ) -> None:
+        """Test that a crashed worker's prompt is dropped after the grace period."""
+        console_broker = ConsoleBroker(console.service, grace=0.01)
+        await console_broker.start(broker_path)
+        worker = RawWorker("gone")
+        await worker.connect(broker_path)
+        worker.send({"op": "ask", "id": 1, "context": "Gone?", "timeout": 5})
+        await _wait_for_prompts(console.service, 1)
+        await worker.crash()
+
+        while console.service.pending_prompts:
+            await asyncio.sleep(0.001)
+        assert console_broker.prompts == []
+        await console_broker.aclose()
+
+    async def test_broker_unavailable_times_out(
+        self,
+        settings: Settings,
+        broker_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that prompts time out when no broker is listening."""
+        monkeypatch.setattr(console_broker, "REPLY_MARGIN", 0.0)
+        remote = RemoteConsoleService(settings, broker_path)
+        assert await remote.ask("Anyone?", timeout=0.05) is None
+        assert remote.pending_prompts == []
+        await remote.aclose()
@@ -94,6 +94,10 @@ class TestHealthCheckResponse:
         response = HealthCheckResponse(status="degraded", version="0.1.0")
         assert response.status == "degraded"
 
+    def test_assistant_state_optional(self) -> None:
+        """Test that the assistant section defaults to None."""
+        assert HealthCheckResponse(version="0.1.0").assistant is None
+
 
 class TestAssistantChatResponse:
     """Tests for AssistantChatResponse model."""
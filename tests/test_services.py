@@ -1,11 +1,39 @@
-"""Tests for AssistantService."""
+"""Tests for the service layer."""
 
+import asyncio
+import gzip
 import json
+import sys
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 
 from copilot_interactive.config.settings import Settings
+from copilot_interactive.models.responses import UserInputResponse
+from copilot_interactive.services.answer_memory import AnswerMemory
+from copilot_interactive.services.assistant_backends import parse_backends
 from copilot_interactive.services.assistant_service import AssistantService
+from copilot_interactive.services.circuit_breaker import CircuitBreaker
+from copilot_interactive.services.input_service import InputService
+from copilot_interactive.services.job_service import JobService
+from copilot_interactive.services.metrics import Counter, Histogram, Metric, Metrics
+from copilot_interactive.services.notification_service import NotificationService
+from copilot_interactive.services.notifiers import (
+    CommandNotifier,
+    HelperProcessNotifier,
+    NotifierBackend,
+    TermuxNotifier,
+    WindowsToastNotifier,
+    discover_notifier,
+    run_process,
+)
+from copilot_interactive.services.suggestion_cache import SuggestionCache
+from copilot_interactive.services.transcript import TranscriptLog
+from copilot_interactive.utils.timing import RequestTiming
+from tests.stubs import StubAssistant, stub_notifier_command
 
 
 class TestAssistantServiceParseResponse:
@@ -72,3 +100,1779 @@ class TestAssistantServiceParseResponse:
         """Test parsing whitespace-only response."""
         result = service._parse_response("   \n\t  ")
         assert result is None
+
+
+class TestAssistantServiceClient:
+    """Tests for the pooled AssistantService HTTP client."""
+
+    @staticmethod
+    def _reply_handler(_request: httpx.Request) -> httpx.Response:
+        """Reply to every request with a fixed suggestion."""
+        return httpx.Response(
+            200, json={"choices": [{"message": {"content": "pooled reply"}}]}
+        )
+
+    async def test_client_is_reused(self) -> None:
+        """Test that consecutive calls share one client."""
+        service = AssistantService(
+            Settings(), transport=httpx.MockTransport(self._reply_handler)
+        )
+        first = service._get_client()
+        assert await service.get_suggested_input("ctx") == "pooled reply"
+        assert await service.get_suggested_input("ctx") == "pooled reply"
+        assert service._get_client() is first
+        await service.aclose()
+
+    async def test_aclose_closes_client(self) -> None:
+        """Test that aclose closes the pool and allows a fresh client later."""
+        service = AssistantService(
+            Settings(), transport=httpx.MockTransport(self._reply_handler)
+        )
+        client = service._get_client()
+        await service.aclose()
+        assert client.is_closed
+        assert service._get_client() is not client
+        await service.aclose()
+
+    async def test_choices_constrain_reply(self) -> None:
+        """Test that the options are numbered and the reply maps onto one."""
+        payloads: list[dict[str, object]] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            payloads.append(json.loads(request.content))
+            content = "2." if len(payloads) == 1 else "maybe"
+            return httpx.Response(
+                200, json={"choices": [{"message": {"content": content}}]}
+            )
+
+        metrics = Metrics()
+        service = AssistantService(
+            Settings(assistant_cache_size=0),
+            transport=httpx.MockTransport(handler),
+            metrics=metrics,
+        )
+        choices = ["staging", "production"]
+        assert await service.get_suggested_input("Where?", choices) == "production"
+        assert await service.get_suggested_input("Where?", choices) is None
+        await service.aclose()
+
+        prompt = payloads[0]["messages"][1]["content"]  # type: ignore[index]
+        assert "1. staging\n2. production" in prompt
+        assert payloads[0]["max_tokens"] == AssistantService.CHOICE_MAX_TOKENS
+        assert metrics.assistant_errors.value("invalid_choice") == 1
+
+    async def test_http2_falls_back_without_h2(self) -> None:
+        """Test that HTTP/2 is disabled when the h2 package is missing."""
+        service = AssistantService(Settings(assistant_http2=True))
+        with patch("importlib.util.find_spec", return_value=None):
+            client = service._get_client()
+        assert client is not None
+        await service.aclose()
+
+    async def test_keep_alive_against_stub(self) -> None:
+        """Test that several fallbacks reuse a single TCP connection."""
+        with StubAssistant(reply="from stub") as stub:
+            service = AssistantService(
+                Settings(assistant_host=stub.host, assistant_port=stub.port)
+            )
+            for i in range(5):
+                assert await service.get_suggested_input(f"ctx {i}") == "from stub"
+            await service.aclose()
+        assert stub.requests == 5
+        assert len(stub.connections) == 1
+
+
+class TestInputServicePrefetch:
+    """Tests for speculative assistant prefetching in InputService."""
+
+    @staticmethod
+    def _service(
+        settings: Settings, answer: str | None, assistant: AsyncMock
+    ) -> InputService:
+        """Create an InputService whose console answers after a short wait."""
+
+        async def ask(
+            _context: str,
+            _timeout: float,
+            _suggestion: str | None = None,
+            _choices: list[str] | None = None,
+        ) -> str | None:
+            await asyncio.sleep(0.05)
+            return answer
+
+        console = AsyncMock()
+        console.ask.side_effect = ask
+        return InputService(settings, MagicMock(), assistant, console)
+
+    async def test_prefetch_used_on_timeout(self, settings: Settings) -> None:
+        """Test that the prefetched suggestion is returned without extra wait."""
+        settings.assistant_prefetch = True
+
+        async def suggest(_context: str, _choices: list[str] | None) -> str:
+            await asyncio.sleep(0.02)
+            return "prefetched"
+
+        assistant = AsyncMock()
+        assistant.get_suggested_input.side_effect = suggest
+        service = self._service(settings, None, assistant)
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        response = await service.get_user_input("Run the tests?")
+        elapsed = loop.time() - start
+
+        assert response.source == "assistant"
+        assert response.input == "prefetched"
+        assert elapsed < 0.065
+        assistant.get_suggested_input.assert_awaited_once_with("Run the tests?", None)
+        stats = service.prefetch_stats
+        assert (stats.started, stats.used, stats.discarded) == (1, 1, 0)
+
+    async def test_prefetch_cancelled_when_user_answers(
+        self, settings: Settings
+    ) -> None:
+        """Test that a user answer cancels the in-flight prefetch."""
+        settings.assistant_prefetch = True
+        cancelled = asyncio.Event()
+
+        async def suggest(_context: str, _choices: list[str] | None) -> str:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "too late"
+
+        assistant = AsyncMock()
+        assistant.get_suggested_input.side_effect = suggest
+        service = self._service(settings, "from user", assistant)
+
+        response = await service.get_user_input("Deploy?")
+        assert response.source == "user"
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        stats = service.prefetch_stats
+        assert (stats.started, stats.used, stats.discarded) == (1, 0, 1)
+
+    async def test_prefetch_disabled_by_default(self, settings: Settings) -> None:
+        """Test that the assistant is only called after the timeout by default."""
+        assistant = AsyncMock()
+        assistant.get_suggested_input.return_value = "late"
+        service = self._service(settings, "from user", assistant)
+
+        response = await service.get_user_input("Deploy?")
+        assert response.source == "user"
+        assistant.get_suggested_input.assert_not_called()
+        assert service.prefetch_stats.started == 0
+
+
+class TestAnswerMemory:
+    """Tests for the persistent answer memory."""
+
+    def test_exact_match_ignores_case_and_whitespace(self, tmp_path: Path) -> None:
+        """Test that contexts are matched after normalization."""
+        memory = AnswerMemory(tmp_path / "answers.db", 0.9)
+        memory.record("Run the  migrations?", "yes")
+        match = memory.lookup("run the migrations?")
+        assert match is not None
+        assert (match.answer, match.similarity, match.uses) == ("yes", 1.0, 1)
+
+    def test_fuzzy_match(self, tmp_path: Path) -> None:
+        """Test that a near-identical context reuses the answer."""
+        memory = AnswerMemory(tmp_path / "answers.db", 0.8)
+        memory.record("Should I overwrite config/settings.yaml?", "no")
+        memory.record("Should I delete the build directory?", "yes")
+        match = memory.lookup("Should I overwrite config/setting.yaml?")
+        assert match is not None
+        assert match.answer == "no"
+        assert 0.8 <= match.similarity < 1.0
+
+    def test_dissimilar_context_misses(self, tmp_path: Path) -> None:
+        """Test that contexts below the minimum similarity are not matched."""
+        memory = AnswerMemory(tmp_path / "answers.db", 0.9)
+        memory.record("Should I overwrite config/settings.yaml?", "no")
+        assert memory.lookup("Should I overwrite config/other.yaml?") is None
+        assert memory.lookup("Push to main?") is None
+        assert memory.lookup("") is None
+
+    def test_exact_only(self, tmp_path: Path) -> None:
+        """Test that a minimum similarity of 1.0 disables fuzzy matching."""
+        memory = AnswerMemory(tmp_path / "answers.db", 1.0)
+        memory.record("Deploy to staging?", "yes")
+        assert memory.lookup("deploy to staging?") is not None
+        assert memory.lookup("Deploy to staging") is None
+
+    def test_persists_and_counts_uses(self, tmp_path: Path) -> None:
+        """Test that answers survive a reopen and re-answers update them."""
+        path = tmp_path / "nested" / "answers.db"
+        memory = AnswerMemory(path, 0.9)
+        memory.record("Deploy to staging?", "yes")
+        memory.record("Deploy to staging?", "yes, after the tests")
+        memory.close()
+
+        reopened = AnswerMemory(path, 0.9)
+        assert len(reopened) == 1
+        match = reopened.lookup("Deploy to staging?")
+        assert match is not None
+        assert (match.answer, match.uses) == ("yes, after the tests", 2)
+        reopened.record("Deploy the release branch to staging now?", "no")
+        match = reopened.lookup("Deploy the release branch to staging now")
+        assert match is not None
+        assert match.answer == "no"
+        reopened.close()
+
+
+class TestInputServiceAnswerMemory:
+    """Tests for answering input requests from the answer memory."""
+
+    @staticmethod
+    def _service(
+        settings: Settings, memory: AnswerMemory, answer: str | None
+    ) -> tuple[InputService, AsyncMock, MagicMock, AsyncMock]:
+        """Create an InputService whose console returns the given answer."""
+        console = AsyncMock()
+        console.ask.return_value = answer
+        notifications = MagicMock()
+        assistant = AsyncMock()
+        assistant.get_suggested_input.return_value = "from assistant"
+        service = InputService(
+            settings, notifications, assistant, console, memory=memory
+        )
+        return service, console, notifications, assistant
+
+    async def test_user_answer_is_recorded(
+        self, settings: Settings, tmp_path: Path
+    ) -> None:
+        """Test that answers typed by the user are remembered."""
+        memory = AnswerMemory(tmp_path / "answers.db", 0.9)
+        service, console, _, _ = self._service(settings, memory, "yes")
+        response = await service.get_user_input("Deploy?")
+        assert response == UserInputResponse(input="yes", source="user")
+        console.ask.assert_awaited_once_with(
+            "Deploy?", settings.input_timeout, None, None
+        )
+        match = memory.lookup("Deploy?")
+        assert match is not None
+        assert match.answer == "yes"
+
+    async def test_auto_policy_skips_prompt(
+        self, settings: Settings, tmp_path: Path
+    ) -> None:
+        """Test that a remembered answer is returned without asking anyone."""
+        settings.answer_memory_policy = "auto"
+        memory = AnswerMemory(tmp_path / "answers.db", 0.9)
+        memory.record("Deploy to staging?", "yes")
+        service, console, notifications, assistant = self._service(
+            settings, memory, "ignored"
+        )
+        response = await service.get_user_input("deploy to staging?")
+        assert response == UserInputResponse(input="yes", source="memory")
+        console.ask.assert_not_called()
+        notifications.dispatch_input_request_notification.assert_not_called()
+        assistant.get_suggested_input.assert_not_called()
+
+    async def test_prefill_policy_user_overrides(
+        self, settings: Settings, tmp_path: Path
+    ) -> None:
+        """Test that the prompt offers the remembered answer and a reply wins."""
+        memory = AnswerMemory(tmp_path / "answers.db", 0.9)
+        memory.record("Deploy to staging?", "yes")
+        service, console, _, _ = self._service(settings, memory, "no")
+        response = await service.get_user_input("Deploy to staging?")
+        assert response == UserInputResponse(input="no", source="user")
+        console.ask.assert_awaited_once_with(
+            "Deploy to staging?", settings.input_timeout, "yes", None
+        )
+        match = memory.lookup("Deploy to staging?")
+        assert match is not None
+        assert (match.answer, match.uses) == ("no", 2)
+
+    async def test_prefill_policy_used_on_timeout(
+        self, settings: Settings, tmp_path: Path
+    ) -> None:
+        """Test that the remembered answer is used before the assistant."""
+        memory = AnswerMemory(tmp_path / "answers.db", 0.9)
+        memory.record("Deploy to staging?", "yes")
+        service, _, _, assistant = self._service(settings, memory, None)
+        response = await service.get_user_input("Deploy to staging?")
+        assert response == UserInputResponse(input="yes", source="memory")
+        assistant.get_suggested_input.assert_not_called()
+
+    async def test_memory_hit_skips_prefetch(
+        self, settings: Settings, tmp_path: Path
+    ) -> None:
+        """Test that the assistant is not asked when an answer is remembered."""
+        settings.assistant_prefetch = True
+        memory = AnswerMemory(tmp_path / "answers.db", 0.9)
+        memory.record("Deploy to staging?", "yes")
+        service, console, _, assistant = self._service(settings, memory, "no")
+        await service.get_user_input("Deploy to staging?")
+        assistant.get_suggested_input.assert_not_called()
+
+        console.ask_form.return_value = ["no", "later"]
+        await service.get_user_inputs(["Deploy to staging?", "Tag it?"])
+        assistant.get_suggested_input.assert_called_once_with("Tag it?", None)
+        assert service.prefetch_stats.started == 1
+
+
+async def _wait_written(transcript: TranscriptLog, count: int) -> None:
+    """Wait until the flusher has written the given number of records."""
+    while transcript.stats.written < count:
+        await asyncio.sleep(0.001)
+
+
+class TestTranscriptLog:
+    """Tests for the background JSONL transcript writer."""
+
+    async def test_records_appended_as_json_lines(self, tmp_path: Path) -> None:
+        """Test that queued records end up in the file, in order."""
+        path = tmp_path / "logs" / "transcript.jsonl"
+        transcript = TranscriptLog(path, max_bytes=1_000_000, backup_count=2)
+        for i in range(3):
+            assert transcript.record({"context": f"Q{i}?", "answer": "é"})
+        assert not path.exists()
+
+        await transcript.aclose()
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["context"] for line in lines] == ["Q0?", "Q1?", "Q2?"]
+        assert '"é"' in lines[0]
+        assert transcript.stats.written == 3
+        assert transcript.record({"context": "late"}) is False
+
+    async def test_full_queue_drops_records(self, tmp_path: Path) -> None:
+        """Test that records beyond the queue size are dropped, not awaited."""
+        transcript = TranscriptLog(
+            tmp_path / "transcript.jsonl", 1_000_000, 2, queue_size=2
+        )
+        assert [transcript.record({"n": n}) for n in range(4)] == [
+            True,
+            True,
+            False,
+            False,
+        ]
+        await transcript.aclose()
+        assert (transcript.stats.written, transcript.stats.dropped) == (2, 2)
+
+    async def test_drop_reasons_logged(
+        self, tmp_path: Path, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        """Test that a full queue and a closed transcript are told apart."""
+        transcript = TranscriptLog(
+            tmp_path / "transcript.jsonl", 1_000_000, 2, queue_size=1
+        )
+        for n in range(3):
+            transcript.record({"n": n})
+        await transcript.aclose()
+        transcript.record({"n": 3})
+        messages = [r.getMessage() for r in caplog.records]
+        assert messages.count("Transcript queue full, dropping records") == 1
+        assert messages.count("Transcript is closed, dropping record") == 1
+
+    async def test_fsync_interval(self, tmp_path: Path) -> None:
+        """Test that batches within the interval share one fsync."""
+        transcript = TranscriptLog(
+            tmp_path / "transcript.jsonl", 1_000_000, 2, fsync_interval=60
+        )
+        with patch("copilot_interactive.services.transcript.os.fsync") as fsync:
+            for n in range(3):
+                transcript.record({"n": n})
+                await _wait_written(transcript, n + 1)
+            assert fsync.call_count == 1
+            await transcript.aclose()
+            assert fsync.call_count == 2
+
+    @pytest.mark.parametrize("compress", [False, True])
+    async def test_rotation_keeps_backups(
+        self, tmp_path: Path, *, compress: bool
+    ) -> None:
+        """Test that full segments are rotated and only the newest are kept."""
+        path = tmp_path / "transcript.jsonl"
+        transcript = TranscriptLog(
+            path, max_bytes=40, backup_count=2, compress=compress
+        )
+        for n in range(5):
+            transcript.record({"answer": str(n) * 20})
+            await _wait_written(transcript, n + 1)
+        await transcript.aclose()
+
+        suffix = ".gz" if compress else ""
+        first, second = (tmp_path / f"transcript.jsonl.{i}{suffix}" for i in (1, 2))
+        assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+            [path.name, first.name, second.name]
+        )
+        read = gzip.decompress if compress else bytes
+        assert b"4444" in path.read_bytes()
+        assert b"3333" in read(first.read_bytes())
+        assert b"2222" in read(second.read_bytes())
+        assert transcript.stats.rotations == 4
+
+    async def test_write_failure_counted(self, tmp_path: Path) -> None:
+        """Test that a failed write is logged and counted, not raised."""
+        blocker = tmp_path / "not-a-dir"
+        blocker.write_text("")
+        transcript = TranscriptLog(blocker / "transcript.jsonl", 1_000_000, 2)
+        transcript.record({"n": 1})
+        await transcript.aclose()
+        assert (transcript.stats.written, transcript.stats.failed) == (0, 1)
+
+
+class TestInputServiceTranscript:
+    """Tests for recording answered prompts in the transcript."""
+
+    async def test_answers_recorded(self, settings: Settings, tmp_path: Path) -> None:
+        """Test that single and batch answers are recorded with their timing."""
+        path = tmp_path / "transcript.jsonl"
+        transcript = TranscriptLog(path, 1_000_000, 2)
+        console = AsyncMock()
+        console.ask.return_value = "yes"
+        console.ask_form.return_value = ["staging", None]
+        service = InputService(
+            settings, MagicMock(), AsyncMock(), console, transcript=transcript
+        )
+
+        timing = RequestTiming("req-1")
+        token = timing.activate()
+        try:
+            await service.get_user_input("Deploy?")
+        finally:
+            RequestTiming.deactivate(token)
+        await service.get_user_inputs(["Where?", ""])
+        await transcript.aclose()
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [(r["context"], r["answer"], r["source"]) for r in records] == [
+            ("Deploy?", "yes", "user"),
+            ("Where?", "staging", "user"),
+            ("", "no response provided", "default"),
+        ]
+        assert records[0]["request_id"] == "req-1"
+        assert [s["name"] for s in records[0]["spans"]] == ["terminal_wait"]
+        # Without the timing middleware the service times the flow itself
+        assert len(records[1]["request_id"]) == 32
+        assert records[2]["request_id"] == records[1]["request_id"]
+        assert [s["name"] for s in records[1]["spans"]] == ["terminal_wait"]
+        assert records[1]["duration_ms"] >= 0
+
+
+class TestInputServiceBatch:
+    """Tests for asking several questions as one form."""
+
+    @staticmethod
+    def _service(
+        settings: Settings,
+        answers: list[str | None],
+        memory: AnswerMemory | None = None,
+    ) -> tuple[InputService, AsyncMock, MagicMock, AsyncMock]:
+        """Create an InputService whose console form returns the given answers."""
+        console = AsyncMock()
+        console.ask_form.return_value = answers
+        notifications = MagicMock()
+
+        async def suggest(context: str, _choices: list[str] | None) -> str:
+            await asyncio.sleep(0.1)
+            return f"suggested for {context}"
+
+        assistant = AsyncMock()
+        assistant.get_suggested_input.side_effect = suggest
+        service = InputService(
+            settings, notifications, assistant, console, memory=memory
+        )
+        return service, console, notifications, assistant
+
+    async def test_one_form_and_notification(self, settings: Settings) -> None:
+        """Test that all questions share one form and one notification."""
+        service, console, notifications, assistant = self._service(
+            settings, ["staging", "1.4.2"]
+        )
+        responses = await service.get_user_inputs(["Where?", "Which version?"])
+        assert responses == [
+            UserInputResponse(input="staging", source="user"),
+            UserInputResponse(input="1.4.2", source="user"),
+        ]
+        console.ask_form.assert_awaited_once_with(
+            ["Where?", "Which version?"], settings.input_timeout, [None, None]
+        )
+        notifications.dispatch_input_request_notification.assert_called_once()
+        assistant.get_suggested_input.assert_not_called()
+
+    async def test_fallbacks_run_concurrently(self, settings: Settings) -> None:
+        """Test that unanswered questions ask the assistant at the same time."""
+        service, _, _, assistant = self._service(settings, [None, "yes", None, None])
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        responses = await service.get_user_inputs(["A?", "B?", "C?", ""])
+        elapsed = loop.time() - start
+
+        assert [r.source for r in responses] == [
+            "assistant",
+            "user",
+            "assistant",
+            "default",
+        ]
+        assert responses[2].input == "suggested for C?"
+        assert assistant.get_suggested_input.await_count == 2
+        assert elapsed < 0.18  # two 0.1 s suggestions overlapped
+
+    async def test_memory_per_question(
+        self, settings: Settings, tmp_path: Path
+    ) -> None:
+        """Test that remembered answers are offered and used per question."""
+        memory = AnswerMemory(tmp_path / "answers.db", 0.9)
+        memory.record("Deploy to staging?", "yes")
+        service, console, _, assistant = self._service(
+            settings, [None, "later"], memory
+        )
+        responses = await service.get_user_inputs(["Deploy to staging?", "When?"])
+        assert responses == [
+            UserInputResponse(input="yes", source="memory"),
+            UserInputResponse(input="later", source="user"),
+        ]
+        console.ask_form.assert_awaited_once_with(
+            ["Deploy to staging?", "When?"], settings.input_timeout, ["yes", None]
+        )
+        assistant.get_suggested_input.assert_not_called()
+        match = memory.lookup("When?")
+        assert match is not None
+        assert match.answer == "later"
+
+    async def test_auto_memory_leaves_out_known_questions(
+        self, settings: Settings, tmp_path: Path
+    ) -> None:
+        """Test that the auto policy only shows questions without a memory."""
+        settings.answer_memory_policy = "auto"
+        memory = AnswerMemory(tmp_path / "answers.db", 0.9)
+        memory.record("Deploy to staging?", "yes")
+        service, console, _, _ = self._service(settings, ["tonight"], memory)
+        responses = await service.get_user_inputs(["When?", "Deploy to staging?"])
+        assert responses == [
+            UserInputResponse(input="tonight", source="user"),
+            UserInputResponse(input="yes", source="memory"),
+        ]
+        console.ask_form.assert_awaited_once_with(
+            ["When?"], settings.input_timeout, [None]
+        )
+
+
+class TestInputServiceChoices:
+    """Tests for multiple-choice input requests."""
+
+    @staticmethod
+    def _service(
+        settings: Settings, answer: str | None, memory: AnswerMemory | None = None
+    ) -> tuple[InputService, AsyncMock, AsyncMock]:
+        """Create an InputService whose console returns the given answer."""
+        console = AsyncMock()
+        console.ask.return_value = answer
+        assistant = AsyncMock()
+        assistant.get_suggested_input.return_value = "production"
+        service = InputService(settings, MagicMock(), assistant, console, memory=memory)
+        return service, console, assistant
+
+    async def test_default_choice_skips_assistant(self, settings: Settings) -> None:
+        """Test that the default answers an unanswered prompt at no cost."""
+        settings.assistant_prefetch = True
+        service, console, assistant = self._service(settings, None)
+        response = await service.get_user_input(
+            "Where?", ["staging", "production"], "staging"
+        )
+        assert response == UserInputResponse(input="staging", source="default")
+        console.ask.assert_awaited_once_with(
+            "Where?", settings.input_timeout, "staging", ["staging", "production"]
+        )
+        assistant.get_suggested_input.assert_not_called()
+        assert service.prefetch_stats.started == 0
+
+    async def test_user_choice_wins(self, settings: Settings) -> None:
+        """Test that the user's choice is returned over the default."""
+        service, _, _ = self._service(settings, "production")
+        response = await service.get_user_input(
+            "Where?", ["staging", "production"], "staging"
+        )
+        assert response == UserInputResponse(input="production", source="user")
+
+    async def test_assistant_constrained_without_default(
+        self, settings: Settings
+    ) -> None:
+        """Test that the assistant is given the choices when there's no default."""
+        service, _, assistant = self._service(settings, None)
+        response = await service.get_user_input("Where?", ["staging", "production"])
+        assert response == UserInputResponse(input="production", source="assistant")
+        assistant.get_suggested_input.assert_awaited_once_with(
+            "Where?", ["staging", "production"]
+        )
+
+    async def test_memory_outside_choices_ignored(
+        self, settings: Settings, tmp_path: Path
+    ) -> None:
+        """Test that remembered answers are only used when they are a choice."""
+        memory = AnswerMemory(tmp_path / "answers.db", 0.9)
+        memory.record("Where?", "STAGING")
+        memory.record("Which branch?", "develop")
+        service, console, _ = self._service(settings, None, memory)
+
+        response = await service.get_user_input("Where?", ["staging", "production"])
+        assert response == UserInputResponse(input="staging", source="memory")
+        response = await service.get_user_input("Which branch?", ["main", "release"])
+        assert response == UserInputResponse(input="production", source="assistant")
+        assert console.ask.await_args_list[1].args[2] is None
+        memory.close()
+
+
+class TestInputServiceDeadline:
+    """Tests for fitting an input request into the caller's deadline."""
+
+    @staticmethod
+    def _service(
+        settings: Settings, answer: str | None = None
+    ) -> tuple[InputService, AsyncMock, AsyncMock]:
+        """Create an InputService whose console returns the given answer."""
+        console = AsyncMock()
+        console.ask.return_value = answer
+        assistant = AsyncMock()
+        assistant.get_suggested_input.return_value = "from assistant"
+        return (
+            InputService(settings, MagicMock(), assistant, console),
+            console,
+            assistant,
+        )
+
+    async def test_terminal_wait_leaves_time_for_assistant(
+        self, settings: Settings
+    ) -> None:
+        """Test that the terminal wait ends in time for the assistant."""
+        settings.input_timeout = 540
+        settings.assistant_timeout = 10
+        service, console, _ = self._service(settings)
+        response = await service.get_user_input("Deploy?", deadline=time.time() + 60)
+        assert response.source == "assistant"
+        timeout = console.ask.await_args.args[1]
+        assert 49 < timeout <= 50
+
+        # Half of a short budget is kept for the assistant
+        await service.get_user_input("Deploy?", deadline=time.time() + 6)
+        assert 2.9 < console.ask.await_args.args[1] <= 3
+
+    async def test_whole_budget_without_fallback(self, settings: Settings) -> None:
+        """Test that the terminal gets all the time when no fallback is needed."""
+        settings.input_timeout = 540
+        service, console, assistant = self._service(settings)
+        response = await service.get_user_input(
+            "Go?", ["yes", "no"], "no", deadline=time.time() + 60
+        )
+        assert response == UserInputResponse(input="no", source="default")
+        assert 59 < console.ask.await_args.args[1] <= 60
+        assistant.get_suggested_input.assert_not_called()
+
+    async def test_assistant_cut_off_at_deadline(self, settings: Settings) -> None:
+        """Test that a slow assistant is abandoned when the deadline comes."""
+        service, _, assistant = self._service(settings)
+
+        async def slow(_context: str, _choices: list[str] | None) -> str:
+            await asyncio.sleep(10)
+            return "too late"
+
+        assistant.get_suggested_input.side_effect = slow
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        response = await service.get_user_input("Deploy?", deadline=time.time() + 0.2)
+        assert response == UserInputResponse(
+            input="no response provided", source="default"
+        )
+        assert loop.time() - start < 0.5
+
+    async def test_no_time_left_skips_prompt(self, settings: Settings) -> None:
+        """Test that the prompt is not shown when no time is left for it."""
+        service, console, _ = self._service(settings)
+        await service.get_user_input("", deadline=time.time() + 0.01)
+        console.ask.assert_not_called()
+
+    async def test_coalescing_respects_deadlines(self, settings: Settings) -> None:
+        """Test that a request only joins a shared prompt ending by its deadline."""
+        settings.input_coalescing = True
+        service, console, _ = self._service(settings)
+        release = asyncio.Event()
+
+        async def ask(*_args: object) -> str:
+            await release.wait()
+            return "yes"
+
+        console.ask.side_effect = ask
+        tasks = [
+            asyncio.create_task(service.get_user_input("Deploy?", deadline=d))
+            for d in (time.time() + 60, time.time() + 120, time.time() + 30)
+        ]
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(*tasks)
+        # The second joins the first; the third needs an earlier answer
+        assert console.ask.await_count == 2
+        assert service._metrics.input_coalesced.value() == 1
+
+
+class TestInputServiceCancellation:
+    """Tests for abandoning an input request part way through."""
+
+    @staticmethod
+    def _service(settings: Settings) -> tuple[InputService, AsyncMock, list]:
+        """Create an InputService whose console and notifications never finish."""
+        started: list[asyncio.Task[bool]] = []
+
+        async def notify() -> bool:
+            await asyncio.sleep(10)
+            return True
+
+        def dispatch(_context: str) -> asyncio.Task[bool]:
+            started.append(asyncio.create_task(notify()))
+            return started[-1]
+
+        notifications = MagicMock()
+        notifications.dispatch_input_request_notification.side_effect = dispatch
+
+        async def never(*_args: object) -> None:
+            await asyncio.sleep(10)
+
+        console = AsyncMock()
+        console.ask.side_effect = never
+        console.ask_form.side_effect = never
+        assistant = AsyncMock()
+        assistant.get_suggested_input.side_effect = never
+        service = InputService(settings, notifications, assistant, console)
+        return service, assistant, started
+
+    @pytest.mark.parametrize("batch", [False, True])
+    async def test_cancel_stops_notification_and_prefetch(
+        self, settings: Settings, *, batch: bool
+    ) -> None:
+        """Test that cancelling a request cancels the work done on its behalf."""
+        settings.assistant_prefetch = True
+        service, assistant, started = self._service(settings)
+        task = asyncio.create_task(
+            service.get_user_inputs(["Where?", "When?"])
+            if batch
+            else service.get_user_input("Where?")
+        )
+        await asyncio.sleep(0.01)
+        assert started
+        assert assistant.get_suggested_input.await_count == (2 if batch else 1)
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+        assert all(notification.cancelled() for notification in started)
+        assert not [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+
+class FakeClock:
+    """Manually advanced wall clock."""
+
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestSuggestionCache:
+    """Tests for the LRU + TTL suggestion cache."""
+
+    def test_make_key_normalizes_context(self) -> None:
+        """Test that keys ignore case and whitespace but not the model."""
+        key = SuggestionCache.make_key("Run the tests?", "m1")
+        assert SuggestionCache.make_key("  run  THE tests? ", "m1") == key
+        assert SuggestionCache.make_key("Run the tests?", "m2") != key
+
+    def test_lru_eviction(self) -> None:
+        """Test that the least recently used entry is evicted."""
+        cache = SuggestionCache(max_size=2, ttl=60)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        assert cache.get("a") == "1"
+        cache.put("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.get("c") == "3"
+        assert cache.stats.evictions == 1
+
+    def test_ttl_expiry(self) -> None:
+        """Test that entries expire after the TTL."""
+        clock = FakeClock()
+        cache = SuggestionCache(max_size=10, ttl=60, clock=clock)
+        cache.put("a", "1")
+        clock.now += 59
+        assert cache.get("a") == "1"
+        clock.now += 2
+        assert cache.get("a") is None
+        assert cache.stats.expirations == 1
+        assert len(cache) == 0
+
+    async def test_hits_and_misses(self) -> None:
+        """Test that a repeated key is served from the cache."""
+        cache = SuggestionCache(max_size=10, ttl=60)
+        fetch = AsyncMock(return_value="yes")
+        assert await cache.get_or_fetch("k", fetch) == "yes"
+        assert await cache.get_or_fetch("k", fetch) == "yes"
+        assert fetch.await_count == 1
+        assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+    async def test_failures_are_not_cached(self) -> None:
+        """Test that a missing suggestion is fetched again next time."""
+        cache = SuggestionCache(max_size=10, ttl=60)
+        fetch = AsyncMock(return_value=None)
+        assert await cache.get_or_fetch("k", fetch) is None
+        assert await cache.get_or_fetch("k", fetch) is None
+        assert fetch.await_count == 2
+
+    async def test_single_flight(self) -> None:
+        """Test that concurrent identical lookups share one fetch."""
+        cache = SuggestionCache(max_size=10, ttl=60)
+        calls = 0
+
+        async def fetch() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "shared"
+
+        results = await asyncio.gather(
+            *(cache.get_or_fetch("k", fetch) for _ in range(10))
+        )
+        assert results == ["shared"] * 10
+        assert calls == 1
+        assert (cache.stats.misses, cache.stats.shared) == (1, 9)
+
+    async def test_cancelled_caller_keeps_shared_fetch(self) -> None:
+        """Test that cancelling one waiter does not cancel the others."""
+        cache = SuggestionCache(max_size=10, ttl=60)
+
+        async def fetch() -> str:
+            await asyncio.sleep(0.01)
+            return "done"
+
+        first = asyncio.create_task(cache.get_or_fetch("k", fetch))
+        second = asyncio.create_task(cache.get_or_fetch("k", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "done"
+        assert cache.get("k") == "done"
+
+    async def test_last_caller_cancels_fetch(self) -> None:
+        """Test that the fetch is cancelled once no caller waits for it."""
+        cache = SuggestionCache(max_size=10, ttl=60)
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def fetch() -> str:
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "unused"
+
+        callers = [asyncio.create_task(cache.get_or_fetch("k", fetch)) for _ in "ab"]
+        await started.wait()
+        for caller in callers:
+            caller.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        assert cache.get("k") is None
+        assert not cache._inflight
+
+    def test_snapshot_round_trip(self, tmp_path: Path) -> None:
+        """Test that unexpired entries survive a restart."""
+        clock = FakeClock()
+        path = tmp_path / "cache.json"
+        cache = SuggestionCache(max_size=10, ttl=60, snapshot_path=path, clock=clock)
+        cache.put("fresh", "1")
+        clock.now -= 120
+        cache.put("stale", "2")
+        clock.now += 120
+        cache.save_snapshot()
+
+        restored = SuggestionCache(max_size=10, ttl=60, snapshot_path=path, clock=clock)
+        assert restored.get("fresh") == "1"
+        assert restored.get("stale") is None
+
+    def test_corrupt_snapshot_is_ignored(self, tmp_path: Path) -> None:
+        """Test that an unreadable snapshot starts an empty cache."""
+        path = tmp_path / "cache.json"
+        path.write_text("not json")
+        cache = SuggestionCache(max_size=10, ttl=60, snapshot_path=path)
+        assert len(cache) == 0
+
+    @pytest.mark.parametrize(
+        "snapshot", ["[]", '"entries"', '{"version": 1, "entries": {}}']
+    )
+    def test_non_object_snapshot_is_ignored(
+        self, tmp_path: Path, snapshot: str
+    ) -> None:
+        """Test that a snapshot of the wrong shape starts an empty cache."""
+        path = tmp_path / "cache.json"
+        path.write_text(snapshot)
+        cache = SuggestionCache(max_size=10, ttl=60, snapshot_path=path)
+        assert len(cache) == 0
+
+    def test_malformed_entries_are_skipped(self, tmp_path: Path) -> None:
+        """Test that bad entries are dropped and the good ones kept."""
+        path = tmp_path / "cache.json"
+        entries = [["ok", "1", 1e12], ["short", "1"], [1, "1", 1e12], "x", None]
+        path.write_text(json.dumps({"version": 1, "entries": entries}))
+        cache = SuggestionCache(max_size=10, ttl=60, snapshot_path=path)
+        assert len(cache) == 1
+        assert cache.get("ok") == "1"
+
+
+class TestAssistantServiceCache:
+    """Tests for the suggestion cache in AssistantService."""
+
+    async def test_repeated_context_skips_round_trip(self) -> None:
+        """Test that a repeated context is answered from the cache."""
+        requests = 0
+
+        def handler(_request: httpx.Request) -> httpx.Response:
+            nonlocal requests
+            requests += 1
+            return httpx.Response(
+                200, json={"choices": [{"message": {"content": "cached"}}]}
+            )
+
+        service = AssistantService(
+            Settings(assistant_cache_size=256),
+            transport=httpx.MockTransport(handler),
+        )
+        assert await service.get_suggested_input("Should I continue?") == "cached"
+        assert await service.get_suggested_input("should I continue? ") == "cached"
+        assert requests == 1
+        stats = service.cache_stats
+        assert stats is not None
+        assert (stats.hits, stats.misses) == (1, 1)
+        await service.aclose()
+
+    async def test_cache_disabled_by_default(self) -> None:
+        """Test that the cache is only used when given a size."""
+        service = AssistantService(Settings())
+        assert service.cache_stats is None
+        await service.aclose()
+
+    async def test_snapshot_saved_on_close(self, tmp_path: Path) -> None:
+        """Test that closing the service writes the cache snapshot."""
+        path = tmp_path / "cache.json"
+        service = AssistantService(
+            Settings(assistant_cache_size=256, assistant_cache_path=str(path)),
+            transport=httpx.MockTransport(TestAssistantServiceClient._reply_handler),
+        )
+        await service.get_suggested_input("ctx")
+        await service.aclose()
+        assert "pooled reply" in path.read_text()
+
+
+class TestAssistantServiceStreaming:
+    """Tests for streamed assistant completions."""
+
+    @pytest.fixture
+    def service(self) -> AssistantService:
+        """Create an AssistantService instance for testing."""
+        return AssistantService(Settings())
+
+    def test_parse_stream_delta(self, service: AssistantService) -> None:
+        """Test parsing a content delta event."""
+        line = 'data: {"choices": [{"delta": {"content": "Hel"}}]}'
+        assert service._parse_stream_event(line) == ("Hel", False)
+
+    def test_parse_stream_finish(self, service: AssistantService) -> None:
+        """Test parsing the finishing event and the DONE sentinel."""
+        line = 'data: {"choices": [{"delta": {}, "finish_reason": "stop"}]}'
+        assert service._parse_stream_event(line) == ("", True)
+        assert service._parse_stream_event("data: [DONE]") == ("", True)
+
+    def test_parse_stream_ignores_other_lines(self, service: AssistantService) -> None:
+        """Test that comments, blank lines and bad JSON are ignored."""
+        assert service._parse_stream_event("") == ("", False)
+        assert service._parse_stream_event(": keep-alive") == ("", False)
+        assert service._parse_stream_event("data: {oops") == ("", False)
+        assert service._parse_stream_event('data: {"choices": []}') == ("", False)
+
+    async def test_returns_at_first_line(self) -> None:
+        """Test that the stream is cut off once the first line is complete."""
+        # Streaming the whole reply would take seconds, far longer than needed
+        reply = "yes\n" + "explanation that keeps going " * 20
+        with StubAssistant(reply=reply, chunk_size=4, chunk_delay=0.02) as stub:
+            service = AssistantService(
+                Settings(
+                    assistant_host=stub.host,
+                    assistant_port=stub.port,
+                    assistant_streaming=True,
+                )
+            )
+            assert await service.get_suggested_input("Continue?") == "yes"
+            await service.aclose()
+
+            for _ in range(500):
+                if stub.disconnects:
+                    break
+                await asyncio.sleep(0.01)
+            # The stub saw the client hang up with most of the reply unsent
+            assert stub.disconnects == 1
+            assert stub.chunks_sent < len(reply) // 4 // 2
+
+    async def test_single_line_reply(self) -> None:
+        """Test that a reply without newline ends at the finish event."""
+        with StubAssistant(reply="  run all migrations  ") as stub:
+            service = AssistantService(
+                Settings(
+                    assistant_host=stub.host,
+                    assistant_port=stub.port,
+                    assistant_streaming=True,
+                )
+            )
+            assert await service.get_suggested_input("Which?") == "run all migrations"
+            await service.aclose()
+
+    async def test_non_streaming_reply(self) -> None:
+        """Test that a server ignoring the stream flag is still parsed."""
+        service = AssistantService(
+            Settings(assistant_streaming=True),
+            transport=httpx.MockTransport(TestAssistantServiceClient._reply_handler),
+        )
+        assert await service.get_suggested_input("ctx") == "pooled reply"
+        await service.aclose()
+
+    async def test_error_status(self) -> None:
+        """Test that an error status yields no suggestion."""
+        service = AssistantService(
+            Settings(assistant_streaming=True),
+            transport=httpx.MockTransport(lambda _r: httpx.Response(503, text="busy")),
+        )
+        assert await service.get_suggested_input("ctx") is None
+        await service.aclose()
+
+
+class TestNotificationDispatch:
+    """Tests for background notification dispatch."""
+
+    @pytest.fixture
+    def notification_settings(self) -> Settings:
+        """Create settings with notifications enabled."""
+        return Settings(
+            notification_enabled=True,
+            notification_timeout=0.2,
+            notification_max_concurrency=2,
+        )
+
+    async def test_dispatch_does_not_wait(
+        self, notification_settings: Settings
+    ) -> None:
+        """Test that dispatch returns before the notifier finishes."""
+        service = NotificationService(notification_settings, backend=AsyncMock())
+        release = asyncio.Event()
+
+        async def slow_send(_context: str | None = None) -> bool:
+            await release.wait()
+            return True
+
+        with patch.object(service, "send_input_request_notification", slow_send):
+            task = service.dispatch_input_request_notification("ctx")
+            assert task is not None
+            assert not task.done()
+            release.set()
+            assert await task is True
+        assert (service.stats.dispatched, service.stats.sent) == (1, 1)
+
+    async def test_dispatch_disabled(self, settings: Settings) -> None:
+        """Test that nothing is scheduled when notifications are disabled."""
+        service = NotificationService(settings)
+        assert service.dispatch_input_request_notification("ctx") is None
+        assert service.stats.dispatched == 0
+
+    async def test_concurrency_is_bounded(
+        self, notification_settings: Settings
+    ) -> None:
+        """Test that at most notification_max_concurrency notifiers run."""
+        service = NotificationService(notification_settings, backend=AsyncMock())
+        running = 0
+        peak = 0
+
+        async def send(_context: str | None = None) -> bool:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return True
+
+        with patch.object(service, "send_input_request_notification", send):
+            tasks = [service.dispatch_input_request_notification("c") for _ in range(6)]
+            await asyncio.gather(*(t for t in tasks if t is not None))
+        assert peak == 2
+        assert service.stats.sent == 6
+
+    async def test_failures_are_counted(self, notification_settings: Settings) -> None:
+        """Test that failed and raising notifiers are counted as failures."""
+        service = NotificationService(notification_settings, backend=AsyncMock())
+        send = AsyncMock(side_effect=[False, RuntimeError("boom")])
+        with patch.object(service, "send_input_request_notification", send):
+            for _ in range(2):
+                task = service.dispatch_input_request_notification("c")
+                assert task is not None
+                assert await task is False
+        assert service.stats.failed == 2
+        assert service.stats.total_seconds >= 0
+
+    async def test_hung_notifier_is_killed(
+        self, notification_settings: Settings
+    ) -> None:
+        """Test that a notifier exceeding the timeout is killed."""
+        sleeper = CommandNotifier(
+            [sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.2
+        )
+        service = NotificationService(notification_settings, backend=sleeper)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        assert await service.send_input_request_notification("ctx") is False
+        assert loop.time() - start < 5
+        assert service.stats.timed_out == 1
+
+    async def test_aclose_cancels_pending(
+        self, notification_settings: Settings
+    ) -> None:
+        """Test that closing the service cancels running notifications."""
+        service = NotificationService(notification_settings, backend=AsyncMock())
+
+        async def hang(_context: str | None = None) -> bool:
+            await asyncio.sleep(30)
+            return True
+
+        with patch.object(service, "send_input_request_notification", hang):
+            task = service.dispatch_input_request_notification("c")
+            await asyncio.sleep(0)
+            await service.aclose()
+        assert task is not None
+        assert task.cancelled()
+
+    async def test_prompt_not_blocked_by_notifier(
+        self, notification_settings: Settings
+    ) -> None:
+        """Test that the terminal wait starts while the notifier hangs."""
+        service = NotificationService(notification_settings, backend=AsyncMock())
+        console = AsyncMock()
+        console.ask.return_value = "answer"
+
+        async def hang(_context: str | None = None) -> bool:
+            await asyncio.sleep(30)
+            return True
+
+        with patch.object(service, "send_input_request_notification", hang):
+            input_service = InputService(
+                notification_settings, service, AsyncMock(), console
+            )
+            response = await asyncio.wait_for(
+                input_service.get_user_input("ctx"), timeout=1
+            )
+            await service.aclose()
+        assert response.source == "user"
+
+
+class TestNotifierBackends:
+    """Tests for the notifier backends."""
+
+    def test_backend_must_implement_send(self) -> None:
+        """Test that a backend without send fails when it is created."""
+
+        class Incomplete(NotifierBackend):
+            name = "incomplete"
+
+        with pytest.raises(TypeError):
+            Incomplete(timeout=1.0)  # type: ignore[abstract]
+
+    async def test_run_process_kills_on_timeout(self) -> None:
+        """Test that a hung process is killed and reported as a timeout."""
+        with pytest.raises(TimeoutError):
+            await run_process(
+                sys.executable, "-c", "import time; time.sleep(30)", timeout=0.1
+            )
+
+    async def test_command_notifier(self, tmp_path: Path) -> None:
+        """Test that the command notifier passes title and content."""
+        log = tmp_path / "notifications.jsonl"
+        notifier = CommandNotifier(stub_notifier_command(), timeout=10)
+        with patch.dict("os.environ", {"STUB_NOTIFIER_LOG": str(log)}):
+            assert await notifier.send("Title", "Body") is True
+        assert json.loads(log.read_text()) == {"title": "Title", "content": "Body"}
+
+    async def test_command_notifier_failure(self) -> None:
+        """Test that a non-zero exit status is a failed notification."""
+        notifier = CommandNotifier([sys.executable, "-c", "raise SystemExit(3)"], 10)
+        assert await notifier.send("Title", "Body") is False
+
+    async def test_helper_reuses_one_process(self, tmp_path: Path) -> None:
+        """Test that the helper backend keeps a single process alive."""
+        log = tmp_path / "notifications.jsonl"
+        notifier = HelperProcessNotifier(stub_notifier_command("--serve"), timeout=10)
+        with patch.dict("os.environ", {"STUB_NOTIFIER_LOG": str(log)}):
+            for i in range(5):
+                assert await notifier.send("Title", f"Body {i}") is True
+            await notifier.aclose()
+        assert notifier.starts == 1
+        assert len(log.read_text().splitlines()) == 5
+
+    async def test_helper_restarts_after_crash(self) -> None:
+        """Test that a helper that died is restarted transparently."""
+        notifier = HelperProcessNotifier(stub_notifier_command("--serve"), timeout=10)
+        with patch.dict("os.environ", {"STUB_NOTIFIER_EXIT_AFTER": "1"}):
+            for _ in range(3):
+                assert await notifier.send("Title", "Body") is True
+            await notifier.aclose()
+        assert notifier.starts == 3
+
+    async def test_helper_timeout_replaces_process(self) -> None:
+        """Test that an unresponsive helper is stopped and times out."""
+        notifier = HelperProcessNotifier(
+            [sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.1
+        )
+        with pytest.raises(TimeoutError):
+            await notifier.send("Title", "Body")
+        assert notifier._process is None
+        await notifier.aclose()
+
+    def test_discover_configured_backends(self) -> None:
+        """Test that command and helper backends come from the settings."""
+        command = Settings(notification_backend="command", notification_command="x")
+        helper = Settings(notification_backend="helper", notification_command="x y")
+        assert isinstance(discover_notifier(command), CommandNotifier)
+        assert isinstance(discover_notifier(helper), HelperProcessNotifier)
+        assert discover_notifier(Settings(notification_backend="command")) is None
+        assert discover_notifier(Settings(notification_backend="none")) is None
+
+    def test_discover_platform_backends(self) -> None:
+        """Test that executables are resolved once during discovery."""
+        with patch("shutil.which", return_value="/bin/notifier") as which:
+            termux = discover_notifier(Settings(notification_backend="termux"))
+            windows = discover_notifier(Settings(notification_backend="windows"))
+        assert isinstance(termux, TermuxNotifier)
+        assert isinstance(windows, WindowsToastNotifier)
+        assert which.call_count == 2
+
+    def test_discover_nothing_available(self) -> None:
+        """Test that no backend is used when no notifier is installed."""
+        with (
+            patch("shutil.which", return_value=None),
+            patch(
+                "copilot_interactive.services.notifiers.is_windows",
+                return_value=False,
+            ),
+        ):
+            assert discover_notifier(Settings()) is None
+
+
+class TestJobService:
+    """Tests for background input jobs."""
+
+    async def test_job_lifecycle(self, settings: Settings) -> None:
+        """Test that a job is pending until the input flow finishes."""
+        input_service = AsyncMock()
+        input_service.get_user_input.return_value = UserInputResponse(
+            input="yes", source="user"
+        )
+        service = JobService(settings, input_service)
+        job = service.submit("Continue?")
+        assert job.status == "pending"
+        assert service.get(job.id) is job
+
+        await service.wait(job, timeout=1)
+        assert job.status == "user"
+        assert job.result == UserInputResponse(input="yes", source="user")
+
+    async def test_failed_job_returns_default(self, settings: Settings) -> None:
+        """Test that an unexpected error still finishes the job."""
+        input_service = AsyncMock()
+        input_service.get_user_input.side_effect = RuntimeError("boom")
+        service = JobService(settings, input_service)
+        job = service.submit("Continue?")
+        await service.wait(job, timeout=1)
+        assert job.status == "default"
+
+    async def test_waiter_cancellation_keeps_job(self, settings: Settings) -> None:
+        """Test that a dropped long-poll does not cancel the job."""
+        input_service = AsyncMock()
+        release = asyncio.Event()
+
+        async def get_user_input(_context: str) -> UserInputResponse:
+            await release.wait()
+            return UserInputResponse(input="late", source="user")
+
+        input_service.get_user_input.side_effect = get_user_input
+        service = JobService(settings, input_service)
+        job = service.submit("Continue?")
+        waiter = asyncio.create_task(service.wait(job, timeout=10))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        release.set()
+        await service.wait(job, timeout=1)
+        assert job.status == "user"
+
+    async def test_finished_jobs_expire(self, settings: Settings) -> None:
+        """Test that finished jobs are forgotten after the retention period."""
+        settings.job_retention = 0
+        input_service = AsyncMock()
+        input_service.get_user_input.return_value = UserInputResponse(
+            input="yes", source="user"
+        )
+        service = JobService(settings, input_service)
+        job = service.submit("Continue?")
+        await service.wait(job, timeout=1)
+        await asyncio.sleep(0.01)
+        assert service.get(job.id) is None
+
+    async def test_aclose_cancels_running_jobs(self, settings: Settings) -> None:
+        """Test that shutdown cancels jobs still waiting for input."""
+        input_service = AsyncMock()
+
+        async def get_user_input(_context: str) -> UserInputResponse:
+            await asyncio.sleep(30)
+            return UserInputResponse(input="never", source="user")
+
+        input_service.get_user_input.side_effect = get_user_input
+        service = JobService(settings, input_service)
+        job = service.submit("Continue?")
+        await asyncio.sleep(0)
+        await service.aclose()
+        assert job.task is not None
+        assert job.task.cancelled()
+        assert job.status == "pending"
+
+
+class TestMetrics:
+    """Tests for the metric primitives and the Prometheus text output."""
+
+    def test_counter_render(self) -> None:
+        """Test that labelled counters render one sample per label value."""
+        counter = Counter("requests_total", "Requests.", labelnames=("type",))
+        counter.inc("timeout")
+        counter.inc("timeout")
+        counter.inc('bad "quote"', amount=3)
+        assert counter.render() == [
+            "# HELP requests_total Requests.",
+            "# TYPE requests_total counter",
+            'requests_total{type="bad \\"quote\\""} 3',
+            'requests_total{type="timeout"} 2',
+        ]
+
+    def test_unlabelled_counter_starts_at_zero(self) -> None:
+        """Test that an unlabelled counter is exported before any event."""
+        counter = Counter("timeouts_total", "Timeouts.")
+        assert counter.render()[-1] == "timeouts_total 0"
+
+    def test_metric_must_implement_samples(self) -> None:
+        """Test that a metric without samples fails when it is created."""
+
+        class Incomplete(Metric):
+            kind = "gauge"
+
+        with pytest.raises(TypeError):
+            Incomplete("incomplete", "Incomplete.")  # type: ignore[abstract]
+
+    def test_histogram_buckets_are_cumulative(self) -> None:
+        """Test bucket boundaries, cumulative counts, sum and count."""
+        histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value)
+        assert histogram.render()[2:] == [
+            'latency_seconds_bucket{le="0.1"} 2',
+            'latency_seconds_bucket{le="1"} 3',
+            'latency_seconds_bucket{le="+Inf"} 4',
+            "latency_seconds_sum 2.65",
+            "latency_seconds_count 4",
+        ]
+        assert histogram.count() == 4
+
+    def test_registered_callback_metrics(self) -> None:
+        """Test that callback metrics are read at render time."""
+        metrics = Metrics()
+        pending = [1, 2]
+        metrics.gauge("pending_prompts", "Pending.", lambda: len(pending))
+        pending.append(3)
+        text = metrics.render()
+        assert "# TYPE copilot_interactive_pending_prompts gauge" in text
+        assert "copilot_interactive_pending_prompts 3\n" in text
+        assert text.endswith("\n")
+
+    async def test_input_latency_by_source(self, settings: Settings) -> None:
+        """Test that each answered request is recorded under its source."""
+        metrics = Metrics()
+        console = MagicMock()
+        console.ask = AsyncMock(side_effect=["yes", None])
+        assistant = AsyncMock()
+        assistant.get_suggested_input.return_value = None
+        service = InputService(
+            settings, MagicMock(), assistant, console, metrics=metrics
+        )
+        await service.get_user_input("Continue?")
+        await service.get_user_input("Continue?")
+        assert metrics.input_seconds.count("user") == 1
+        assert metrics.input_seconds.count("default") == 1
+        assert metrics.input_seconds.count("assistant") == 0
+
+    @pytest.mark.parametrize(
+        ("handler_error", "error_type"),
+        [
+            (httpx.ConnectTimeout("slow"), "timeout"),
+            (httpx.ConnectError("refused"), "connection"),
+        ],
+    )
+    async def test_assistant_transport_errors(
+        self, settings: Settings, handler_error: Exception, error_type: str
+    ) -> None:
+        """Test that transport failures are counted by type."""
+
+        def handler(_request: httpx.Request) -> httpx.Response:
+            raise handler_error
+
+        metrics = Metrics()
+        service = AssistantService(
+            settings, transport=httpx.MockTransport(handler), metrics=metrics
+        )
+        assert await service.get_suggested_input("Continue?") is None
+        await service.aclose()
+        assert metrics.assistant_errors.value(error_type) == 1
+        assert metrics.assistant_seconds.count() == 1
+
+    @pytest.mark.parametrize("streaming", [False, True])
+    @pytest.mark.parametrize(
+        ("status", "error_type"), [(503, "server_error"), (400, "http_status")]
+    )
+    async def test_assistant_http_status_error(
+        self, settings: Settings, streaming: bool, status: int, error_type: str
+    ) -> None:
+        """Test that error statuses are counted with and without streaming."""
+        settings.assistant_streaming = streaming
+        metrics = Metrics()
+        transport = httpx.MockTransport(lambda _r: httpx.Response(status, text="no"))
+        service = AssistantService(settings, transport=transport, metrics=metrics)
+        assert await service.get_suggested_input("Continue?") is None
+        await service.aclose()
+        assert metrics.assistant_errors.value(error_type) == 1
+
+    async def test_cancelled_call_not_recorded(self, settings: Settings) -> None:
+        """Test that a cancelled call (e.g. a discarded prefetch) is not an error."""
+        settings.assistant_cache_size = 0
+        release = asyncio.Event()
+
+        async def handler(_request: httpx.Request) -> httpx.Response:
+            await release.wait()
+            return httpx.Response(200, json={"choices": []})
+
+        metrics = Metrics()
+        service = AssistantService(
+            settings, transport=httpx.MockTransport(handler), metrics=metrics
+        )
+        task = asyncio.create_task(service.get_suggested_input("Continue?"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await service.aclose()
+        assert metrics.assistant_seconds.count() == 0
+        assert "copilot_interactive_assistant_errors_total{" not in metrics.render()
+
+    async def test_assistant_success_records_latency_only(
+        self, settings: Settings
+    ) -> None:
+        """Test that a successful call is timed but not counted as an error."""
+        metrics = Metrics()
+        transport = httpx.MockTransport(
+            lambda _r: httpx.Response(
+                200, json={"choices": [{"message": {"content": "yes"}}]}
+            )
+        )
+        service = AssistantService(settings, transport=transport, metrics=metrics)
+        assert await service.get_suggested_input("Continue?") == "yes"
+        await service.aclose()
+        assert metrics.assistant_seconds.count() == 1
+        assert "copilot_interactive_assistant_errors_total{" not in metrics.render()
+
+    async def test_notification_duration_and_failures(self, settings: Settings) -> None:
+        """Test that notification time and failures are recorded."""
+        settings.notification_enabled = True
+        metrics = Metrics()
+        backend = AsyncMock()
+        backend.send.side_effect = [True, False]
+        service = NotificationService(settings, backend=backend, metrics=metrics)
+        for _ in range(2):
+            task = service.dispatch_input_request_notification("Continue?")
+            assert task is not None
+            await task
+        await service.aclose()
+        assert metrics.notification_seconds.count() == 2
+        assert metrics.notification_failures.value() == 1
+
+
+class TestCircuitBreaker:
+    """Tests for the assistant circuit breaker."""
+
+    def test_opens_after_consecutive_failures(self) -> None:
+        """Test that the breaker opens at the threshold and refuses requests."""
+        breaker = CircuitBreaker(failure_threshold=3)
+        assert breaker.record_failure() is False
+        assert breaker.record_failure() is False
+        assert breaker.allow_request()
+        assert breaker.record_failure() is True
+        assert breaker.state == "open"
+        assert not breaker.allow_request()
+        assert breaker.opens == 1
+
+    def test_success_resets_failures(self) -> None:
+        """Test that only consecutive failures count."""
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == "closed"
+        assert breaker.consecutive_failures == 1
+
+    def test_success_closes_open_breaker(self) -> None:
+        """Test that a success (e.g. a probe) closes an open breaker."""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, clock=clock)
+        breaker.record_failure()
+        assert breaker.is_open
+        clock.now += 30
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.changed_at == clock.now
+        assert breaker.allow_request()
+
+
+class TestAssistantCircuitBreaker:
+    """Tests for failing fast while the assistant is down."""
+
+    @pytest.fixture
+    def breaker_settings(self, settings: Settings) -> Settings:
+        """Settings with a small threshold, fast probes and no cache."""
+        settings.assistant_breaker_threshold = 2
+        settings.assistant_probe_interval = 0.01
+        settings.assistant_cache_size = 0
+        return settings
+
+    async def test_fails_fast_then_recovers(self, breaker_settings: Settings) -> None:
+        """Test that the breaker opens, skips calls and closes after a probe."""
+        state = {"up": False, "completions": 0}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if not state["up"]:
+                raise httpx.ConnectError("refused")
+            if request.url.path.endswith("/models"):
+                return httpx.Response(200, json={"data": []})
+            state["completions"] += 1
+            return httpx.Response(
+                200, json={"choices": [{"message": {"content": "yes"}}]}
+            )
+
+        metrics = Metrics()
+        service = AssistantService(
+            breaker_settings, transport=httpx.MockTransport(handler), metrics=metrics
+        )
+        try:
+            for _ in range(2):
+                assert await service.get_suggested_input("Continue?") is None
+            assert service.breaker is not None
+            assert service.breaker.is_open
+
+            # Open: fails fast without a request
+            assert await service.get_suggested_input("Continue?") is None
+            assert metrics.assistant_errors.value("circuit_open") == 1
+            assert metrics.assistant_errors.value("connection") == 2
+
+            await asyncio.sleep(0.05)
+            assert service.last_probe is not None
+            assert service.last_probe.ok is False
+
+            state["up"] = True
+            for _ in range(100):
+                if not service.breaker.is_open:
+                    break
+                await asyncio.sleep(0.01)
+            assert service.breaker.state == "closed"
+            assert service.last_probe.ok is True
+            assert service.last_probe.detail == "status 200"
+            assert await service.get_suggested_input("Continue?") == "yes"
+            assert state["completions"] == 1
+        finally:
+            await service.aclose()
+
+    async def test_unexpected_probe_error_keeps_probing(
+        self, breaker_settings: Settings
+    ) -> None:
+        """Test that a probe failing in an unexpected way is retried."""
+        state = {"probes": 0}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if not request.url.path.endswith("/models"):
+                raise httpx.ConnectError("refused")
+            state["probes"] += 1
+            if state["probes"] == 1:
+                raise RuntimeError("broken transport")
+            return httpx.Response(200, json={"data": []})
+
+        service = AssistantService(
+            breaker_settings, transport=httpx.MockTransport(handler)
+        )
+        try:
+            for _ in range(2):
+                await service.get_suggested_input("Continue?")
+            assert service.breaker is not None
+            assert service.breaker.is_open
+            for _ in range(100):
+                if not service.breaker.is_open:
+                    break
+                await asyncio.sleep(0.01)
+            assert service.breaker.state == "closed"
+            assert state["probes"] >= 2
+        finally:
+            await service.aclose()
+
+    async def test_client_errors_do_not_open(self, breaker_settings: Settings) -> None:
+        """Test that 4xx responses and empty replies are not outages."""
+        transport = httpx.MockTransport(lambda _r: httpx.Response(400, text="bad"))
+        service = AssistantService(breaker_settings, transport=transport)
+        for _ in range(5):
+            await service.get_suggested_input("Continue?")
+        await service.aclose()
+        assert service.breaker is not None
+        assert service.breaker.state == "closed"
+
+    async def test_breaker_disabled(self, breaker_settings: Settings) -> None:
+        """Test that a threshold of 0 disables the breaker."""
+        breaker_settings.assistant_breaker_threshold = 0
+        calls = 0
+
+        def handler(_request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            raise httpx.ConnectError("refused")
+
+        service = AssistantService(
+            breaker_settings, transport=httpx.MockTransport(handler)
+        )
+        for _ in range(4):
+            await service.get_suggested_input("Continue?")
+        await service.aclose()
+        assert service.breaker is None
+        assert calls == 4
+
+
+def _completion(content: str) -> httpx.Response:
+    """A chat completion response with the given content."""
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+class TestAssistantBackends:
+    """Tests for parsing the backend list."""
+
+    def test_default_single_backend(self, settings: Settings) -> None:
+        """Test that host, port and model are used without a backend list."""
+        backends = parse_backends(settings)
+        assert [(b.url, b.model) for b in backends] == [
+            ("http://localhost:4141", settings.assistant_model)
+        ]
+
+    def test_backend_list(self, settings: Settings) -> None:
+        """Test URLs, optional models and optional schemes."""
+        settings.assistant_backends = (
+            "http://fast:8000/v1/=small, slow:9000 ,https://remote=large"
+        )
+        backends = parse_backends(settings)
+        assert [(b.url, b.model) for b in backends] == [
+            ("http://fast:8000/v1", "small"),
+            ("http://slow:9000", settings.assistant_model),
+            ("https://remote", "large"),
+        ]
+
+
+class TestAssistantHedging:
+    """Tests for hedged requests across several backends."""
+
+    @pytest.fixture
+    def hedge_settings(self, settings: Settings) -> Settings:
+        """Settings with two backends and no cache."""
+        settings.assistant_backends = "http://primary=p-model,http://secondary=s-model"
+        settings.assistant_cache_size = 0
+        settings.assistant_hedge_delay = 0.05
+        return settings
+
+    @staticmethod
+    def _service(
+        settings: Settings, delays: dict[str, float], statuses: dict[str, int]
+    ) -> tuple[AssistantService, list[tuple[str, str]]]:
+        """Create a service whose backends answer after per-host delays."""
+        calls: list[tuple[str, str]] = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            host = request.url.host
+            calls.append((host, json.loads(request.content)["model"]))
+            await asyncio.sleep(delays.get(host, 0))
+            status = statuses.get(host, 200)
+            if status != 200:
+                return httpx.Response(status, text="down")
+            return _completion(f"from {host}")
+
+        service = AssistantService(settings, transport=httpx.MockTransport(handler))
+        return service, calls
+
+    async def test_fast_primary_not_hedged(self, hedge_settings: Settings) -> None:
+        """Test that a primary answering within the delay is used alone."""
+        service, calls = self._service(hedge_settings, {}, {})
+        assert await service.get_suggested_input("Continue?") == "from primary"
+        await service.aclose()
+        assert calls == [("primary", "p-model")]
+        assert service.backends[0].stats.wins == 1
+
+    async def test_slow_primary_hedged(self, hedge_settings: Settings) -> None:
+        """Test that a slow primary is hedged and then cancelled."""
+        service, calls = self._service(hedge_settings, {"primary": 5}, {})
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        assert await service.get_suggested_input("Continue?") == "from secondary"
+        assert loop.time() - start < 1
+        await service.aclose()
+        assert calls == [("primary", "p-model"), ("secondary", "s-model")]
+        primary, secondary = service.backends
+        assert primary.stats.cancelled == 1
+        assert secondary.stats.wins == 1
+
+    async def test_failed_primary_fails_over_at_once(
+        self, hedge_settings: Settings
+    ) -> None:
+        """Test that an error from the primary starts the next backend."""
+        hedge_settings.assistant_hedge_delay = 30
+        service, _ = self._service(hedge_settings, {}, {"primary": 500})
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        assert await service.get_suggested_input("Continue?") == "from secondary"
+        assert loop.time() - start < 1
+        await service.aclose()
+        assert service.backends[0].stats.failures == 1
+
+    async def test_all_backends_fail(self, hedge_settings: Settings) -> None:
+        """Test that the call fails as an outage when every backend is down."""
+        metrics = Metrics()
+        service, _ = self._service(
+            hedge_settings, {}, {"primary": 503, "secondary": 502}
+        )
+        service._metrics = metrics
+        assert await service.get_suggested_input("Continue?") is None
+        await service.aclose()
+        assert metrics.assistant_errors.value("server_error") == 1
+        assert service.breaker is not None
+        assert service.breaker.consecutive_failures == 1
+
+    def test_adaptive_hedge_delay(self, hedge_settings: Settings) -> None:
+        """Test that the delay follows the backend's p95 once it has samples."""
+        hedge_settings.assistant_hedge_delay = None
+        service = AssistantService(hedge_settings)
+        primary = service.backends[0]
+        assert service.hedge_delay(primary) == AssistantService.INITIAL_HEDGE_DELAY
+
+        primary.stats.latencies.extend(i / 100 for i in range(1, 101))
+        assert service.hedge_delay(primary) == pytest.approx(0.96)
+
+        hedge_settings.assistant_hedge_delay = 0.2
+        assert service.hedge_delay(primary) == 0.2
@@ -1,5 +1,8 @@
 """Tests for settings configuration."""
 
+import pytest
+from pydantic import ValidationError
+
 from copilot_interactive.config.settings import Settings, get_settings
 
 
@@ -11,13 +14,55 @@ class TestSettings:
         settings = Settings()
         assert settings.app_port == 4000
         assert settings.app_host == "0.0.0.0"
+        assert settings.app_uds is None
+        assert settings.console_broker_path is None
+        assert settings.console_broker_grace == 30.0
         assert settings.input_timeout == 540
+        assert settings.input_coalescing is False
+        assert settings.answer_memory_path is None
+        assert settings.answer_memory_policy == "prefill"
+        assert settings.answer_memory_min_similarity == 0.9
+        assert settings.transcript_path is None
+        assert settings.transcript_fsync_interval == 1.0
+        assert settings.transcript_max_bytes == 10_000_000
+        assert settings.transcript_backup_count == 5
+        assert settings.transcript_compress is False
+        assert settings.transcript_queue_size == 10_000
+        assert settings.job_retention == 600.0
+        assert settings.job_max_wait == 60.0
         assert settings.assistant_host == "localhost"
         assert settings.assistant_port == 4141
         assert settings.assistant_timeout == 10
         assert settings.assistant_model == "gpt-5-mini"
+        assert settings.assistant_max_connections == 10
+        assert settings.assistant_max_keepalive_connections == 5
+        assert settings.assistant_keepalive_expiry == 30.0
+        assert settings.assistant_http2 is False
+        assert settings.assistant_streaming is False
+        assert settings.assistant_prefetch is False
+        assert settings.assistant_backends == ""
+        assert settings.assistant_hedge_delay is None
+        assert settings.assistant_breaker_threshold == 3
+        assert settings.assistant_probe_interval == 5.0
+        assert settings.assistant_cache_size == 0
+        assert settings.assistant_cache_ttl == 3600.0
+        assert settings.assistant_cache_path is None
         assert settings.notification_enabled is True
+        assert settings.notification_backend == "auto"
+        assert settings.notification_command == ""
         assert settings.notification_max_content_length == 200
+        assert settings.notification_timeout == 5.0
+        assert settings.notification_max_concurrency == 2
+
+    def test_answer_memory_policy_validated(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that an unknown answer memory policy is rejected at startup."""
+        monkeypatch.setenv("ANSWER_MEMORY_POLICY", "auto")
+        assert Settings().answer_memory_policy == "auto"
+        monkeypatch.setenv("ANSWER_MEMORY_POLICY", "auot")
+        with pytest.raises(ValidationError):
+            Settings()
 
     def test_custom_port(self) -> None:
         """Test setting custom port."""
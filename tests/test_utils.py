@@ -1,7 +1,32 @@
 """Tests for utility functions."""
 
-from copilot_interactive.utils.platform import get_platform_name, is_linux, is_windows
-from copilot_interactive.utils.text import sanitize_input, truncate_text
+import socket
+import tempfile
+from collections.abc import Generator
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+from copilot_interactive.utils.platform import (
+    bind_unix_socket,
+    get_platform_name,
+    is_linux,
+    is_windows,
+)
+from copilot_interactive.utils.text import (
+    match_choice,
+    normalize_context,
+    sanitize_input,
+    truncate_text,
+)
+from copilot_interactive.utils.timing import (
+    RequestTiming,
+    current_timing,
+    load_tracer,
+    set_tracer,
+    span,
+)
 
 
 class TestTruncateText:
@@ -75,6 +100,60 @@ class TestSanitizeInput:
         assert result == ""
 
 
+class TestNormalizeContext:
+    """Tests for normalize_context function."""
+
+    def test_ignores_case_and_whitespace(self) -> None:
+        """Test that case and whitespace runs are normalized."""
+        assert normalize_context("  Run\tthe   TESTS? \n") == "run the tests?"
+
+    def test_empty_string(self) -> None:
+        """Test empty string input."""
+        assert normalize_context("") == ""
+
+
+class TestMatchChoice:
+    """Tests for match_choice function."""
+
+    @pytest.mark.parametrize(
+        ("answer", "expected"),
+        [
+            ("2", "production"),
+            (" 3 ", "Roll back"),
+            ("1) staging", "staging"),
+            ("2. because it is ready", "production"),
+            ("roll  BACK", "Roll back"),
+            ('"production".', "production"),
+            ("0", None),
+            ("4", None),
+            ("2nd", None),
+            ("prod", None),
+            ("", None),
+        ],
+    )
+    def test_maps_numbers_and_text(self, answer: str, expected: str | None) -> None:
+        """Test that numbers and choice texts map onto the choices."""
+        choices = ["staging", "production", "Roll back"]
+        assert match_choice(answer, choices) == expected
+
+    @pytest.mark.parametrize(
+        ("answer", "choices", "expected"),
+        [
+            ("1 minute", ["5 minutes", "1 minute"], "1 minute"),
+            ("10 minutes", ["1 minute", "10 minutes"], "10 minutes"),
+            ("2", ["1 minute", "10 minutes"], "10 minutes"),
+            ("2) 10 minutes", ["1 minute", "10 minutes"], "10 minutes"),
+            ("3", ["1", "3", "5"], "3"),
+            ("2 minutes", ["1 minute", "10 minutes"], None),
+        ],
+    )
+    def test_choices_starting_with_digits(
+        self, answer: str, choices: list[str], expected: str | None
+    ) -> None:
+        """Test that choice texts win over reading a leading number as index."""
+        assert match_choice(answer, choices) == expected
+
+
 class TestPlatformUtils:
     """Tests for platform utility functions."""
 
@@ -101,3 +180,81 @@ class TestPlatformUtils:
             assert not is_linux()
         if is_linux():
             assert not is_windows()
+
+    def test_bind_unix_socket_replaces_stale_socket(self) -> None:
+        """Test that a socket left by an earlier run does not block binding."""
+        with tempfile.TemporaryDirectory(prefix="ciu") as directory:
+            path = Path(directory) / "server.sock"
+            bind_unix_socket(path).close()
+            sock = bind_unix_socket(path)
+            assert sock.family == socket.AF_UNIX
+            assert path.stat().st_mode & 0o777 == 0o600
+            sock.close()
+
+    def test_bind_unix_socket_keeps_other_files(self, tmp_path: Path) -> None:
+        """Test that a regular file at the path is not deleted."""
+        path = tmp_path / "data.txt"
+        path.write_text("keep")
+        with pytest.raises(OSError):
+            bind_unix_socket(path)
+        assert path.read_text() == "keep"
+
+
+class TestTimingSpans:
+    """Tests for per-request timing spans."""
+
+    def test_span_is_noop_outside_request(self) -> None:
+        """Test that spans cost nothing when no request is being timed."""
+        assert current_timing() is None
+        assert span("a") is span("b")
+        with span("a"):
+            pass
+
+    def test_spans_recorded_for_current_request(self) -> None:
+        """Test that spans land in the active timing and its header."""
+        timing = RequestTiming("req-1")
+        token = timing.activate()
+        try:
+            assert current_timing() is timing
+            with span("notify"):
+                pass
+            with span("terminal_wait"):
+                pass
+        finally:
+            RequestTiming.deactivate(token)
+
+        assert current_timing() is None
+        assert [s.name for s in timing.spans] == ["notify", "terminal_wait"]
+        assert all(s.duration >= 0 and s.start >= 0 for s in timing.spans)
+        header = timing.server_timing()
+        assert header.startswith("notify;dur=")
+        assert ", terminal_wait;dur=" in header
+        assert timing.last_end is not None
+
+    def test_tracer_receives_spans(self) -> None:
+        """Test that an external tracer wraps every recorded span."""
+        events: list[str] = []
+
+        @contextmanager
+        def tracer(name: str) -> Generator[None, None, None]:
+            events.append(f"start {name}")
+            yield
+            events.append(f"end {name}")
+
+        timing = RequestTiming("req-2")
+        token = timing.activate()
+        set_tracer(tracer)
+        try:
+            with span("assistant"):
+                events.append("work")
+        finally:
+            set_tracer(None)
+            RequestTiming.deactivate(token)
+        assert events == ["start assistant", "work", "end assistant"]
+
+    def test_load_tracer(self) -> None:
+        """Test that tracers are imported from module:attribute paths."""
+        assert load_tracer("copilot_interactive.utils.timing:span") is span
+        assert load_tracer("copilot_interactive.utils.timing:missing") is None
+        assert load_tracer("no_such_module_xyz:tracer") is None
+        assert load_tracer("copilot_interactive.utils.timing:logger") is None